@@ -10,36 +10,27 @@ This app allows users to upload a dataset (CSV, Excel, JSON, Parquet), ask a que
 import streamlit as st
 import pandas as pd
 import base64
+import contextlib
 import io
 import sys
 import os
+import time
+import uuid
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+from core.cancellation import DEFAULT_TIMEOUT_SECONDS, CancelToken, background_stream
 from core.upload import validate_file_upload
-from graph.grafo import build_graph
-from core.analysis import run_dataframe_analysis as executar_analise_dataframe
-
-# Example questions for regular datasets
-EXAMPLE_QUESTIONS = [
-    "What is the average price?",
-    "Which region has the highest sales?",
-    "How many properties have 3 bedrooms?",
-    "What is the total revenue by category?"
-]
-
-# Health insurance demo questions
-INSURANCE_QUESTIONS = [
-    "What is the average charge per region?",
-    "Do smokers pay more than non-smokers?",
-    "Show the relation between BMI and charges",
-    "What is the average charge by age group?",
-    "Which region has the lowest average cost?"
-]
+from core.store import get_dataset_store, hash_bytes
+from core.prefetch import get_prefetcher
+from core.ingest_cache import get_ingestion_cache
+from core.excel import list_excel_sheets, sheet_key
+from utils.examples import EXAMPLE_QUESTIONS, INSURANCE_QUESTIONS
+from utils.uploads import validate_upload_bytes
 
 # Supported file types
-FILE_TYPES = ["csv", "xlsx", "json", "parquet"]
+FILE_TYPES = ["csv", "xlsx", "xls", "json", "jsonl", "ndjson", "parquet"]
 
 # Streamlit app configuration
 st.set_page_config(
@@ -100,12 +91,19 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # === SESSION STATE INITIALIZATION ===
-if "demo_df" not in st.session_state:
-    st.session_state.demo_df = None
+if "demo_handle" not in st.session_state:
+    st.session_state.demo_handle = None
+if "upload_handle" not in st.session_state:
+    st.session_state.upload_handle = None
+if "excel_sheets" not in st.session_state:
+    st.session_state.excel_sheets = (None, [])
 if "demo_question" not in st.session_state:
     st.session_state.demo_question = ""
 if "is_demo_loaded" not in st.session_state:
     st.session_state.is_demo_loaded = False
+if "conversation_id" not in st.session_state:
+    # Thread id of this session's conversation in the graph checkpointer
+    st.session_state.conversation_id = uuid.uuid4().hex
 
 # === DEMO DATA SECTION ===
 st.markdown('<div class="demo-section">', unsafe_allow_html=True)
@@ -126,24 +124,27 @@ if demo_clicked:
     try:
         demo_path = os.path.join("data", "insurance.csv")
         if not os.path.exists(demo_path):
-            st.session_state.demo_df = None
+            st.session_state.demo_handle = None
             st.session_state.is_demo_loaded = False
             st.warning("⚠️ Demo file 'data/insurance.csv' not found. Please add the file to the data folder.")
         else:
-            demo_df = pd.read_csv(demo_path)
-            st.session_state.demo_df = demo_df
+            # Every session shares one read-only copy of the demo dataset
+            demo_handle = get_dataset_store().acquire_file(demo_path, pd.read_csv)
+            if st.session_state.demo_handle is not None:
+                st.session_state.demo_handle.release()
+            st.session_state.demo_handle = demo_handle
             st.session_state.demo_question = INSURANCE_QUESTIONS[0]
             st.session_state.is_demo_loaded = True
             is_demo = True
             st.success("✅ Demo dataset loaded successfully!")
     except Exception as e:
-        st.session_state.demo_df = None
+        st.session_state.demo_handle = None
         st.session_state.is_demo_loaded = False
         st.error(f"❌ Could not load demo data: {e}")
 
 # Use demo data if loaded
-if st.session_state.demo_df is not None and st.session_state.is_demo_loaded:
-    df = st.session_state.demo_df.copy()
+if st.session_state.demo_handle is not None and st.session_state.is_demo_loaded:
+    df = st.session_state.demo_handle.frame()
     is_demo = True
 
 # === MAIN CONTENT AREA ===
@@ -157,17 +158,45 @@ with col1:
     uploaded_file = st.file_uploader(
         "Choose a file to analyze",
         type=FILE_TYPES,
-        help="Supported formats: CSV, Excel (.xlsx), JSON, Parquet",
+        help="Supported formats: CSV, Excel (.xlsx, .xls), JSON, JSON Lines, Parquet",
         label_visibility="collapsed"
     )
     
     if uploaded_file is not None and not is_demo:
         try:
-            @st.cache_data(show_spinner=False)
-            def get_dataframe(file):
-                return validate_file_upload(file)
+            # Reject oversized or mislabeled files before hashing or parsing
+            upload_bytes = uploaded_file.getvalue()
+            validate_upload_bytes(upload_bytes, uploaded_file.name)
+            
+            # Reuse the session's handle while the same file stays uploaded
+            upload_key = hash_bytes(upload_bytes)
+            
+            # Multi-sheet workbooks: list sheets without parsing, load only the chosen one
+            sheet_name = None
+            if uploaded_file.name.lower().endswith(('.xlsx', '.xls')):
+                if st.session_state.excel_sheets[0] != upload_key:
+                    st.session_state.excel_sheets = (upload_key, list_excel_sheets(uploaded_file))
+                sheets = st.session_state.excel_sheets[1]
+                if len(sheets) > 1:
+                    sheet_name = st.selectbox("Sheet to analyze:", sheets, key="excel_sheet_selectbox")
+                    upload_key = sheet_key(upload_key, sheet_name)
             
-            df = get_dataframe(uploaded_file)
+            upload_handle = st.session_state.upload_handle
+            if upload_handle is None or upload_handle.key != upload_key:
+                # Parsed uploads are snapshotted on disk, so re-uploading the
+                # same bytes skips parsing even after a restart
+                new_handle = get_dataset_store().acquire(
+                    upload_key,
+                    lambda: get_ingestion_cache().load(
+                        upload_key, lambda: validate_file_upload(uploaded_file, sheet_name)
+                    ),
+                )
+                if upload_handle is not None:
+                    upload_handle.release()
+                    get_prefetcher().release(upload_handle.key)
+                st.session_state.upload_handle = upload_handle = new_handle
+            
+            df = upload_handle.frame()
             st.success(f"✅ File loaded! {df.shape[0]} rows × {df.shape[1]} columns")
             st.session_state.is_demo_loaded = False  # Reset demo when new file uploaded
         except Exception as e:
@@ -176,6 +205,21 @@ with col1:
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # === BACKGROUND PREFETCH ===
+    # Profile the dataset and answer the suggested questions on a worker thread
+    # so that picking a suggestion returns instantly. A dataset that extends a
+    # previous upload only profiles its new rows.
+    profile = None
+    dataset_key = ""
+    if df is not None:
+        active_handle = st.session_state.demo_handle if is_demo else st.session_state.upload_handle
+        dataset_key = active_handle.key
+        suggestions = INSURANCE_QUESTIONS if is_demo else EXAMPLE_QUESTIONS
+        get_prefetcher().schedule(dataset_key, df, suggestions)
+        profile = get_prefetcher().profile(dataset_key)
+        if profile is not None and profile.appended_rows:
+            st.info(f"➕ Detected {profile.appended_rows} appended rows; only the new rows were profiled.")
+    
     # === DATA PREVIEW ===
     if df is not None:
         with st.expander("👀 Preview data (first 10 rows)", expanded=False):
@@ -193,7 +237,8 @@ with col2:
         <strong>💡 Try questions like:</strong><br>
         • <em>What is the average charge by region?</em><br>
         • <em>Do smokers pay more than non-smokers?</em><br>
-        • <em>What is the relation between BMI and charges?</em>
+        • <em>What is the relation between BMI and charges?</em><br>
+        • <em>...then follow up with "and for smokers only?"</em>
         </div>
         """, unsafe_allow_html=True)
         
@@ -251,64 +296,117 @@ with col2:
 
 # === ANALYSIS AND RESULTS ===
 if analyze_button and df is not None and question.strip():
-    with st.spinner("🔍 Analyzing with our agent..."):
-        try:
-            # Build the LangGraph
-            graph = build_graph()
-            
-            # Prepare initial state for the graph
-            initial_state = {
+    try:
+        # LangGraph is imported on first analysis, keeping it off the cold start
+        from graph.grafo import get_conversation_graph
+        graph = get_conversation_graph()
+        
+        # Prepare the turn's state; earlier intents come from the checkpointer,
+        # while the DataFrame and profile travel in the config (not checkpointed)
+        initial_state = {
+            "question": question,
+            "next_node": "",
+            "text_answer": "",
+            "chart_base64": None,
+            "status": "",
+            "message": "",
+            "dataset_key": dataset_key
+        }
+        # The run stops at its deadline, or as soon as this script run ends
+        # (Stop button, a new question, or the user leaving the page)
+        cancel_token = CancelToken(DEFAULT_TIMEOUT_SECONDS)
+        config = {
+            "configurable": {
+                "thread_id": st.session_state.conversation_id,
                 "df": df,
-                "question": question,
-                "next_node": "",
-                "text_answer": "",
-                "chart_base64": None,
-                "status": "",
-                "message": ""
+                "profile": profile,
+                "cancel_token": cancel_token
             }
+        }
+        
+        # === DISPLAY RESULTS ===
+        st.markdown('<div class="result-container">', unsafe_allow_html=True)
+        st.markdown(f"**Question:** _{question}_")
+        st.markdown("---")
+        
+        # Each node's update is rendered as it arrives: routing decision,
+        # approximate numbers, exact numbers, then the chart
+        status_box = st.empty()
+        answer_box = st.empty()
+        chart_box = st.empty()
+        status_box.info("🔍 Analyzing with our agent...")
+        st.button("⏹ Stop analysis", key="stop_analysis")
+        
+        result = dict(initial_state)
+        started = time.monotonic()
+        updates = background_stream(
+            lambda: graph.stream(initial_state, config, stream_mode="updates"),
+            cancel_token
+        )
+        with contextlib.closing(updates):
+            for update in updates:
+                if update is None:
+                    # Still running; touching the page lets Streamlit stop this
+                    # script (and so cancel the run) when the session moves on
+                    if result.get("status") != "partial":
+                        status_box.info(f"🔍 Analyzing with our agent... {time.monotonic() - started:.0f}s")
+                    continue
+                for node_name, node_state in update.items():
+                    if not node_state:
+                        continue
+                    result.update(node_state)
+                    if node_name == "interpreter":
+                        status_box.info(f"🧭 Routing: {result.get('next_node') or 'analysis'}")
+                    elif result.get("status") == "partial":
+                        status_box.info(f"⏳ {result.get('message', 'Computing exact numbers...')}")
+                        answer_box.markdown(f"### 📝 Preliminary Results\n**Answer:** {result.get('text_answer', '')}")
+                    elif result.get("status") == "ok":
+                        status_box.success("✅ Analysis completed!")
+                        answer_text = result.get("text_answer", "No answer returned.")
+                        answer_box.markdown(f"### 📝 Analysis Results\n**Answer:** {answer_text}")
+                    
+                        # Display chart if available
+                        if result.get("chart_base64"):
+                            with chart_box.container():
+                                st.markdown("### 📊 Visualization")
+                                try:
+                                    chart_data = base64.b64decode(result["chart_base64"])
+                                    st.image(chart_data, use_column_width=True, caption="Generated visualization")
+                                except Exception as e:
+                                    st.error(f"❌ Error displaying chart: {e}")
+        
+        if result.get("status") == "ok":
+            intent = result.get("intent") or {}
+            if intent.get("follow_up"):
+                filters = ", ".join(f"{col} = {' or '.join(map(str, values))}" for col, values in intent.get("filters", []))
+                st.caption(f"🧠 Follow-up of your previous question{f' (filters: {filters})' if filters else ''}")
             
-            # Run the analysis using the graph
-            result = graph.invoke(initial_state)
-            
-            # === DISPLAY RESULTS ===
-            st.markdown('<div class="result-container">', unsafe_allow_html=True)
-            
-            if result.get("status") == "ok":
-                st.success("✅ Analysis completed!")
-                
-                # Display the question asked
-                st.markdown(f"**Question:** _{question}_")
-                st.markdown("---")
-                
-                # Display text answer
-                st.markdown("### 📝 Analysis Results")
-                answer_text = result.get("text_answer", "No answer returned.")
-                st.markdown(f"**Answer:** {answer_text}")
-                
-                # Display chart if available
-                if result.get("chart_base64"):
-                    st.markdown("### 📊 Visualization")
-                    try:
-                        chart_data = base64.b64decode(result["chart_base64"])
-                        st.image(chart_data, use_column_width=True, caption="Generated visualization")
-                    except Exception as e:
-                        st.error(f"❌ Error displaying chart: {e}")
-                
-                # Show dataset info again for context
-                if df is not None:
-                    with st.expander("📋 Dataset context", expanded=False):
-                        st.write(f"**Analyzed dataset:** {df.shape[0]} rows, {df.shape[1]} columns")
-                        st.write(f"**Columns:** {', '.join(df.columns[:5])}{'...' if len(df.columns) > 5 else ''}")
-                
-            else:
-                st.error(f"❌ Analysis failed: {result.get('message', 'Unknown error')}")
-                st.info("💡 Try rephrasing your question or check your dataset.")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-        except Exception as e:
-            st.error(f"❌ An error occurred during analysis: {e}")
-            st.info("💡 Please check your data and question, then try again.")
+            # The values behind the answer, from its structured result
+            tables = (result.get("result") or {}).get("tables") or []
+            if tables:
+                with st.expander("🔢 Result values", expanded=False):
+                    for table in tables:
+                        st.caption(table["title"])
+                        st.dataframe(pd.DataFrame(table["rows"], columns=table["columns"]), hide_index=True)
+
+            # Show dataset info again for context
+            with st.expander("📋 Dataset context", expanded=False):
+                st.write(f"**Analyzed dataset:** {df.shape[0]} rows, {df.shape[1]} columns")
+                st.write(f"**Columns:** {', '.join(df.columns[:5])}{'...' if len(df.columns) > 5 else ''}")
+        elif result.get("status") in ("timeout", "cancelled"):
+            status_box.warning(f"⏹ {result.get('message', 'The analysis was stopped.')}")
+            answer_box.empty()
+            st.info("💡 Try a narrower question, e.g. with a filter or fewer groups.")
+        else:
+            status_box.error(f"❌ Analysis failed: {result.get('message', 'Unknown error')}")
+            answer_box.empty()
+            st.info("💡 Try rephrasing your question or check your dataset.")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+    except Exception as e:
+        st.error(f"❌ An error occurred during analysis: {e}")
+        st.info("💡 Please check your data and question, then try again.")
 
 # === FOOTER ===
 st.markdown("---")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Batch runner for the Data Analyst Agent.
+
+Answers a file of questions against one or more datasets, loading each dataset
+once and running the questions in parallel through the analysis graph.
+
+Usage:
+    python batch.py data/ -q questions.txt -o answers.jsonl
+    python batch.py sales.csv inventory.parquet -q questions.json -o answers.parquet
+    python batch.py huge.parquet -q questions.txt --engine duckdb
+    python batch.py data/ -q questions.txt --engine polars
+"""
+
+import argparse
+import sys
+import os
+from typing import Optional, Sequence
+import time
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from core.backends import ENGINES
+from core.batch import find_datasets, load_questions, open_writer, run_batch
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Answer a file of questions against datasets in batch."
+    )
+    parser.add_argument("datasets", nargs="+", help="Dataset files or directories")
+    parser.add_argument("-q", "--questions", required=True,
+                        help="Question file (.txt one per line, .json list or .jsonl)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Output file (.jsonl or .parquet); '-' for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel workers (default: CPU count)")
+    parser.add_argument("--max-rows", type=int, default=None,
+                        help="Reject datasets with more rows (default: no limit)")
+    parser.add_argument("--max-size-mb", type=float, default=float("inf"),
+                        help="Reject files larger than this (default: no limit)")
+    parser.add_argument("--engine", choices=ENGINES, default="pandas",
+                        help="Execution engine: polars runs lazy multi-threaded plans, "
+                             "duckdb queries CSV/Parquet files in place for datasets "
+                             "larger than memory (default: pandas)")
+    parser.add_argument("--charts", action="store_true",
+                        help="Include base64 charts in the output")
+    parser.add_argument("--per-question", action="store_true",
+                        help="Compute each question on its own instead of computing "
+                             "the aggregates of all questions together")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the batch and report a summary on stderr."""
+    args = parse_args(argv)
+    datasets = find_datasets(args.datasets)
+    questions = load_questions(args.questions)
+    if not datasets or not questions:
+        print("❌ No datasets or no questions to process.", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    writer = open_writer(args.output, include_charts=args.charts)
+    answered = errors = 0
+    try:
+        for record in run_batch(
+            datasets,
+            questions,
+            max_workers=args.workers,
+            max_rows=args.max_rows,
+            max_size_mb=args.max_size_mb,
+            engine=args.engine,
+            vectorized=not args.per_question,
+        ):
+            writer.write(record)
+            answered += 1
+            errors += record["status"] == "error"
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {answered} answers ({errors} errors) for {len(datasets)} datasets "
+        f"in {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Startup import-time report for the Data Analyst Agent.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+prints where the cold-start time goes, grouped by top-level package.
+
+Usage:
+    python importtime.py                      # app, API and batch modules
+    python importtime.py graph.grafo --top 15
+"""
+
+import argparse
+import sys
+import os
+from typing import Optional, Sequence
+
+# Add src to path for imports
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+sys.path.append(SRC_DIR)
+
+from utils.importtime import DEFAULT_MODULES, measure
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Print the import-time report for the requested modules."""
+    parser = argparse.ArgumentParser(description="Report module import times.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES),
+                        help="Modules to import (default: entry point modules)")
+    parser.add_argument("--top", type=int, default=8,
+                        help="Packages and modules listed per report")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        report = measure(module, src_dir=SRC_DIR, top=args.top)
+        print(f"⏱️  {report.module}: {report.total_ms:.1f} ms")
+        print("   by package (self time):")
+        for package, ms in report.by_package:
+            print(f"     {package:<28} {ms:8.1f} ms")
+        print("   slowest modules (self time):")
+        for record in report.slowest:
+            print(f"     {record.module:<28} {record.self_us / 1000:8.1f} ms")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the Data Analyst Agent.
+
+Simulates concurrent analysts asking the example questions, in-process through
+the analysis graph (one Streamlit server) or against a running HTTP API, and
+writes a JSON report per load level: throughput, latency percentiles, errors,
+and memory/CPU over time (in-process runs only; with --url, monitor the
+server's process instead).
+
+Usage:
+    python loadtest.py --concurrency 1 4 16 --rows 1000 100000 -o report.json
+    python loadtest.py --url http://localhost:8000 --concurrency 8 --duration 60
+    python loadtest.py data/sample_data.csv -q questions.txt --requests 50
+"""
+
+import argparse
+import json
+import sys
+import os
+from typing import Optional, Sequence
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from core.batch import load_questions
+from core.upload import validate_file_upload
+from utils.loadtest import DEFAULT_QUESTIONS, GraphTarget, HTTPTarget, run_load, scale_dataset
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent users and report throughput and latency."
+    )
+    parser.add_argument("dataset", nargs="?", default=os.path.join("data", "insurance.csv"),
+                        help="Dataset to ask about (default: data/insurance.csv)")
+    parser.add_argument("-q", "--questions", default=None,
+                        help="Question file (default: the app's example questions)")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 4, 8],
+                        help="Simulated users; one run per level (default: 1 4 8)")
+    parser.add_argument("--rows", type=int, nargs="+", default=None,
+                        help="Dataset sizes to generate by resampling (default: as is)")
+    parser.add_argument("-n", "--requests", type=int, default=None,
+                        help="Questions per user (default: 20, or unlimited with --duration)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Stop each run after this many seconds")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Seconds each user waits between questions")
+    parser.add_argument("--url", default=None,
+                        help="HTTP API to load (default: the graph, in-process)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Compute every answer (in-process only; default uses the answer cache)")
+    parser.add_argument("--sample-interval", type=float, default=0.5,
+                        help="Seconds between progress and memory/CPU samples")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSON report file; '-' for stdout (default)")
+    parser.add_argument("--records", action="store_true",
+                        help="Include every request in the report")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run each load level and write the report."""
+    args = parse_args(argv)
+    questions = load_questions(args.questions) if args.questions else list(DEFAULT_QUESTIONS)
+    base = validate_file_upload(args.dataset, max_rows=None, max_size_mb=float("inf"))
+    name = os.path.splitext(os.path.basename(args.dataset))[0]
+    if args.rows:
+        datasets = {
+            f"{name}_{rows}": scale_dataset(base, rows, args.seed) for rows in args.rows
+        }
+    else:
+        datasets = {name: base}
+
+    requests_per_user = args.requests
+    if requests_per_user is None and args.duration is None:
+        requests_per_user = 20
+
+    runs = []
+    for concurrency in args.concurrency:
+        if args.url:
+            target = HTTPTarget(base_url=args.url)
+        else:
+            target = GraphTarget(cache_answers=not args.no_cache)
+        report = run_load(
+            target,
+            datasets,
+            questions,
+            concurrency=concurrency,
+            requests_per_user=requests_per_user,
+            duration=args.duration,
+            think_time=args.think_time,
+            seed=args.seed,
+            sample_interval=args.sample_interval,
+        )
+        if not args.records:
+            report.pop("requests")
+        runs.append(report)
+        summary = report["summary"]
+        latency = summary["latency_ms"]
+        line = (
+            f"👥 {concurrency:>3} users: {summary['throughput_rps']:.2f} req/s, "
+            f"p50 {latency.get('p50', 0):.1f} ms, p95 {latency.get('p95', 0):.1f} ms"
+        )
+        if "peak_rss_mb" in summary:
+            line += f", peak RSS {summary['peak_rss_mb']:.0f} MB, CPU {summary['mean_cpu_percent']:.0f}%"
+        print(line, file=sys.stderr)
+
+    output = json.dumps({"runs": runs}, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+Headless ASGI service for the Data Analyst Agent.
+
+Endpoints:
+    POST   /datasets?name=<file name>[&sheet=<sheet>]  Upload a dataset (raw body)
+    GET    /datasets/<id>                             Dataset info
+    DELETE /datasets/<id>                             Release a dataset
+    POST   /datasets/<id>/questions                   Ask {"question": "..."}, optionally
+                                                      joined to other uploaded datasets:
+                                                      {"question": ..., "datasets": {name: id}},
+                                                      and profiled with {"profile": true}.
+                                                      Answers come as text and as a
+                                                      structured "result" (core.results)
+    GET    /metrics                                   Prometheus text metrics
+    GET    /health                                    Liveness check
+
+Parsing and analysis run on a bounded worker pool. Requests beyond the pool
+size wait in a bounded queue; once that is full the service answers 503 with
+``Retry-After`` instead of piling up work. Uploaded datasets stay loaded
+server-side (as read-only store handles) and are referred to by their content
+hash, so clients upload once and ask many questions.
+
+Run with any ASGI server, e.g. ``uvicorn api.server:app --app-dir src``.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from core.answer_cache import get_answer_cache
+from core.cancellation import DEFAULT_TIMEOUT_SECONDS, CancelToken
+from core.excel import sheet_key
+from core.ingest_cache import get_ingestion_cache
+from core.prefetch import get_prefetcher
+from core.profiling import profiled_invoke
+from core.store import DatasetHandle, DatasetStore, get_dataset_store, hash_bytes
+from core.upload import validate_file_upload
+from utils.uploads import MAX_FILE_SIZE_MB, validate_upload_bytes
+
+MAX_WORKERS = 4
+# Requests allowed to wait for a worker before new ones are rejected
+MAX_QUEUE = 16
+RETRY_AFTER_SECONDS = 1
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_DATASET_PATH = re.compile(r"^/datasets/([0-9a-f]+)$")
+_QUESTIONS_PATH = re.compile(r"^/datasets/([0-9a-f]+)/questions$")
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """Error returned to the client as a JSON body with the given status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _dataset_id(pattern: "re.Pattern[str]", scope: Scope) -> str:
+    """Dataset id in the path of a request routed on ``pattern``."""
+    match = pattern.match(scope["path"])
+    if match is None:
+        raise HTTPError(404, f"Not found: {scope['path']}")
+    return match.group(1)
+
+
+class Metrics:
+    """Request counters and gauges exposed on ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, int], int] = defaultdict(int)
+        self.rejected = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.question_seconds = 0.0
+        self.questions = 0
+
+    def observe_request(self, route: str, status: int) -> None:
+        with self._lock:
+            self.requests[(route, status)] += 1
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def set_queued(self, queued: int) -> None:
+        with self._lock:
+            self.queued = queued
+
+    def add_in_flight(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    def observe_question(self, seconds: float) -> None:
+        with self._lock:
+            self.question_seconds += seconds
+            self.questions += 1
+
+    def render(self, datasets: int) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        cache = get_answer_cache()
+        with self._lock:
+            lines = ["# TYPE analysis_requests_total counter"]
+            for (route, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'analysis_requests_total{{route="{route}",status="{status}"}} '
+                    f"{count}"
+                )
+            lines += [
+                "# TYPE analysis_rejected_total counter",
+                f"analysis_rejected_total {self.rejected}",
+                "# TYPE analysis_in_flight gauge",
+                f"analysis_in_flight {self.in_flight}",
+                "# TYPE analysis_queue_depth gauge",
+                f"analysis_queue_depth {self.queued}",
+                "# TYPE analysis_question_seconds summary",
+                f"analysis_question_seconds_sum {self.question_seconds:.6f}",
+                f"analysis_question_seconds_count {self.questions}",
+            ]
+        lines += [
+            "# TYPE analysis_datasets gauge",
+            f"analysis_datasets {datasets}",
+            "# TYPE answer_cache_hits_total counter",
+            f"answer_cache_hits_total {cache.hits}",
+            "# TYPE answer_cache_misses_total counter",
+            f"answer_cache_misses_total {cache.misses}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class AnalysisService:
+    """
+    ASGI application serving the analysis graph.
+
+    Args:
+        graph: Compiled graph to run questions on (built on first use if None).
+        store: Dataset store holding uploaded datasets.
+        max_workers: Size of the worker pool for parsing and analysis.
+        max_queue: Requests allowed to wait for a worker; beyond that, 503.
+        max_upload_mb: Largest accepted request body.
+        question_timeout: Seconds a question may run before it is stopped
+            and answered with status "timeout".
+    """
+
+    def __init__(
+        self,
+        graph: Any = None,
+        store: Optional[DatasetStore] = None,
+        max_workers: int = MAX_WORKERS,
+        max_queue: int = MAX_QUEUE,
+        max_upload_mb: float = MAX_FILE_SIZE_MB,
+        question_timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        self._graph = graph
+        self._graph_lock = threading.Lock()
+        self._store = store if store is not None else get_dataset_store()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis"
+        )
+        self._max_workers = max_workers
+        self._capacity = max_workers + max_queue
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._max_upload_bytes = int(max_upload_mb * 1024 * 1024)
+        self._question_timeout = question_timeout
+        self._datasets: Dict[str, DatasetHandle] = {}
+        self._datasets_lock = threading.Lock()
+        self.metrics = Metrics()
+
+    # === ASGI ===
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        # Unmatched paths share one label to keep metric cardinality bounded
+        route = "other"
+        try:
+            route, handler = self._route(scope["method"], scope["path"])
+            status, content_type, body = await handler(scope, receive)
+            headers: List[Tuple[bytes, bytes]] = []
+        except HTTPError as e:
+            status, content_type = e.status, "application/json"
+            body = json.dumps({"error": e.message}).encode("utf-8")
+            headers = []
+            if e.status == 503:
+                headers.append((b"retry-after", str(RETRY_AFTER_SECONDS).encode()))
+        except Exception:
+            logger.exception("Unhandled error on %s %s", scope["method"], scope["path"])
+            status, content_type = 500, "application/json"
+            body = json.dumps({"error": "Internal server error."}).encode("utf-8")
+            headers = []
+        self.metrics.observe_request(route, status)
+        headers += [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self) -> None:
+        """Release all datasets and stop the worker pool."""
+        with self._datasets_lock:
+            handles = list(self._datasets.values())
+            self._datasets.clear()
+        for handle in handles:
+            handle.release()
+        self._executor.shutdown(wait=False)
+
+    # === Plumbing ===
+
+    def _route(self, method: str, path: str) -> Tuple[str, Callable]:
+        if path == "/health" and method == "GET":
+            return path, self._health
+        if path == "/metrics" and method == "GET":
+            return path, self._metrics
+        if path == "/datasets" and method == "POST":
+            return path, self._upload
+        match = _DATASET_PATH.match(path)
+        if match and method in ("GET", "DELETE"):
+            handler = self._dataset_info if method == "GET" else self._release
+            return "/datasets/{id}", handler
+        match = _QUESTIONS_PATH.match(path)
+        if match and method == "POST":
+            return "/datasets/{id}/questions", self._ask
+        if match or _DATASET_PATH.match(path) or path in ("/datasets", "/metrics"):
+            raise HTTPError(405, f"Method {method} not allowed on {path}.")
+        raise HTTPError(404, f"Not found: {path}")
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(400, "Client disconnected.")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self._max_upload_bytes:
+                raise HTTPError(413, "Request body too large.")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn`` on the worker pool, or reject with 503 when saturated."""
+        with self._pending_lock:
+            if self._pending >= self._capacity:
+                self.metrics.reject()
+                raise HTTPError(503, "Server busy, please retry.")
+            self._pending += 1
+            self.metrics.set_queued(max(self._pending - self._max_workers, 0))
+
+        def job() -> Any:
+            self.metrics.add_in_flight(1)
+            try:
+                return fn(*args)
+            finally:
+                self.metrics.add_in_flight(-1)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+                self.metrics.set_queued(max(self._pending - self._max_workers, 0))
+
+    def _acquire(self, dataset_id: str) -> DatasetHandle:
+        """
+        A reference of the request's own to a registered dataset, so a
+        concurrent DELETE cannot release the data while the request uses it.
+        The caller releases it.
+        """
+        with self._datasets_lock:
+            handle = self._datasets.get(dataset_id)
+            if handle is None:
+                raise HTTPError(404, f"Unknown dataset: {dataset_id}")
+            return self._store.acquire(handle.key, handle.frame)
+
+    def _graph_instance(self) -> Any:
+        with self._graph_lock:
+            if self._graph is None:
+                from graph.grafo import get_graph
+
+                self._graph = get_graph()
+            return self._graph
+
+    @staticmethod
+    def _json(status: int, payload: Dict[str, Any]) -> Tuple[int, str, bytes]:
+        return status, "application/json", json.dumps(payload).encode("utf-8")
+
+    # === Handlers ===
+
+    async def _health(self, scope: Scope, receive: Receive) -> Tuple[int, str, bytes]:
+        return self._json(200, {"status": "ok"})
+
+    async def _metrics(self, scope: Scope, receive: Receive) -> Tuple[int, str, bytes]:
+        with self._datasets_lock:
+            datasets = len(self._datasets)
+        body = self.metrics.render(datasets).encode("utf-8")
+        return 200, "text/plain; version=0.0.4", body
+
+    async def _upload(self, scope: Scope, receive: Receive) -> Tuple[int, str, bytes]:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        file_name = query.get("name", [""])[0]
+        sheet_name = query.get("sheet", [None])[0]
+        if not file_name:
+            raise HTTPError(400, "Missing 'name' query parameter (file name).")
+        data = await self._read_body(receive)
+        try:
+            validate_upload_bytes(data, file_name)
+        except ValueError as e:
+            raise HTTPError(422, str(e))
+
+        key = sheet_key(hash_bytes(data), sheet_name)
+        with self._datasets_lock:
+            registered = key in self._datasets
+        if registered:
+            handle = self._acquire(key)
+        else:
+            handle = await self._run(self._load, key, data, file_name, sheet_name)
+        try:
+            return self._json(201, self._describe(key, handle.frame()))
+        finally:
+            handle.release()
+
+    def _load(
+        self, key: str, data: bytes, file_name: str, sheet_name: Optional[str]
+    ) -> DatasetHandle:
+        """Load and register a dataset; returns a reference for the request."""
+        def parse() -> Any:
+            upload = io.BytesIO(data)
+            upload.name = file_name
+            return validate_file_upload(upload, sheet_name)
+
+        try:
+            handle = self._store.acquire(
+                key, lambda: get_ingestion_cache().load(key, parse)
+            )
+        except ValueError as e:
+            raise HTTPError(422, str(e))
+        with self._datasets_lock:
+            existing = self._datasets.setdefault(key, handle)
+            if existing is not handle:
+                # Another request loaded the same dataset first; the new
+                # reference serves this request
+                return handle
+            request = self._store.acquire(key, handle.frame)
+        # Profile in the background so the first question can use it
+        get_prefetcher().schedule(key, request.frame(), [])
+        return request
+
+    @staticmethod
+    def _describe(dataset_id: str, df: Any) -> Dict[str, Any]:
+        return {
+            "dataset_id": dataset_id,
+            "rows": int(len(df)),
+            "columns": [str(col) for col in df.columns],
+        }
+
+    async def _dataset_info(
+        self, scope: Scope, receive: Receive
+    ) -> Tuple[int, str, bytes]:
+        dataset_id = _dataset_id(_DATASET_PATH, scope)
+        with self._acquire(dataset_id) as handle:
+            return self._json(200, self._describe(dataset_id, handle.frame()))
+
+    async def _release(self, scope: Scope, receive: Receive) -> Tuple[int, str, bytes]:
+        dataset_id = _dataset_id(_DATASET_PATH, scope)
+        with self._datasets_lock:
+            handle = self._datasets.pop(dataset_id, None)
+        if handle is None:
+            raise HTTPError(404, f"Unknown dataset: {dataset_id}")
+        handle.release()
+        get_prefetcher().release(dataset_id)
+        return self._json(200, {"dataset_id": dataset_id, "released": True})
+
+    async def _ask(self, scope: Scope, receive: Receive) -> Tuple[int, str, bytes]:
+        dataset_id = _dataset_id(_QUESTIONS_PATH, scope)
+        try:
+            payload = json.loads(await self._read_body(receive) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON.")
+        question = payload.get("question") if isinstance(payload, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "Missing 'question'.")
+        related = payload.get("datasets") or {}
+        if not isinstance(related, dict) or not all(
+            isinstance(value, str) for value in related.values()
+        ):
+            raise HTTPError(400, "'datasets' must map names to dataset ids.")
+        profile = payload.get("profile")
+        if profile is not None and not isinstance(profile, bool):
+            raise HTTPError(400, "'profile' must be true or false.")
+        # Held until the answer is written, even if the datasets are deleted
+        acquired: List[DatasetHandle] = []
+        try:
+            handle = self._acquire(dataset_id)
+            acquired.append(handle)
+            handles = {}
+            for name, value in related.items():
+                handles[name] = self._acquire(value)
+                acquired.append(handles[name])
+            result = await self._run(
+                self._answer, dataset_id, handle, question, handles, profile
+            )
+        finally:
+            for reference in acquired:
+                reference.release()
+        return self._json(200, result)
+
+    def _answer(
+        self,
+        dataset_id: str,
+        handle: DatasetHandle,
+        question: str,
+        related: Optional[Dict[str, DatasetHandle]] = None,
+        profile: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        related = related or {}
+        state = {
+            "df": handle.frame(),
+            "question": question,
+            "next_node": "",
+            "text_answer": "",
+            "chart_base64": None,
+            "status": "",
+            "message": "",
+            "profile": get_prefetcher().profile(dataset_id),
+            "dataset_key": dataset_id,
+        }
+        if related:
+            state["datasets"] = {name: other.frame() for name, other in related.items()}
+            state["dataset_keys"] = {name: other.key for name, other in related.items()}
+        config = {"configurable": {"cancel_token": CancelToken(self._question_timeout)}}
+        result = profiled_invoke(self._graph_instance(), state, config, profile=profile)
+        elapsed = time.perf_counter() - started
+        self.metrics.observe_question(elapsed)
+        response = {
+            "dataset_id": dataset_id,
+            "question": question,
+            "text_answer": result.get("text_answer", ""),
+            "chart_base64": result.get("chart_base64"),
+            "status": result.get("status", ""),
+            "message": result.get("message", ""),
+            "result": result.get("result"),
+            "elapsed_ms": round(elapsed * 1000, 3),
+        }
+        if result.get("profile_id"):
+            response["profile_id"] = result["profile_id"]
+        return response
+
+
+def create_app(**kwargs: Any) -> AnalysisService:
+    """Create the ASGI application (see AnalysisService for the options)."""
+    return AnalysisService(**kwargs)
+
+
+app = create_app()
@@ -0,0 +1,126 @@
+"""
+In-process client for the ASGI service.
+
+Calls the application directly (no sockets, no server process), which makes
+it suitable for tests and local experiments:
+
+    client = ASGITestClient(create_app())
+    dataset = client.post("/datasets?name=data.csv", body=csv_bytes).json()
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class Response(NamedTuple):
+    """HTTP response captured from the application."""
+
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+
+class ASGITestClient:
+    """
+    Minimal client that sends HTTP requests straight to an ASGI application.
+
+    Args:
+        app: ASGI application callable.
+        chunk_size: Request bodies are delivered in chunks of this size, as a
+            real server would.
+    """
+
+    def __init__(self, app: Callable, chunk_size: int = 64 * 1024) -> None:
+        self.app = app
+        self.chunk_size = chunk_size
+
+    async def arequest(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        json_body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        """Send a request from a running event loop."""
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+        url = urlsplit(path)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method.upper(),
+            "scheme": "http",
+            "path": url.path,
+            "raw_path": url.path.encode("latin-1"),
+            "query_string": url.query.encode("latin-1"),
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+
+        chunks = [
+            body[start:start + self.chunk_size]
+            for start in range(0, len(body), self.chunk_size)
+        ] or [b""]
+        messages = [
+            {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": index < len(chunks) - 1,
+            }
+            for index, chunk in enumerate(chunks)
+        ]
+
+        async def receive() -> Dict[str, Any]:
+            if messages:
+                return messages.pop(0)
+            return {"type": "http.disconnect"}
+
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        response_body: List[bytes] = []
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return Response(
+            status,
+            {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in response_headers
+            },
+            b"".join(response_body),
+        )
+
+    def request(self, method: str, path: str, **kwargs: Any) -> Response:
+        """Send a request and wait for the response."""
+        return asyncio.run(self.arequest(method, path, **kwargs))
+
+    def get(self, path: str, **kwargs: Any) -> Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str, **kwargs: Any) -> Response:
+        return self.request("DELETE", path, **kwargs)
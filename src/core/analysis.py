@@ -1,22 +1,20 @@
-import base64
-import io
-import ast
-from typing import Tuple, Optional
+import re
+from typing import Any, Callable, Tuple, Optional
 import pandas as pd
 
-from langchain_core.language_models import BaseLanguageModel
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable
-from langchain_sandbox import PyodideSandbox
-from langgraph.graph import StateGraph, END
-
 # For now, we'll use a mock LLM to avoid external dependencies
 # Replace with your preferred LLM and secure configuration
 # from langchain_openai import ChatOpenAI
 
+# Rows sampled for the quick estimate shown while exact numbers are computed
+APPROX_SAMPLE_ROWS = 5000
+HELP_MESSAGE = "I can help you analyze this data. Try asking about averages, sums, counts, or trends of specific columns."
+
+
 def run_dataframe_analysis(
     df: pd.DataFrame, 
-    question: str
+    question: str,
+    profile: Optional[Any] = None
 ) -> Tuple[str, Optional[str]]:
     """
     Securely runs an analysis on a DataFrame based on a natural language question,
@@ -25,6 +23,8 @@ def run_dataframe_analysis(
     Args:
         df (pd.DataFrame): DataFrame with the data to be analyzed.
         question (str): User's question in English.
+        profile (DatasetProfile, optional): Precomputed profile of ``df``;
+            when given, aggregates are read from it instead of rescanning columns.
 
     Returns:
         Tuple[str, Optional[str]]: 
@@ -34,47 +34,119 @@ def run_dataframe_analysis(
     # For portfolio purposes, we'll use a simplified approach
     # In a real implementation, you would use an actual LLM here
     
-    # Simple keyword-based analysis for demonstration
+    def column_stats(col: Any) -> Optional[Any]:
+        # Profiled aggregates are merged incrementally as data is appended
+        if profile is not None and profile.rows == len(df) and col in profile.numeric:
+            return profile.numeric[col]
+        return None
+    
+    def mean_of(col: Any) -> Any:
+        stats = column_stats(col)
+        return stats.mean if stats is not None else df[col].mean()
+    
+    def sum_of(col: Any) -> Any:
+        stats = column_stats(col)
+        return stats.total if stats is not None else df[col].sum()
+    
+    result = _keyword_answer(df, question, mean_of, sum_of)
+    if result is None:
+        return "The dataset has no numeric columns to aggregate.", None
+    return result
+
+
+def estimate_dataframe_analysis(
+    df: pd.DataFrame,
+    question: str,
+    sample_rows: int = APPROX_SAMPLE_ROWS
+) -> Optional[str]:
+    """
+    Quickly estimates the answer to an aggregate question from a row sample,
+    so a first answer can be shown while the exact one is computed.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the data to be analyzed.
+        question (str): User's question in English.
+        sample_rows (int): Number of rows to sample.
+
+    Returns:
+        Optional[str]: Approximate textual answer, or None when the dataset is
+            small enough to answer exactly right away or the question does not
+            involve averages or sums.
+    """
     question_lower = question.lower()
+    if len(df) <= sample_rows or not any(
+        word in question_lower for word in ("average", "mean", "sum")
+    ):
+        return None
+    
+    sample = df.sample(n=sample_rows, random_state=0)
+    scale = len(df) / sample_rows
+    result = _keyword_answer(
+        df,
+        question,
+        mean_of=lambda col: sample[col].mean(),
+        sum_of=lambda col: sample[col].sum() * scale,
+    )
+    if result is None:
+        # No numeric columns to aggregate
+        return None
+    answer, _ = result
+    return f"{answer.rstrip()}\n\n_Estimated from a sample of {sample_rows:,} of {len(df):,} rows._"
+
+
+def _keyword_answer(
+    df: pd.DataFrame,
+    question: str,
+    mean_of: Callable[[str], float],
+    sum_of: Callable[[str], float]
+) -> Optional[Tuple[str, Optional[str]]]:
+    # Simple keyword-based analysis for demonstration; None when an average or
+    # sum is asked for and there are no numeric columns
+    question_lower = question.lower()
+    # Keywords are whole words, so "consumption" does not ask for a sum
+    words = set(re.findall(r"\w+", question_lower))
+    
+    def asks(*keywords: str) -> bool:
+        return any(word in words or f"{word}s" in words for word in keywords)
     
     # Get available numeric columns
     numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
     
-    if "average" in question_lower or "mean" in question_lower:
+    if asks("average", "mean"):
         # Try to find a column mentioned in the question
         for col in numeric_columns:
             if col.lower() in question_lower:
-                avg_value = df[col].mean()
+                avg_value = mean_of(col)
                 return f"The average {col} is {avg_value:.2f}", None
         
         # If no specific column found, show averages for all numeric columns
         if numeric_columns:
             result = "Averages for numeric columns:\n"
             for col in numeric_columns:
-                avg_value = df[col].mean()
+                avg_value = mean_of(col)
                 result += f"- {col}: {avg_value:.2f}\n"
             return result, None
     
-    elif "sum" in question_lower:
+    elif asks("sum"):
         # Try to find a column mentioned in the question
         for col in numeric_columns:
             if col.lower() in question_lower:
-                total_value = df[col].sum()
+                total_value = sum_of(col)
                 return f"The total {col} is {total_value:.2f}", None
         
         # If no specific column found, show sums for all numeric columns
         if numeric_columns:
             result = "Sums for numeric columns:\n"
             for col in numeric_columns:
-                total_value = df[col].sum()
+                total_value = sum_of(col)
                 result += f"- {col}: {total_value:.2f}\n"
             return result, None
     
-    elif "count" in question_lower:
+    elif asks("count"):
         count = len(df)
         return f"There are {count} records in the dataset", None
     
-    elif "trend" in question_lower or "summary" in question_lower:
+    elif asks("trend", "summary"):
         # Provide a general summary
         result = f"Dataset Summary:\n"
         result += f"- Total records: {len(df)}\n"
@@ -84,4 +156,5 @@ def run_dataframe_analysis(
         return result, None
     
     else:
-        return "I can help you analyze this data. Try asking about averages, sums, counts, or trends of specific columns.", None 
\ No newline at end of file
+        return HELP_MESSAGE, None
+    return None 
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Answer cache for the Data Analyst Agent.
+
+Stores analysis results (text answer, chart and, optionally, the structured
+result of core.results as plain data) per dataset and question, so
+precomputed or repeated questions are answered without touching the data.
+``AnswerCache`` lives in process memory; ``SqliteAnswerCache`` persists answers
+in a SQLite file shared by every process on the host, so a question answered
+once (e.g. on the demo dataset) is not recomputed after restarts or by other
+server workers.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Union
+
+# (text answer, chart) or (text answer, chart, AnalysisResult.to_dict())
+AnswerResult = Tuple[Any, ...]
+
+DEFAULT_MAX_ENTRIES = 1024
+# Bump when analysis results change so persisted answers are ignored.
+ENGINE_VERSION = "3"
+DEFAULT_ANSWER_DB = os.path.abspath(os.path.join(".cache", "answers.sqlite"))
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_DB_MB = 64
+# Seconds a writer waits for another process to release the database
+SQLITE_TIMEOUT_SECONDS = 30
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question used in cache keys."""
+    return " ".join(question.lower().split())
+
+
+class AnswerCache:
+    """Thread-safe LRU cache of analysis results keyed by (dataset, question)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], AnswerResult]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset_key: str, question: str) -> Optional[AnswerResult]:
+        """
+        Look up a cached result.
+
+        Args:
+            dataset_key: Content hash of the dataset.
+            question: User's question.
+
+        Returns:
+            Optional[AnswerResult]: The stored result or None on a miss.
+        """
+        key = (dataset_key, normalize_question(question))
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def contains(self, dataset_key: str, question: str) -> bool:
+        """Whether a result is cached, without touching hit/miss counters."""
+        with self._lock:
+            return (dataset_key, normalize_question(question)) in self._entries
+
+    def put(self, dataset_key: str, question: str, result: AnswerResult) -> None:
+        """Store the result of answering ``question`` on ``dataset_key``."""
+        key = (dataset_key, normalize_question(question))
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteAnswerCache:
+    """
+    Persistent answer cache shared by processes through a SQLite file.
+
+    Entries are keyed by (dataset content hash, normalized question, engine
+    version), expire after ``ttl_seconds`` and are evicted least recently used
+    first once the stored answers exceed ``max_size_mb``. The database runs in
+    WAL mode, so readers in other processes are not blocked by writers.
+    Database errors degrade to cache misses; answering never fails because
+    of the cache.
+
+    Args:
+        path: Database file (created with its directory if missing).
+        ttl_seconds: Age after which an answer is recomputed.
+        max_size_mb: Size of the stored answers (text and charts) to keep.
+        engine_version: Version of the analysis code producing the answers.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_ANSWER_DB,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_size_mb: float = DEFAULT_MAX_DB_MB,
+        engine_version: str = ENGINE_VERSION,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.engine_version = engine_version
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " dataset_key TEXT NOT NULL,"
+                " question TEXT NOT NULL,"
+                " engine_version TEXT NOT NULL,"
+                " text_answer TEXT NOT NULL,"
+                " chart TEXT,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " result TEXT,"
+                " PRIMARY KEY (dataset_key, question, engine_version))"
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(answers)")}
+            if "result" not in columns:
+                # Databases created before structured results were stored
+                try:
+                    connection.execute("ALTER TABLE answers ADD COLUMN result TEXT")
+                except sqlite3.OperationalError:
+                    pass  # added by another process meanwhile
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=SQLITE_TIMEOUT_SECONDS, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _key(self, dataset_key: str, question: str) -> Tuple[str, str, str]:
+        return (dataset_key, normalize_question(question), self.engine_version)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, dataset_key: str, question: str) -> Optional[AnswerResult]:
+        """
+        Look up a cached result.
+
+        Args:
+            dataset_key: Content hash of the dataset.
+            question: User's question.
+
+        Returns:
+            Optional[AnswerResult]: (text answer, chart[, structured result])
+            or None on a miss.
+        """
+        now = time.time()
+        key = self._key(dataset_key, question)
+        try:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT text_answer, chart, result FROM answers"
+                " WHERE dataset_key = ? AND question = ? AND engine_version = ?"
+                " AND created_at >= ?",
+                (*key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE answers SET accessed_at = ?"
+                    " WHERE dataset_key = ? AND question = ? AND engine_version = ?",
+                    (now, *key),
+                )
+        except sqlite3.Error:
+            row = None
+        self._count(row is not None)
+        if row is None:
+            return None
+        if row[2] is None:
+            return (row[0], row[1])
+        return (row[0], row[1], json.loads(row[2]))
+
+    def contains(self, dataset_key: str, question: str) -> bool:
+        """Whether a result is cached, without touching hit/miss counters."""
+        try:
+            row = self._connect().execute(
+                "SELECT 1 FROM answers"
+                " WHERE dataset_key = ? AND question = ? AND engine_version = ?"
+                " AND created_at >= ?",
+                (*self._key(dataset_key, question), time.time() - self.ttl_seconds),
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def put(self, dataset_key: str, question: str, result: AnswerResult) -> None:
+        """Store the result of answering ``question`` on ``dataset_key``."""
+        text, chart = result[:2]
+        structured = json.dumps(result[2]) if len(result) > 2 and result[2] is not None else None
+        size = len(text.encode("utf-8")) + (len(chart) if chart else 0)
+        size += len(structured) if structured else 0
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            connection = self._connect()
+            # IMMEDIATE takes the write lock up front, so concurrent writers
+            # wait for each other instead of failing mid-transaction
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO answers (dataset_key, question, engine_version,"
+                    " text_answer, chart, size, created_at, accessed_at, result)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*self._key(dataset_key, question), text, chart, size, now, now, structured),
+                )
+                self._evict(connection, now)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute(
+            "DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        (total,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM answers"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for rowid, size in connection.execute(
+            "SELECT rowid, size FROM answers ORDER BY accessed_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            stale.append((rowid,))
+            total -= size
+        connection.executemany("DELETE FROM answers WHERE rowid = ?", stale)
+
+    def clear(self) -> None:
+        """Remove every stored answer."""
+        try:
+            self._connect().execute("DELETE FROM answers")
+        except sqlite3.Error:
+            pass
+
+    def size_bytes(self) -> int:
+        """Total size of the stored answers."""
+        (total,) = self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM answers"
+        ).fetchone()
+        return total
+
+    def __len__(self) -> int:
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM answers").fetchone()
+        return count
+
+
+AnyAnswerCache = Union[AnswerCache, SqliteAnswerCache]
+
+_default_cache: Optional[AnyAnswerCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnyAnswerCache:
+    """
+    Return the process-wide answer cache.
+
+    Answers persist in SQLite at ``$ANSWER_CACHE_DB`` (``.cache/answers.sqlite``
+    by default); set ``ANSWER_CACHE_DB`` to an empty string to keep them in
+    process memory only.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.environ.get("ANSWER_CACHE_DB", DEFAULT_ANSWER_DB)
+            _default_cache = SqliteAnswerCache(path) if path else AnswerCache()
+        return _default_cache
@@ -0,0 +1,76 @@
+"""
+Execution backends for analysis intents.
+
+Questions are parsed into intents (core.intents) and answered by
+``core.conversation.answer_intent`` from aggregates, so any engine that can
+compute those aggregates can answer them. Three engines are available:
+
+- ``pandas``: the dataset is a ``pd.DataFrame`` held in memory. Masks and
+  aggregates are cached and derived from the dataset profile.
+- ``polars``: a ``core.polars_engine.PolarsDataset`` builds lazy query plans
+  with projection/predicate pushdown and multi-threaded execution.
+- ``duckdb``: a ``core.duckdb_engine.DuckDBDataset`` runs SQL over the file in
+  place, out-of-core, for datasets larger than memory.
+
+Engine datasets other than pandas provide:
+
+- ``columns``: column names.
+- ``numeric_columns``: names of the numeric (non-boolean) columns.
+- ``len(dataset)``: number of rows.
+- ``categorical_values()``: distinct values of the low-cardinality
+  non-numeric columns.
+- ``aggregates(filters, group_by, column, top=None, rank_by="mean")``: a
+  mapping of group value (None when not grouped) to ``ColumnStats``.
+
+Engines that bound their own memory and spill to disk set ``spills = True``;
+the memory governor (core.governor) then reserves nothing for them.
+"""
+
+from typing import Any, Optional, Union
+
+import pandas as pd
+
+ENGINES = ("pandas", "polars", "duckdb")
+
+
+def open_dataset(
+    source: Union[str, pd.DataFrame],
+    engine: str = "pandas",
+    max_rows: Optional[int] = None,
+    max_size_mb: float = float("inf"),
+) -> Any:
+    """
+    Open a dataset with the given engine.
+
+    Args:
+        source: Dataset file, or a DataFrame already loaded.
+        engine: One of ``ENGINES``.
+        max_rows: Largest accepted dataset when loading into pandas.
+        max_size_mb: Largest accepted file size when loading into pandas.
+
+    Returns:
+        A DataFrame for the pandas engine, else the engine's dataset.
+
+    Raises:
+        ValueError: If the engine is unknown or cannot read ``source``.
+        ImportError: If the engine's optional package is not installed.
+    """
+    if engine == "pandas":
+        if isinstance(source, pd.DataFrame):
+            return source
+        from core.upload import validate_file_upload
+
+        return validate_file_upload(source, max_rows=max_rows, max_size_mb=max_size_mb)
+    if engine == "polars":
+        from core.polars_engine import PolarsDataset
+
+        return PolarsDataset(source)
+    if engine == "duckdb":
+        if isinstance(source, pd.DataFrame):
+            raise ValueError("The DuckDB engine reads files, not DataFrames.")
+        from core.duckdb_engine import DuckDBDataset
+        from core.governor import get_memory_governor
+
+        # Queries beyond the analysis memory budget spill to disk
+        return DuckDBDataset(source, memory_limit_mb=get_memory_governor().budget_mb)
+    raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}.")
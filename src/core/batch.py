@@ -0,0 +1,323 @@
+"""
+Batch answering of question files against many datasets.
+
+Each dataset is parsed and profiled once, and the aggregates behind all
+questions are computed together (see core.multiquery); the questions then run
+in parallel through the compiled graph, which picks up those answers. Results
+are yielded as soon as each question finishes, so writers can stream them to
+JSONL or Parquet.
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.answer_cache import AnswerResult
+from core.backends import ENGINES, open_dataset
+from core.multiquery import answer_questions
+from core.profile import DatasetProfile, ProfileRegistry
+from core.profiling import profiled_invoke
+from utils.uploads import EXTENSION_FORMATS
+
+# Record fields, in output order
+RESULT_FIELDS = (
+    "dataset",
+    "question_index",
+    "question",
+    "status",
+    "text_answer",
+    "message",
+    "chart_base64",
+    "rows",
+    "load_ms",
+    "answer_ms",
+)
+# Records buffered per Parquet row group
+PARQUET_BATCH_ROWS = 1024
+_Loaded = Tuple[Any, Optional[DatasetProfile], float, str]
+
+
+def find_datasets(paths: Sequence[str]) -> List[str]:
+    """
+    Expand files and directories into the list of dataset files to process.
+
+    Args:
+        paths: Dataset files or directories (searched recursively).
+
+    Returns:
+        List[str]: Dataset files with a supported extension, sorted per directory.
+    """
+    datasets = []
+    for path in paths:
+        if not os.path.isdir(path):
+            datasets.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in EXTENSION_FORMATS:
+                    datasets.append(os.path.join(root, name))
+    return datasets
+
+
+def load_questions(path: str) -> List[str]:
+    """
+    Read a question file.
+
+    ``.json`` files hold a list of strings; ``.jsonl`` files hold one string or
+    ``{"question": ...}`` object per line; any other file holds one question per
+    line, with blank lines and ``#`` comments ignored.
+    """
+    with open(path, encoding="utf-8") as file:
+        if path.endswith(".json"):
+            questions = json.load(file)
+        elif path.endswith((".jsonl", ".ndjson")):
+            questions = []
+            for line in file:
+                if line.strip():
+                    item = json.loads(line)
+                    questions.append(
+                        item["question"] if isinstance(item, dict) else item
+                    )
+        else:
+            questions = [
+                line.strip()
+                for line in file
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+    if not all(isinstance(question, str) for question in questions):
+        raise ValueError(f"{path}: questions must be strings.")
+    return questions
+
+
+def _load(
+    path: str,
+    registry: ProfileRegistry,
+    max_rows: Optional[int],
+    max_size_mb: float,
+    engine: str,
+) -> _Loaded:
+    started = time.perf_counter()
+    try:
+        df = open_dataset(path, engine, max_rows=max_rows, max_size_mb=max_size_mb)
+        # Other engines compute aggregates themselves
+        profile = registry.profile_for(df) if engine == "pandas" else None
+    except Exception as e:
+        return None, None, (time.perf_counter() - started) * 1000, str(e)
+    return df, profile, (time.perf_counter() - started) * 1000, ""
+
+
+def _answer_all(
+    df: Any, profile: Optional[DatasetProfile], questions: Sequence[str]
+) -> Dict[str, AnswerResult]:
+    try:
+        return dict(zip(questions, answer_questions(df, questions, profile)))
+    except Exception:
+        # Each question then runs, and reports its error, on its own
+        return {}
+
+
+def _answer(
+    graph: Any,
+    path: str,
+    df: Any,
+    profile: Optional[DatasetProfile],
+    index: int,
+    question: str,
+    answers: Optional[Dict[str, AnswerResult]] = None,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    config = {"configurable": {"answers": answers}} if answers else None
+    try:
+        result = profiled_invoke(
+            graph,
+            {
+                "df": df,
+                "question": question,
+                "next_node": "",
+                "text_answer": "",
+                "chart_base64": None,
+                "status": "",
+                "message": "",
+                "profile": profile,
+                "dataset_key": "",
+            },
+            config,
+        )
+    except Exception as e:
+        result = {"status": "error", "message": f"Error running analysis: {e}"}
+    return {
+        "dataset": path,
+        "question_index": index,
+        "question": question,
+        "status": result.get("status", ""),
+        "text_answer": result.get("text_answer", ""),
+        "message": result.get("message", ""),
+        "chart_base64": result.get("chart_base64"),
+        "rows": len(df),
+        "answer_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def run_batch(
+    datasets: Sequence[str],
+    questions: Sequence[str],
+    max_workers: int = 4,
+    max_rows: Optional[int] = None,
+    max_size_mb: float = float("inf"),
+    graph: Any = None,
+    engine: str = "pandas",
+    vectorized: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Answer every question against every dataset.
+
+    Datasets are processed in order; the next one is parsed while questions
+    on the current one run. Within a dataset, results are yielded in
+    completion order.
+
+    Args:
+        datasets: Dataset file paths.
+        questions: Questions to ask about each dataset.
+        max_workers: Threads used for parsing and answering.
+        max_rows: Largest accepted dataset (None for no limit).
+        max_size_mb: Largest accepted file size in MB.
+        graph: Compiled graph (the shared one from get_graph if None).
+        engine: Execution engine from ``core.backends.ENGINES``; size and
+            row limits only apply to pandas, which loads datasets in memory.
+        vectorized: Compute the aggregates of all questions on a dataset
+            together before running them; False runs each question alone.
+            ``answer_ms`` covers only each question's own run.
+
+    Yields:
+        Dict[str, Any]: One record per (dataset, question) with the fields in
+        ``RESULT_FIELDS``. Datasets that fail to load yield one 'error'
+        record per question.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}.")
+    if not datasets:
+        return
+    if graph is None:
+        from graph.grafo import get_graph
+
+        graph = get_graph()
+    registry = ProfileRegistry()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit_load(path: str) -> "Future[_Loaded]":
+            return executor.submit(
+                _load, path, registry, max_rows, max_size_mb, engine
+            )
+
+        next_load = submit_load(datasets[0])
+        for position, path in enumerate(datasets):
+            df, profile, load_ms, error = next_load.result()
+            if position + 1 < len(datasets):
+                next_load = submit_load(datasets[position + 1])
+
+            if df is None:
+                for index, question in enumerate(questions):
+                    yield {
+                        "dataset": path,
+                        "question_index": index,
+                        "question": question,
+                        "status": "error",
+                        "text_answer": "",
+                        "message": error,
+                        "chart_base64": None,
+                        "rows": 0,
+                        "load_ms": load_ms,
+                        "answer_ms": 0.0,
+                    }
+                continue
+
+            answers = _answer_all(df, profile, questions) if vectorized else None
+            futures = [
+                executor.submit(_answer, graph, path, df, profile, index, question, answers)
+                for index, question in enumerate(questions)
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                record["load_ms"] = load_ms
+                yield {field: record[field] for field in RESULT_FIELDS}
+
+
+class JsonlWriter:
+    """Writes result records as JSON Lines, flushing after every record."""
+
+    def __init__(self, stream: IO[str], include_charts: bool = False) -> None:
+        self._stream = stream
+        self._include_charts = include_charts
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not self._include_charts:
+            record = {**record, "chart_base64": None}
+        self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream not in (sys.stdout, sys.stderr):
+            self._stream.close()
+
+
+class ParquetWriter:
+    """Writes result records to a Parquet file, one row group per batch."""
+
+    def __init__(self, path: str, include_charts: bool = False) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("dataset", pa.string()),
+                ("question_index", pa.int64()),
+                ("question", pa.string()),
+                ("status", pa.string()),
+                ("text_answer", pa.string()),
+                ("message", pa.string()),
+                ("chart_base64", pa.string()),
+                ("rows", pa.int64()),
+                ("load_ms", pa.float64()),
+                ("answer_ms", pa.float64()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._include_charts = include_charts
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not self._include_charts:
+            record = {**record, "chart_base64": None}
+        self._buffer.append(record)
+        if len(self._buffer) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            table = self._pa.Table.from_pylist(self._buffer, schema=self._schema)
+            self._writer.write_table(table)
+            self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(output: str, include_charts: bool = False) -> Any:
+    """
+    Open a result writer for ``output``.
+
+    ``-`` writes JSON Lines to stdout, ``*.parquet`` writes Parquet and any
+    other path writes JSON Lines.
+    """
+    if output == "-":
+        return JsonlWriter(sys.stdout, include_charts)
+    if output.endswith(".parquet"):
+        return ParquetWriter(output, include_charts)
+    return JsonlWriter(open(output, "w", encoding="utf-8"), include_charts)
@@ -0,0 +1,176 @@
+"""
+Cooperative cancellation and deadlines for analyses.
+
+A ``CancelToken`` is created per run and passed to the graph in
+``config["configurable"]["cancel_token"]``. Each node runs under a child
+token adding its own deadline, installed as the current token, and
+long-running loops (chunked aggregation, group scans, queueing for memory)
+call ``check_cancelled()`` between steps. A cancelled or expired run raises
+``AnalysisInterrupted``, which the graph turns into a "cancelled" or
+"timeout" status; the ``with`` blocks it unwinds through release the
+run's memory reservation.
+"""
+
+import contextlib
+import contextvars
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+# How often ``background_stream`` hands control back while waiting
+POLL_SECONDS = 0.2
+
+
+class AnalysisInterrupted(Exception):
+    """
+    Raised inside a run that was cancelled or ran past its deadline.
+
+    Attributes:
+        status: "cancelled" or "timeout".
+    """
+
+    status = "cancelled"
+
+
+class AnalysisCancelled(AnalysisInterrupted):
+    status = "cancelled"
+
+
+class AnalysisTimeout(AnalysisInterrupted):
+    status = "timeout"
+
+
+class CancelToken:
+    """
+    Cancellation flag plus an optional deadline, shared by a run's nodes.
+
+    Args:
+        timeout_seconds: Time the run may take from now (None: no deadline).
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None) -> None:
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+
+    @classmethod
+    def _sharing(cls, event: threading.Event, deadline: Optional[float]) -> "CancelToken":
+        token = cls()
+        token._event = event
+        token.deadline = deadline
+        return token
+
+    def child(self, timeout_seconds: Optional[float] = None) -> "CancelToken":
+        """A token cancelled with this one, expiring at the earlier deadline."""
+        deadline = self.deadline
+        if timeout_seconds:
+            own = time.monotonic() + timeout_seconds
+            deadline = own if deadline is None else min(deadline, own)
+        return CancelToken._sharing(self._event, deadline)
+
+    def cancel(self) -> None:
+        """Ask the run to stop at its next check."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None when there is none)."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """
+        Raise if the run should stop.
+
+        Raises:
+            AnalysisCancelled: If the token was cancelled.
+            AnalysisTimeout: If the deadline has passed.
+        """
+        if self._event.is_set():
+            raise AnalysisCancelled("The analysis was cancelled.")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise AnalysisTimeout("The analysis took too long and was stopped.")
+
+
+_current: "contextvars.ContextVar[Optional[CancelToken]]" = contextvars.ContextVar(
+    "cancel_token", default=None
+)
+
+
+def current_token() -> Optional[CancelToken]:
+    """The token of the run executing in this context, if any."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def use_token(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    """Install ``token`` as the current token for the duration of the block."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def check_cancelled() -> None:
+    """Raise ``AnalysisInterrupted`` if the current run should stop."""
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def background_stream(
+    make_iterator: Callable[[], Iterator[Any]],
+    token: CancelToken,
+    poll_seconds: float = POLL_SECONDS,
+) -> Iterator[Any]:
+    """
+    Run an iterator (e.g. ``graph.stream``) on a worker thread.
+
+    Items are yielded as they arrive, and None every ``poll_seconds`` while
+    waiting, so the caller keeps control (UI code can notice that the user
+    left). Closing the generator early, or an exception in the caller,
+    cancels ``token`` so the worker stops at its next check.
+
+    Raises:
+        Exception: Whatever the iterator raised on the worker.
+    """
+    items: "queue.Queue[Any]" = queue.Queue()
+    done = object()
+    context = contextvars.copy_context()
+
+    def work() -> None:
+        try:
+            for item in make_iterator():
+                items.put((item, None))
+        except BaseException as e:  # noqa: B902 - re-raised in the caller
+            items.put((done, e))
+            return
+        items.put((done, None))
+
+    worker = threading.Thread(
+        target=context.run, args=(work,), name="analysis-stream", daemon=True
+    )
+    worker.start()
+    finished = False
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=poll_seconds)
+            except queue.Empty:
+                yield None
+                continue
+            if item is done:
+                finished = True
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        if not finished:
+            token.cancel()
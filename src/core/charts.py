@@ -0,0 +1,95 @@
+"""
+Chart rendering for the Data Analyst Agent.
+
+Charts are drawn with matplotlib's object-oriented API (no pyplot global
+state), so they can be rendered from worker threads, and returned as base64
+PNG strings like the rest of the analysis results.
+"""
+
+import base64
+import io
+import re
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+# Words that ask for a visualization
+CHART_KEYWORDS = ("graph", "chart", "plot", "visual", "histogram")
+# Group columns with more distinct values than this are not drawn as bars
+MAX_BARS = 30
+
+
+def wants_chart(question: str) -> bool:
+    """Whether the question asks for a visualization."""
+    question_lower = question.lower()
+    return any(word in question_lower for word in CHART_KEYWORDS)
+
+
+def _mentioned(columns: Iterable[Any], question_lower: str) -> Optional[Any]:
+    for col in columns:
+        if str(col).lower() in question_lower:
+            return col
+    return None
+
+
+def render_chart(
+    df: pd.DataFrame, question: str, profile: Optional[Any] = None
+) -> Optional[str]:
+    """
+    Draw the chart that best matches a question.
+
+    A numeric column mentioned in the question (else the first one) is shown
+    as a bar chart of its average (or total, for "sum" questions) per value of
+    a mentioned categorical column, or as a histogram when no categorical
+    column is mentioned.
+
+    Args:
+        df: Dataset to plot.
+        question: User's question.
+        profile: Precomputed DatasetProfile of ``df``; its group aggregates
+            are used instead of grouping the data when available.
+
+    Returns:
+        Optional[str]: PNG image in base64, or None if there is nothing to plot.
+    """
+    from matplotlib.figure import Figure
+
+    question_lower = question.lower()
+    numeric_columns = df.select_dtypes(include=["number"]).columns.tolist()
+    if not numeric_columns:
+        return None
+    value_col = _mentioned(numeric_columns, question_lower) or numeric_columns[0]
+    other_columns = [col for col in df.columns if col not in numeric_columns]
+    group_col = _mentioned(other_columns, question_lower)
+    use_sum = bool(re.search(r"\b(?:sums?|totals?)\b", question_lower))
+
+    figure = Figure(figsize=(8, 4.5), tight_layout=True)
+    axes = figure.add_subplot()
+    if group_col is not None:
+        group_stats = None
+        if profile is not None and profile.rows == len(df):
+            group_stats = profile.group_stats(group_col, value_col)
+        if group_stats is not None:
+            values = pd.Series(
+                {
+                    key: stats.total if use_sum else stats.mean
+                    for key, stats in group_stats.items()
+                }
+            )
+        else:
+            grouped = df.groupby(group_col, observed=True)[value_col]
+            values = grouped.sum() if use_sum else grouped.mean()
+        values = values.sort_values(ascending=False).head(MAX_BARS)
+        axes.bar([str(key) for key in values.index], values.to_numpy())
+        axes.set_xlabel(str(group_col))
+        axes.set_ylabel(f"{'Total' if use_sum else 'Average'} {value_col}")
+        axes.tick_params(axis="x", labelrotation=45)
+    else:
+        axes.hist(df[value_col].dropna().to_numpy(), bins=30)
+        axes.set_xlabel(str(value_col))
+        axes.set_ylabel("Count")
+    axes.set_title(question.strip()[:80])
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=100)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
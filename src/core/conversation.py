@@ -0,0 +1,436 @@
+"""
+Conversation-aware answering for the Data Analyst Agent.
+
+Questions in a conversation are answered from their intent (see
+core.intents). Filter masks and per-slice aggregates are kept in a
+process-wide cache, so a follow-up that refines the previous question reuses
+them: adding a filter only scans the filtered column and ANDs it with the
+previous mask, and narrowing a grouped result to one group reads the cached
+group aggregates instead of touching the rows.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.analysis import HELP_MESSAGE, run_dataframe_analysis
+from core.cancellation import check_cancelled
+from core.charts import wants_chart
+from core.intents import Filter, Intent, numeric_columns, parse_intent
+from core.profile import ColumnStats
+from core.results import AnalysisResult, ResultTable
+from core.timeseries import time_series_result
+
+# Turns kept in a conversation's checkpointed history
+MAX_HISTORY = 20
+# Masks and aggregates kept across all conversations
+INTERMEDIATE_ENTRIES = 256
+
+Aggregates = Dict[Any, ColumnStats]
+
+
+class IntermediateCache:
+    """Thread-safe LRU of filter masks and aggregates per dataset slice."""
+
+    def __init__(self, max_entries: int = INTERMEDIATE_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def mask(
+        self, dataset_key: str, df: pd.DataFrame, filters: Tuple[Filter, ...]
+    ) -> Optional[np.ndarray]:
+        """
+        Boolean row mask for ``filters`` (None when there are no filters).
+
+        Built incrementally: the mask of all but the last filter is looked up
+        (or built) first, so refining a filtered question reuses its mask.
+        """
+        if not filters:
+            return None
+        key = ("mask", dataset_key, filters)
+        cached = self._get(key) if dataset_key else None
+        if cached is not None:
+            return cached
+        check_cancelled()
+        col, values = filters[-1]
+        mask = df[col].isin(values).to_numpy()
+        previous = self.mask(dataset_key, df, filters[:-1])
+        if previous is not None:
+            mask &= previous
+        if dataset_key:
+            self._put(key, mask)
+        return mask
+
+    def aggregates(
+        self,
+        dataset_key: str,
+        df: pd.DataFrame,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[str],
+        column: Optional[str],
+        profile: Optional[Any] = None,
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Aggregates:
+        """
+        Aggregates of ``column`` over the rows matching ``filters``.
+
+        Args:
+            dataset_key: Content hash of ``df`` ("" disables caching).
+            df: Dataset: a DataFrame, or a dataset of another engine (see
+                core.backends), which then computes the result.
+            filters: Equality filters selecting rows.
+            group_by: Column splitting the result, or None for one group.
+            column: Numeric column, or None to count rows.
+            profile: DatasetProfile of ``df``, used when it already holds the
+                requested aggregates.
+            top: Number of groups the caller keeps; engines that support it
+                rank and limit the groups themselves.
+            rank_by: Aggregate ranking the groups for ``top``.
+
+        Returns:
+            Aggregates: Group value (None when not grouped) -> ColumnStats.
+            Row counts are returned as ColumnStats with only ``count`` set.
+        """
+        if not isinstance(df, pd.DataFrame):
+            # Other engines compute everything in one pushed-down query
+            engine_key = ("aggregates", dataset_key, filters, group_by, column, top, rank_by)
+            cached = self._get(engine_key) if dataset_key else None
+            if cached is None:
+                cached = df.aggregates(filters, group_by, column, top, rank_by)
+                if dataset_key:
+                    self._put(engine_key, cached)
+            return cached
+
+        key = ("aggregates", dataset_key, filters, group_by, column)
+        cached = self._get(key) if dataset_key else None
+        if cached is not None:
+            return cached
+        result = self._derive(dataset_key, filters, group_by, column, profile, df)
+        if result is None:
+            result = self._compute(dataset_key, df, filters, group_by, column)
+        if dataset_key:
+            self._put(key, result)
+        return result
+
+    def _derive(
+        self,
+        dataset_key: str,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[str],
+        column: Optional[str],
+        profile: Optional[Any],
+        df: pd.DataFrame,
+    ) -> Optional[Aggregates]:
+        """Answer from cached or profiled group aggregates without a row scan."""
+        if profile is not None and profile.rows != len(df):
+            profile = None
+        if not filters and group_by is None:
+            if column is None:
+                return {None: ColumnStats(count=len(df))}
+            if profile is not None and column in profile.numeric:
+                return {None: profile.numeric[column]}
+            return None
+        if group_by is not None:
+            if filters or column is None or profile is None:
+                return None
+            return profile.group_stats(group_by, column)
+
+        # A filter on column c over rows already grouped by c: merge its groups
+        for position, (col, values) in enumerate(filters):
+            rest = filters[:position] + filters[position + 1:]
+            grouped = None
+            if dataset_key:
+                with self._lock:
+                    grouped = self._entries.get(
+                        ("aggregates", dataset_key, rest, col, column)
+                    )
+            if grouped is None and not rest and column is not None and profile is not None:
+                grouped = profile.group_stats(col, column)
+            if grouped is not None:
+                merged = ColumnStats()
+                for value in values:
+                    if value in grouped:
+                        merged = merged.merge(grouped[value])
+                return {None: merged}
+        return None
+
+    def _compute(
+        self,
+        dataset_key: str,
+        df: pd.DataFrame,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[str],
+        column: Optional[str],
+    ) -> Aggregates:
+        mask = self.mask(dataset_key, df, filters)
+        values = df[column] if column is not None else None
+        if mask is not None:
+            values = values[mask] if values is not None else None
+        if group_by is None:
+            if values is None:
+                rows = int(mask.sum()) if mask is not None else len(df)
+                return {None: ColumnStats(count=rows)}
+            return {None: ColumnStats.from_series(values)}
+
+        keys = df[group_by] if mask is None else df[group_by][mask]
+        if values is None:
+            counts = keys.value_counts(sort=False)
+            return {key: ColumnStats(count=int(n)) for key, n in counts.items()}
+        result = {}
+        for key, part in values.groupby(keys, observed=True, sort=False):
+            check_cancelled()
+            result[key] = ColumnStats.from_series(part)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def intent_result(
+    df: pd.DataFrame,
+    intent: Intent,
+    dataset_key: str = "",
+    profile: Optional[Any] = None,
+    cache: Optional[IntermediateCache] = None,
+) -> AnalysisResult:
+    """
+    Answer a (possibly follow-up) intent as a structured result.
+
+    Args:
+        df: Dataset.
+        intent: Parsed intent; a missing operation means "average".
+        dataset_key: Content hash of ``df``, enabling reuse of intermediates.
+        profile: DatasetProfile of ``df``, if available.
+        cache: Intermediate cache (the process-wide one if None).
+
+    Returns:
+        AnalysisResult: The answer's values; its text is in English.
+    """
+    cache = cache if cache is not None else get_intermediate_cache()
+    if intent.time_column is not None:
+        if not isinstance(df, pd.DataFrame):
+            return AnalysisResult.from_text("Time-series questions are answered with the pandas engine.")
+        mask = cache.mask(dataset_key, df, intent.filters)
+        return time_series_result(df, intent, mask, dataset_key)
+    described = intent.describe_filters()
+    suffix = f" ({described})" if described else ""
+
+    top = intent.top if intent.group_by is not None else None
+    if top:
+        suffix += f", top {top}"
+
+    def stats(column: Optional[str], rank_by: str = "mean") -> Aggregates:
+        check_cancelled()
+        return cache.aggregates(
+            dataset_key,
+            df,
+            intent.filters,
+            intent.group_by,
+            column,
+            profile,
+            top=top,
+            rank_by=rank_by,
+        )
+
+    if intent.operation == "count":
+        counts = stats(None, "count")
+        if intent.group_by is None:
+            where = f" where {described}" if described else " in the dataset"
+            rows = counts[None].count
+            table = ResultTable("Records", ("filter", "records"), [(described or "all", rows)], "count")
+            return AnalysisResult(f"There are {rows} records{where}", [table])
+        table = ResultTable(f"Records by {intent.group_by}{suffix}", (intent.group_by, "records"), unit="count")
+        ranked = sorted(counts.items(), key=lambda item: -item[1].count)
+        for key, value in ranked[:top]:
+            table.add(key, value.count)
+        return AnalysisResult(tables=[table])
+
+    if intent.operation == "summary" and not intent.is_sliced:
+        numeric = numeric_columns(df)
+        table = ResultTable("Dataset Summary", ("field", "value"), unit="count")
+        table.add("Total records", len(df))
+        table.add("Columns", ", ".join(map(str, df.columns)))
+        if numeric:
+            table.add("Numeric columns", ", ".join(map(str, numeric)))
+        return AnalysisResult(tables=[table])
+
+    columns = [intent.column] if intent.column else numeric_columns(df)
+    if not columns:
+        return AnalysisResult.from_text("There are no numeric columns to analyze.")
+
+    tables = []
+    if intent.operation == "summary":
+        rows = stats(None)
+        if intent.group_by is not None:
+            total_rows = sum(value.count for value in rows.values())
+        else:
+            total_rows = rows[None].count
+        summary = ResultTable(f"Summary{suffix}", ("field", "value"))
+        summary.add("Records", f"{total_rows} of {len(df)}")
+        tables.append(summary)
+        if intent.group_by is None:
+            for col in columns:
+                summary.add(f"Average {col}", stats(col)[None].mean)
+            return AnalysisResult(tables=tables)
+        operation, label, plural = "mean", "Average", "Averages"
+    elif intent.operation == "sum":
+        operation, label, plural = "sum", "Total", "Sums"
+    else:
+        operation, label, plural = "mean", "Average", "Averages"
+
+    def measure(column_stats: ColumnStats) -> float:
+        return column_stats.total if operation == "sum" else column_stats.mean
+
+    if intent.group_by is None:
+        if len(columns) == 1:
+            column_stats = stats(columns[0])[None]
+            if column_stats.count == 0:
+                return AnalysisResult.from_text(f"No records with {columns[0]} values match {described}.")
+            where = f" for {described}" if described else ""
+            table = ResultTable(label, ("column", label.lower()), [(columns[0], measure(column_stats))])
+            return AnalysisResult(
+                f"The {label.lower()} {columns[0]}{where} is {measure(column_stats):.2f}", [table]
+            )
+        table = ResultTable(f"{plural} for numeric columns{suffix}", ("column", label.lower()))
+        for col in columns:
+            table.add(col, measure(stats(col)[None]))
+        return AnalysisResult(tables=tables + [table])
+
+    for col in columns:
+        groups = stats(col, operation)
+        table = ResultTable(f"{label} {col} by {intent.group_by}{suffix}", (intent.group_by, f"{label.lower()} {col}"))
+        ranked = sorted(groups.items(), key=lambda item: -measure(item[1]))
+        for key, column_stats in ranked[:top]:
+            table.add(key, measure(column_stats))
+        tables.append(table)
+    return AnalysisResult(tables=tables)
+
+
+def answer_intent(
+    df: pd.DataFrame,
+    intent: Intent,
+    dataset_key: str = "",
+    profile: Optional[Any] = None,
+    cache: Optional[IntermediateCache] = None,
+) -> str:
+    """
+    Answer a (possibly follow-up) intent.
+
+    Args:
+        df: Dataset.
+        intent: Parsed intent; a missing operation means "average".
+        dataset_key: Content hash of ``df``, enabling reuse of intermediates.
+        profile: DatasetProfile of ``df``, if available.
+        cache: Intermediate cache (the process-wide one if None).
+
+    Returns:
+        str: Textual answer in English.
+    """
+    return intent_result(df, intent, dataset_key, profile, cache).text
+
+
+def question_result(
+    df: pd.DataFrame,
+    question: str,
+    profile: Optional[Any] = None,
+    dataset_key: str = "",
+    intent: Optional[Intent] = None,
+    cache: Optional[IntermediateCache] = None,
+) -> AnalysisResult:
+    """
+    Answer a question through its intent, as a structured result.
+
+    Questions whose intent has a canonical key are answered from the intent
+    alone, so questions sharing a key get the same answer; the rest get the
+    keyword analysis of the question text.
+
+    Args:
+        df: Dataset.
+        question: User's question.
+        profile: DatasetProfile of ``df``, if available.
+        dataset_key: Content hash of ``df``, enabling reuse of intermediates.
+        intent: Intent already parsed from the question (parsed if None).
+        cache: Intermediate cache (the process-wide one if None).
+
+    Returns:
+        AnalysisResult: The answer (without a chart).
+    """
+    if intent is None:
+        intent = parse_intent(question, df, profile)
+    if intent.canonical_key():
+        return intent_result(df, intent, dataset_key, profile, cache)
+    if not isinstance(df, pd.DataFrame):
+        return AnalysisResult.from_text(HELP_MESSAGE)
+    return AnalysisResult.from_text(*run_dataframe_analysis(df, question, profile=profile))
+
+
+def answer_question(
+    df: pd.DataFrame,
+    question: str,
+    profile: Optional[Any] = None,
+    dataset_key: str = "",
+    intent: Optional[Intent] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Answer a question through its intent (see ``question_result``).
+
+    Returns:
+        Tuple[str, Optional[str]]: Textual answer and chart (always None here).
+    """
+    result = question_result(df, question, profile, dataset_key, intent)
+    return result.text, result.chart
+
+
+def answer_key(question: str, canonical_key: str = "") -> str:
+    """
+    Answer cache key of a question.
+
+    Args:
+        question: User's question.
+        canonical_key: Key from ``core.intents.question_key``; the question
+            itself is used when empty.
+
+    Returns:
+        str: The key, marked when the question asks for a chart since charts
+        are cached along with the answer.
+    """
+    key = canonical_key or question
+    return f"{key} chart" if wants_chart(question) else key
+
+
+_default_cache: Optional[IntermediateCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_intermediate_cache() -> IntermediateCache:
+    """Return the process-wide IntermediateCache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IntermediateCache()
+        return _default_cache
@@ -0,0 +1,290 @@
+"""
+Out-of-core analysis engine backed by an embedded DuckDB database.
+
+A ``DuckDBDataset`` registers a CSV or Parquet file as a view and answers
+intents (aggregates, group-by, filters, top-N) with SQL that DuckDB runs
+multi-threaded and streaming over the file, so datasets larger than memory
+can be analyzed without ever being loaded into pandas. Operators that need
+more memory than ``memory_limit_mb`` spill to ``temp_dir``.
+"""
+
+import os
+import threading
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+duckdb: Optional[ModuleType]
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - duckdb is optional
+    duckdb = None
+
+from core.profile import GROUP_MAX_CARDINALITY, ColumnStats
+from core.schema import NA_VALUES
+
+DEFAULT_TEMP_DIR = os.path.abspath(os.path.join(".cache", "duckdb"))
+# Rows checked before scanning a whole file for text columns holding numbers
+NUMERIC_TEXT_SAMPLE_ROWS = 10_000
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+# Readers for the file formats DuckDB can scan in place. CSV types are
+# inferred like pd.read_csv does (no yes/no booleans or dates, pandas' missing
+# value strings); numbers padded with spaces are cast afterwards (see
+# ``_numeric_text_columns``), so numeric answers read the same as with pandas
+_CSV_READER = (
+    "read_csv_auto({path}, auto_type_candidates = ['BIGINT', 'DOUBLE', 'VARCHAR'],"
+    f" nullstr = [{', '.join(_literal(value) for value in NA_VALUES)}])"
+)
+READERS = {
+    ".csv": _CSV_READER,
+    ".tsv": _CSV_READER,
+    ".parquet": "read_parquet({path})",
+}
+NUMERIC_TYPES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT",
+    "FLOAT", "REAL", "DOUBLE",
+}
+# Aggregates used to rank groups of a top-N intent
+RANK_EXPRESSIONS = {
+    "mean": "AVG({column})",
+    "sum": "SUM({column})",
+    "count": "COUNT(*)",
+}
+
+Filter = Tuple[str, Tuple[Any, ...]]
+
+
+def _quote(identifier: Any) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _is_numeric(sql_type: str) -> bool:
+    return sql_type in NUMERIC_TYPES or sql_type.startswith("DECIMAL")
+
+
+class DuckDBDataset:
+    """
+    A CSV or Parquet file queried in place through DuckDB.
+
+    Implements the engine dataset interface described in ``core.backends``.
+    Safe to query from several threads.
+
+    Attributes:
+        spills: Always True: queries are bounded by ``memory_limit_mb`` and
+            spill to disk beyond it.
+
+    Args:
+        path: CSV or Parquet file.
+        threads: Worker threads for each query (DuckDB default: all cores).
+        memory_limit_mb: Memory DuckDB may use before spilling (default: 80%
+            of RAM).
+        temp_dir: Directory for spilled intermediates.
+
+    Raises:
+        ImportError: If duckdb is not installed.
+        ValueError: If the file format cannot be scanned in place.
+    """
+
+    spills = True
+
+    def __init__(
+        self,
+        path: str,
+        threads: Optional[int] = None,
+        memory_limit_mb: Optional[float] = None,
+        temp_dir: str = DEFAULT_TEMP_DIR,
+    ) -> None:
+        if duckdb is None:
+            raise ImportError("The DuckDB engine needs the duckdb package.")
+        extension = os.path.splitext(path)[1].lower()
+        reader = READERS.get(extension)
+        if reader is None:
+            supported = ", ".join(sorted(READERS))
+            raise ValueError(f"The DuckDB engine reads {supported} files, not {extension}.")
+        if not os.path.isfile(path):
+            raise ValueError(f"File not found: {path}")
+
+        self.path = path
+        self._connection = duckdb.connect(":memory:")
+        if threads:
+            self._connection.execute(f"SET threads = {int(threads)}")
+        if memory_limit_mb:
+            self._connection.execute(f"SET memory_limit = '{int(memory_limit_mb)}MB'")
+        os.makedirs(temp_dir, exist_ok=True)
+        self._connection.execute(f"SET temp_directory = {_literal(temp_dir)}")
+        self._connection.execute(
+            "CREATE VIEW raw_data AS SELECT * FROM "
+            + reader.format(path=_literal(os.path.abspath(path)))
+        )
+        casts = {}
+        if reader == _CSV_READER:
+            text = [
+                row[0] for row in self._connection.execute("DESCRIBE raw_data").fetchall()
+                if row[1] == "VARCHAR"
+            ]
+            casts = self._numeric_text_columns(text)
+        replace = ", ".join(
+            f"TRY_CAST(trim({_quote(col)}) AS {sql_type}) AS {_quote(col)}"
+            for col, sql_type in casts.items()
+        )
+        self._connection.execute(
+            "CREATE VIEW data AS SELECT * "
+            + (f"REPLACE ({replace}) " if replace else "")
+            + "FROM raw_data"
+        )
+        schema = self._connection.execute("DESCRIBE data").fetchall()
+        self.columns: List[str] = [row[0] for row in schema]
+        self.dtypes: Dict[str, str] = {row[0]: row[1] for row in schema}
+        self.numeric_columns: List[str] = [
+            col for col in self.columns if _is_numeric(self.dtypes[col])
+        ]
+        self._lock = threading.Lock()
+        self._rows: Optional[int] = None
+        self._categories: Optional[Dict[str, List[Any]]] = None
+
+    def _numeric_text_columns(self, columns: Sequence[str]) -> Dict[str, str]:
+        """
+        Text columns whose values all parse as numbers once trimmed, as pandas
+        reads them (e.g. a value with a trailing space), and their SQL type.
+
+        A sample of rows rules most columns out; the remaining candidates
+        are checked over the whole file in one scan.
+        """
+        if not columns:
+            return {}
+
+        def parses(source: str, candidates: Sequence[str]) -> Dict[str, str]:
+            checks = []
+            for col in candidates:
+                value = f"trim({_quote(col)})"
+                checks.append(
+                    f"COUNT({_quote(col)}) = COUNT(TRY_CAST({value} AS DOUBLE)),"
+                    f" COUNT({_quote(col)}) = COUNT(CASE WHEN"
+                    f" regexp_full_match({value}, '[+-]?[0-9]+') THEN 1 END)"
+                )
+            row = self._connection.execute(
+                f"SELECT {', '.join(checks)} FROM {source}"
+            ).fetchone() or ()
+            return {
+                col: "BIGINT" if row[2 * index + 1] else "DOUBLE"
+                for index, col in enumerate(candidates)
+                if row[2 * index]
+            }
+
+        sample = parses(
+            f"(SELECT * FROM raw_data LIMIT {NUMERIC_TEXT_SAMPLE_ROWS})", columns
+        )
+        return parses("raw_data", list(sample)) if sample else {}
+
+    def _query(self, sql: str, parameters: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        # Each thread runs on its own cursor of the shared database
+        cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql, list(parameters)).fetchall()
+        finally:
+            cursor.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._rows is None:
+                self._rows = self._query("SELECT COUNT(*) FROM data")[0][0]
+            return self._rows
+
+    def categorical_values(self) -> Dict[str, List[Any]]:
+        """Distinct values of the low-cardinality non-numeric columns (cached)."""
+        with self._lock:
+            if self._categories is not None:
+                return self._categories
+        categories = {}
+        for col in self.columns:
+            if col in self.numeric_columns:
+                continue
+            rows = self._query(
+                f"SELECT DISTINCT {_quote(col)} FROM data"
+                f" WHERE {_quote(col)} IS NOT NULL LIMIT {GROUP_MAX_CARDINALITY + 1}"
+            )
+            if len(rows) <= GROUP_MAX_CARDINALITY:
+                categories[col] = [row[0] for row in rows]
+        with self._lock:
+            self._categories = categories
+        return categories
+
+    def aggregates(
+        self,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[str],
+        column: Optional[str],
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Dict[Any, ColumnStats]:
+        """
+        Aggregates of ``column`` over the rows matching ``filters``, in one query.
+
+        Args:
+            filters: Equality filters, pushed down as a WHERE clause.
+            group_by: Column splitting the result, or None for one group.
+            column: Numeric column, or None to count rows.
+            top: Keep only this many groups, ranked by ``rank_by`` (largest
+                first); the ranking and limit run inside DuckDB.
+            rank_by: "mean", "sum" or "count".
+
+        Returns:
+            Dict[Any, ColumnStats]: Group value (None when not grouped) ->
+            ColumnStats. Row counts have only ``count`` set.
+        """
+        where: List[str] = []
+        parameters: List[Any] = []
+        for col, values in filters:
+            where.append(f"{_quote(col)} IN ({', '.join('?' for _ in values)})")
+            parameters.extend(values)
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        key_sql = _quote(group_by) if group_by is not None else "NULL"
+
+        if column is None:
+            select = "COUNT(*)"
+        else:
+            value = f"CAST({_quote(column)} AS DOUBLE)"
+            select = (
+                f"COUNT({value}), COUNT(*) - COUNT({value}), SUM({value}),"
+                f" SUM({value} * {value}), MIN({value}), MAX({value})"
+            )
+        sql = f"SELECT {key_sql}, {select} FROM data{where_sql}"
+        if group_by is not None:
+            sql += " GROUP BY 1"
+            if top:
+                rank = RANK_EXPRESSIONS["count" if column is None else rank_by]
+                rank = rank.format(column=_quote(column) if column else "")
+                sql += f" ORDER BY {rank} DESC NULLS LAST LIMIT {int(top)}"
+
+        result = {}
+        for row in self._query(sql, parameters):
+            key = row[0] if group_by is not None else None
+            if column is None:
+                result[key] = ColumnStats(count=int(row[1]))
+            elif not row[1]:
+                result[key] = ColumnStats(nulls=int(row[2]))
+            else:
+                result[key] = ColumnStats(
+                    count=int(row[1]),
+                    nulls=int(row[2]),
+                    total=float(row[3]),
+                    total_sq=float(row[4]),
+                    minimum=float(row[5]),
+                    maximum=float(row[6]),
+                )
+        if group_by is None and None not in result:
+            result[None] = ColumnStats()
+        return result
+
+    def fingerprint(self) -> str:
+        """Cache key of the file's current version (path, size and mtime)."""
+        stat = os.stat(self.path)
+        return f"duckdb:{os.path.abspath(self.path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def close(self) -> None:
+        self._connection.close()
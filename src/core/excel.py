@@ -0,0 +1,172 @@
+"""
+Excel ingestion for the Data Analyst Agent.
+
+Picks the fastest Excel engine available, lists sheets without parsing them and
+loads individual sheets lazily with optional column/row projection.
+"""
+
+import importlib.util
+import io
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from core.store import hash_bytes
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def pick_excel_engine(file_name: str = "") -> Optional[str]:
+    """
+    Choose the fastest installed engine for an Excel file.
+
+    calamine (Rust) is preferred for both formats. Otherwise ``.xlsx`` uses
+    openpyxl, which pandas opens in read-only mode, and ``.xls`` uses xlrd.
+
+    Args:
+        file_name: Name of the file, used to tell ``.xls`` from ``.xlsx``.
+
+    Returns:
+        Optional[str]: Engine for ``pd.read_excel``, or None for the pandas default.
+    """
+    if _has_module("python_calamine"):
+        return "calamine"
+    if file_name.lower().endswith(".xls"):
+        return "xlrd" if _has_module("xlrd") else None
+    return "openpyxl" if _has_module("openpyxl") else None
+
+
+class ExcelWorkbook:
+    """
+    Lazily loaded Excel workbook.
+
+    Only the workbook index is read to list sheets; a sheet is parsed the first
+    time it is requested, and each (sheet, usecols, nrows) projection is parsed
+    at most once. Callers get their own copy of the parsed sheet.
+    """
+
+    def __init__(self, source: Union[str, bytes, Any], file_name: str = "") -> None:
+        """
+        Args:
+            source: Path, raw bytes or file-like object with the workbook.
+            file_name: Original file name (defaults to ``source`` for paths).
+        """
+        if isinstance(source, str):
+            self._path: Optional[str] = source
+            self._data: Optional[bytes] = None
+            file_name = file_name or source
+        else:
+            self._path = None
+            if isinstance(source, bytes):
+                self._data = source
+            else:
+                if hasattr(source, "seek"):
+                    source.seek(0)
+                self._data = source.read()
+            file_name = file_name or getattr(source, "name", "")
+        self.engine = pick_excel_engine(file_name)
+        self._sheet_names: Optional[List[str]] = None
+        self._sheets: Dict[Tuple[Any, ...], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _open(self) -> Union[str, io.BytesIO]:
+        return self._path if self._path is not None else io.BytesIO(self._data or b"")
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Names of the sheets in the workbook, read without parsing any cells."""
+        if self._sheet_names is None:
+            self._sheet_names = self._list_sheets()
+        return self._sheet_names
+
+    def _list_sheets(self) -> List[str]:
+        if self.engine == "calamine":
+            from python_calamine import CalamineWorkbook
+
+            if self._path is not None:
+                workbook = CalamineWorkbook.from_path(self._path)
+            else:
+                workbook = CalamineWorkbook.from_filelike(io.BytesIO(self._data or b""))
+            try:
+                return list(workbook.sheet_names)
+            finally:
+                workbook.close()
+        if self.engine == "openpyxl":
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(self._open(), read_only=True)
+            try:
+                return list(workbook.sheetnames)
+            finally:
+                workbook.close()
+        with pd.ExcelFile(self._open(), engine=self.engine) as workbook:
+            return [str(name) for name in workbook.sheet_names]
+
+    def load(
+        self,
+        sheet_name: Optional[Union[str, int]] = None,
+        usecols: Optional[Sequence[str]] = None,
+        nrows: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Parse a single sheet.
+
+        Args:
+            sheet_name: Sheet name or index; defaults to the first sheet.
+            usecols: Only parse these columns.
+            nrows: Only parse this many data rows.
+
+        Returns:
+            pd.DataFrame: Parsed sheet, a copy the caller may modify.
+        """
+        sheet = 0 if sheet_name is None else sheet_name
+        if isinstance(sheet, str) and sheet not in self.sheet_names:
+            raise ValueError(f"Sheet '{sheet}' not found in the workbook.")
+        key = (sheet, tuple(usecols) if usecols is not None else None, nrows)
+        with self._lock:
+            cached = self._sheets.get(key)
+        if cached is not None:
+            return cached.copy()
+        df = pd.read_excel(
+            self._open(),
+            sheet_name=sheet,
+            engine=self.engine,
+            usecols=list(usecols) if usecols is not None else None,
+            nrows=nrows,
+        )
+        with self._lock:
+            self._sheets[key] = df
+        return df.copy()
+
+
+def sheet_key(upload_key: str, sheet_name: Optional[str]) -> str:
+    """
+    Dataset key of one sheet of an uploaded workbook.
+
+    Args:
+        upload_key: Content hash of the workbook bytes.
+        sheet_name: Selected sheet (None for the default sheet).
+
+    Returns:
+        str: ``upload_key`` for the default sheet, else a hash of both.
+    """
+    if sheet_name is None:
+        return upload_key
+    return hash_bytes(f"{upload_key}:{sheet_name}".encode("utf-8"))
+
+
+def list_excel_sheets(source: Union[str, bytes, Any], file_name: str = "") -> List[str]:
+    """
+    List the sheets of an Excel file without parsing any of them.
+
+    Args:
+        source: Path, raw bytes or file-like object with the workbook.
+        file_name: Original file name (defaults to ``source`` for paths).
+
+    Returns:
+        List[str]: Sheet names in workbook order.
+    """
+    return ExcelWorkbook(source, file_name).sheet_names
@@ -0,0 +1,324 @@
+"""
+Memory governor for the Data Analyst Agent.
+
+Every analysis reserves its estimated working set from one process-wide
+memory budget before it runs, so a single huge upload cannot take the whole
+server down for every user:
+
+- The working set is estimated from the dataset profile (rows, column types,
+  group cardinality) and the columns the question touches.
+- Work that fits is admitted at once, or queued until enough of the budget is
+  released by other analyses.
+- Work larger than the budget, or still queued after ``wait_seconds``, runs
+  chunked: aggregates are computed over row slices and merged, which bounds
+  the working set to one slice. Out-of-core engines (DuckDB) spill to disk
+  under their own memory limit, which ``open_dataset`` sets from the budget.
+- Work that cannot be chunked and does not fit is rejected.
+
+Queued and chunked work stops early when its run is cancelled or times out
+(see core.cancellation).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from core.cancellation import check_cancelled
+from core.intents import Filter, categorical_values, numeric_columns
+from core.profile import ColumnStats, top_groups
+
+DEFAULT_BUDGET_MB = 1024
+DEFAULT_WAIT_SECONDS = 30.0
+# Share of the budget one chunked analysis reserves
+CHUNK_SHARE = 0.25
+MIN_CHUNK_ROWS = 10_000
+CANCEL_POLL_SECONDS = 0.1
+# Working-set model: bytes per row for each column copied or factorized, the
+# filter masks, and the per-group state of a group-by
+VALUE_BYTES = 8
+MASK_BYTES = 1
+GROUP_BYTES = 256
+# Keyword analyses (describe, correlations) copy every numeric column twice
+KEYWORD_COPIES = 2
+# Time-series index: sort order, sorted dates and sorted values per row
+TIME_SERIES_BYTES = 3 * VALUE_BYTES
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when an analysis cannot be admitted under the memory budget."""
+
+
+def _touched_columns(df: Any, intent: Any) -> List[Any]:
+    if intent.column is not None:
+        columns = [intent.column]
+    elif intent.operation == "count":
+        columns = []
+    else:
+        columns = numeric_columns(df)
+    columns += [col for col, _ in intent.filters]
+    if intent.group_by is not None:
+        columns.append(intent.group_by)
+    return columns
+
+
+def _distinct(df: Any, column: Any, profile: Optional[Any]) -> int:
+    if profile is not None and column in profile.distinct:
+        return profile.distinct[column].estimate
+    values = categorical_values(df, profile).get(column) if isinstance(df, pd.DataFrame) else None
+    return len(values) if values is not None else len(df)
+
+
+def row_bytes(df: Any, intent: Optional[Any]) -> int:
+    """Working-set bytes per dataset row of an analysis."""
+    if intent is None or not intent.canonical_key():
+        return KEYWORD_COPIES * VALUE_BYTES * max(len(numeric_columns(df)), 1)
+    size = VALUE_BYTES * len(_touched_columns(df, intent)) + MASK_BYTES * len(intent.filters)
+    if intent.time_column is not None:
+        size += TIME_SERIES_BYTES
+    return max(size, MASK_BYTES)
+
+
+def estimate_working_set(df: Any, intent: Optional[Any], profile: Optional[Any] = None) -> int:
+    """
+    Estimated peak memory of answering ``intent`` on ``df``, in bytes.
+
+    Args:
+        df: Dataset (a DataFrame or an engine dataset).
+        intent: Parsed intent; None or a keyword question when it has no
+            canonical key.
+        profile: DatasetProfile of ``df``; its row count and distinct-count
+            sketches are used when it matches ``df``.
+
+    Returns:
+        int: Bytes. Zero for engines that bound their own memory.
+    """
+    if getattr(df, "spills", False):
+        return 0
+    rows = profile.rows if profile is not None and profile.rows == len(df) else len(df)
+    size = rows * row_bytes(df, intent)
+    if intent is not None and intent.group_by is not None:
+        size += GROUP_BYTES * _distinct(df, intent.group_by, profile)
+    return size
+
+
+def chunkable(df: Any, intent: Optional[Any]) -> bool:
+    """Whether the analysis can run over row chunks (aggregates of a DataFrame)."""
+    return (
+        isinstance(df, pd.DataFrame)
+        and intent is not None
+        and bool(intent.canonical_key())
+        and intent.time_column is None
+    )
+
+
+class ChunkedDataset:
+    """
+    A DataFrame whose aggregates are computed over row chunks and merged.
+
+    Implements the engine dataset interface described in ``core.backends``,
+    so intents are answered unchanged while only one chunk's intermediates
+    are held at a time.
+
+    Args:
+        df: Dataset.
+        chunk_rows: Rows per chunk.
+    """
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int) -> None:
+        self.df = df
+        self.chunk_rows = max(int(chunk_rows), 1)
+        self.columns = list(df.columns)
+        self.numeric_columns = numeric_columns(df)
+        self.chunks = 0
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def categorical_values(self) -> Dict[Any, List[Any]]:
+        return categorical_values(self.df)
+
+    def aggregates(
+        self,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[Any],
+        column: Optional[Any],
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Dict[Any, ColumnStats]:
+        """Aggregates of ``column`` over the rows matching ``filters``, chunk by chunk."""
+        from core.conversation import IntermediateCache
+
+        # Uncached: intermediates of a chunk are dropped once merged
+        scratch = IntermediateCache(max_entries=0)
+        merged: Dict[Any, ColumnStats] = {}
+        for start in range(0, max(len(self.df), 1), self.chunk_rows):
+            check_cancelled()
+            chunk = self.df.iloc[start:start + self.chunk_rows]
+            for key, stats in scratch.aggregates("", chunk, filters, group_by, column).items():
+                merged[key] = merged[key].merge(stats) if key in merged else stats
+            self.chunks += 1
+        if group_by is not None:
+            merged = top_groups(merged, top, rank_by)
+        return merged
+
+
+class Admission:
+    """
+    Memory reserved for one analysis; releases it on exit.
+
+    Attributes:
+        mode: "memory" (admitted whole) or "chunked".
+        reserved: Bytes reserved.
+        waited: Seconds spent queued for the reservation.
+        chunk_rows: Rows per chunk in chunked mode.
+    """
+
+    def __init__(
+        self,
+        governor: "MemoryGovernor",
+        mode: str,
+        reserved: int,
+        waited: float,
+        chunk_rows: Optional[int] = None,
+    ) -> None:
+        self._governor = governor
+        self.mode = mode
+        self.reserved = reserved
+        self.waited = waited
+        self.chunk_rows = chunk_rows
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Return the reservation to the budget. Safe to call more than once."""
+        reserved, self.reserved = self.reserved, 0
+        if reserved:
+            self._governor._release(reserved)
+
+
+class MemoryGovernor:
+    """
+    Admission control under a global memory budget.
+
+    Args:
+        budget_mb: Memory all running analyses may reserve together.
+        wait_seconds: Longest wait for budget before falling back to chunked
+            execution (or rejecting work that cannot be chunked).
+    """
+
+    def __init__(
+        self,
+        budget_mb: float = DEFAULT_BUDGET_MB,
+        wait_seconds: float = DEFAULT_WAIT_SECONDS,
+    ) -> None:
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.wait_seconds = wait_seconds
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self.admitted = 0
+        self.chunked = 0
+        self.rejected = 0
+
+    @property
+    def budget_mb(self) -> float:
+        return self.budget / (1024 * 1024)
+
+    @property
+    def in_use(self) -> int:
+        """Bytes currently reserved."""
+        with self._condition:
+            return self._in_use
+
+    def _reserve(self, size: int, deadline: float) -> bool:
+        with self._condition:
+            while self._in_use + size > self.budget:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                # Wake up now and then so a cancelled run leaves the queue
+                self._condition.wait(min(remaining, CANCEL_POLL_SECONDS))
+                check_cancelled()
+            self._in_use += size
+            return True
+
+    def _release(self, size: int) -> None:
+        with self._condition:
+            self._in_use -= size
+            self._condition.notify_all()
+
+    def admit(self, estimate: int, row_size: int = VALUE_BYTES, can_chunk: bool = False) -> Admission:
+        """
+        Reserve memory for an analysis, queueing while the budget is in use.
+
+        Args:
+            estimate: Estimated working set in bytes (see
+                ``estimate_working_set``).
+            row_size: Working-set bytes per row, sizing the chunks.
+            can_chunk: Whether the analysis can run chunked.
+
+        Returns:
+            Admission: The reservation, to be released (``with`` block) when
+            the analysis ends.
+
+        Raises:
+            MemoryBudgetExceeded: If the analysis does not fit and cannot be
+                chunked, or no budget was released in time.
+        """
+        started = time.monotonic()
+        if estimate <= self.budget and self._reserve(estimate, started + self.wait_seconds):
+            self._count("admitted")
+            return Admission(self, "memory", estimate, time.monotonic() - started)
+        if not can_chunk:
+            self._count("rejected")
+            if estimate > self.budget:
+                raise MemoryBudgetExceeded(
+                    f"This analysis needs about {estimate / 1048576:.0f} MB, more than "
+                    f"the {self.budget_mb:.0f} MB memory budget."
+                )
+            raise MemoryBudgetExceeded("The server is at its memory budget; please retry shortly.")
+
+        # Over budget, or still queued: a chunk's working set is much smaller
+        chunk = min(estimate, int(self.budget * CHUNK_SHARE))
+        if not self._reserve(chunk, time.monotonic() + self.wait_seconds):
+            self._count("rejected")
+            raise MemoryBudgetExceeded("The server is at its memory budget; please retry shortly.")
+        self._count("chunked")
+        chunk_rows = max(chunk // max(row_size, 1), MIN_CHUNK_ROWS)
+        return Admission(self, "chunked", chunk, time.monotonic() - started, chunk_rows)
+
+    def _count(self, outcome: str) -> None:
+        with self._condition:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+_default_governor: Optional[MemoryGovernor] = None
+_default_governor_lock = threading.Lock()
+
+
+def get_memory_governor() -> MemoryGovernor:
+    """
+    Return the process-wide MemoryGovernor. The budget and wait are read from
+    ``ANALYSIS_MEMORY_MB`` and ``ANALYSIS_QUEUE_SECONDS``.
+    """
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = MemoryGovernor(
+                budget_mb=_env_float("ANALYSIS_MEMORY_MB", DEFAULT_BUDGET_MB),
+                wait_seconds=_env_float("ANALYSIS_QUEUE_SECONDS", DEFAULT_WAIT_SECONDS),
+            )
+        return _default_governor
@@ -0,0 +1,179 @@
+"""
+On-disk ingestion cache for the Data Analyst Agent.
+
+Parsed uploads are stored as uncompressed Feather snapshots keyed by the hash of
+the uploaded bytes. A hit memory-maps the snapshot instead of re-running the
+original parser (e.g. the slow ``read_excel`` path), and the snapshots survive
+reruns, sessions and process restarts.
+"""
+
+import os
+import tempfile
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    feather = None
+
+# Bump when parsing behavior changes so stale snapshots are ignored.
+INGEST_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(".cache", "ingest"))
+DEFAULT_MAX_CACHE_MB = 512
+
+
+class IngestionCache:
+    """
+    Size-bounded LRU cache of parsed datasets stored as Feather files.
+
+    When pyarrow is not installed the cache is disabled and every load goes
+    straight to the parser.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_size_mb: float = DEFAULT_MAX_CACHE_MB,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether snapshots can be written and read in this environment."""
+        return feather is not None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"v{INGEST_VERSION}-{key}.feather")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Load the snapshot stored under ``key``.
+
+        Args:
+            key: Hash of the uploaded bytes.
+
+        Returns:
+            Optional[pd.DataFrame]: Memory-mapped DataFrame, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+            # Refresh the access time used for LRU eviction
+            os.utime(path, None)
+        except (OSError, ValueError):
+            return None
+        return table.to_pandas(split_blocks=True)
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Store ``df`` as the snapshot for ``key`` and evict old snapshots.
+
+        Returns:
+            bool: True if the snapshot was written, False if it was skipped
+            (cache disabled or the frame cannot be represented in Feather).
+            Frames with non-string column labels (e.g. numbers from a header-less
+            sheet) are skipped, since Feather would read them back as strings.
+        """
+        if not self.enabled or not all(isinstance(col, str) for col in df.columns):
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # Uncompressed so hits can be memory-mapped without decoding
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self._evict()
+        return True
+
+    def load(self, key: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cached dataset for ``key``, parsing and storing it on a miss.
+
+        Args:
+            key: Hash of the uploaded bytes.
+            loader: Parses the upload when no snapshot exists.
+
+        Returns:
+            pd.DataFrame: Loaded dataset.
+        """
+        df = self.get(key)
+        if df is not None:
+            return df
+        df = loader()
+        self.put(key, df)
+        return df
+
+    def size_bytes(self) -> int:
+        """Total size of the stored snapshots."""
+        return sum(size for _, _, size in self._snapshots())
+
+    def clear(self) -> None:
+        """Remove every stored snapshot."""
+        with self._lock:
+            for path, _, _ in self._snapshots():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _snapshots(self) -> List[Tuple[str, float, int]]:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        snapshots = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".feather"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshots.append((path, stat.st_mtime, stat.st_size))
+        return snapshots
+
+    def _evict(self) -> None:
+        with self._lock:
+            snapshots = sorted(self._snapshots(), key=lambda item: item[1])
+            total = sum(size for _, _, size in snapshots)
+            for path, _, size in snapshots:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+
+_default_cache: Optional[IngestionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_ingestion_cache() -> IngestionCache:
+    """
+    Return the process-wide IngestionCache.
+
+    Snapshots are written under ``$INGEST_CACHE_DIR`` (``.cache/ingest`` by
+    default).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("INGEST_CACHE_DIR") or DEFAULT_CACHE_DIR
+            _default_cache = IngestionCache(cache_dir)
+        return _default_cache
@@ -0,0 +1,488 @@
+"""
+Structured intents parsed from analysis questions.
+
+An intent captures what a question asks for (operation, value column, group
+column and equality filters) independently of its wording. Follow-up questions
+such as "and for smokers only?" are parsed relative to the previous intent, so
+a conversation can refine an analysis step by step.
+
+Questions are normalized before parsing (lowercase, no punctuation, synonyms
+mapped to one word) and intents reduce to a canonical key, so differently
+worded questions asking the same thing share cached answers.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from core.profile import GROUP_MAX_CARDINALITY
+from core.timeseries import DEFAULT_WINDOW, datetime_columns
+
+# Words replaced by their canonical form when normalizing questions
+SYNONYMS = {
+    "avg": "average",
+    "averages": "average",
+    "mean": "average",
+    "means": "average",
+    "sums": "sum",
+    "total": "sum",
+    "totals": "sum",
+    "overview": "summary",
+    "trends": "trend",
+}
+PHRASE_SYNONYMS = (("how many", "count"), ("number of", "count"))
+# Operation keywords in normalized questions, checked in order; matched as
+# whole words, so "country" is not a count nor "consumption" a sum
+OPERATION_KEYWORDS = (
+    ("summary", ("summary", "trend")),
+    ("mean", ("average",)),
+    ("sum", ("sum",)),
+    ("count", ("count",)),
+)
+# Words asking for a time series, and the period each one names
+TIME_PATTERN = re.compile(
+    r"\b(?:trend|over time|growth|grow|grew|growing|rolling|moving"
+    r"|daily|weekly|monthly|quarterly|yearly|annual|annually"
+    r"|(?:by|per|each|every)\s+(?:day|week|month|quarter|year))\b"
+)
+PERIOD_WORDS = {
+    "day": "D", "daily": "D",
+    "week": "W", "weekly": "W",
+    "month": "M", "monthly": "M",
+    "quarter": "Q", "quarterly": "Q",
+    "year": "Y", "yearly": "Y", "annual": "Y", "annually": "Y",
+}
+# Openings that mark a question as refining the previous one
+FOLLOW_UP_PREFIXES = (
+    "and ",
+    "what about",
+    "how about",
+    "only ",
+    "now ",
+    "same ",
+    "but ",
+)
+GROUP_WORDS = ("by", "per", "for each", "across", "in each")
+TRUTHY_VALUES = {"yes", "y", "true", "t", "1"}
+FALSY_VALUES = {"no", "n", "false", "f", "0"}
+
+Filter = Tuple[str, Tuple[Any, ...]]
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+
+
+@dataclass(frozen=True)
+class Intent:
+    """
+    What a question asks for.
+
+    Attributes:
+        operation: One of "mean", "sum", "count", "summary", or "" if unknown.
+        column: Numeric column the operation applies to (None for all).
+        group_by: Column whose values split the result, if any.
+        filters: (column, accepted values) pairs, in the order they were added.
+        follow_up: Whether the intent was derived from a previous one.
+        top: Number of groups to keep, largest first ("top 5 regions").
+        time_column: Datetime column of a time-series question.
+        period: Period of the time series ("D", "W", "M", "Q", "Y"), or
+            None to pick one from the time span.
+        window: Periods in a rolling average, if one was asked for.
+        growth: Whether period-over-period growth was asked for.
+    """
+
+    operation: str = ""
+    column: Optional[str] = None
+    group_by: Optional[str] = None
+    filters: Tuple[Filter, ...] = field(default_factory=tuple)
+    follow_up: bool = False
+    top: Optional[int] = None
+    time_column: Optional[str] = None
+    period: Optional[str] = None
+    window: Optional[int] = None
+    growth: bool = False
+
+    @property
+    def is_sliced(self) -> bool:
+        """Whether the intent filters or groups rows."""
+        return bool(self.filters) or self.group_by is not None
+
+    def describe_filters(self) -> str:
+        return " and ".join(
+            f"{col} = {' or '.join(str(value) for value in values)}"
+            for col, values in self.filters
+        )
+
+    def canonical_key(self) -> str:
+        """
+        Wording-independent key of the intent, for caching its answer.
+
+        Filters are sorted and parts the answer does not depend on (the column
+        of a count) are dropped. Returns "" when the intent names no operation
+        and does not slice the data, i.e. the question was not understood.
+        """
+        if not self.operation and not self.is_sliced:
+            return ""
+        operation = self.operation or "mean"
+        column = self.column or "*"
+        if operation == "count" or (operation == "summary" and not self.is_sliced):
+            column = ""
+        filters = "&".join(
+            f"{col}={'|'.join(sorted(str(value) for value in values))}"
+            for col, values in sorted(self.filters, key=lambda item: str(item[0]))
+        )
+        key = f"intent:{operation}:{column}:{self.group_by or ''}:{filters}"
+        if self.top and self.group_by is not None:
+            key += f":top={self.top}"
+        if self.time_column is not None:
+            key += (
+                f":time={self.time_column}/{self.period or 'auto'}"
+                f"/{self.window or ''}/{'growth' if self.growth else ''}"
+            )
+        return key
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-data form, safe to store in graph checkpoints."""
+        return {
+            "operation": self.operation,
+            "column": self.column,
+            "group_by": self.group_by,
+            "filters": [[col, list(values)] for col, values in self.filters],
+            "follow_up": self.follow_up,
+            "top": self.top,
+            "time_column": self.time_column,
+            "period": self.period,
+            "window": self.window,
+            "growth": self.growth,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Intent":
+        return cls(
+            operation=data.get("operation", ""),
+            column=data.get("column"),
+            group_by=data.get("group_by"),
+            filters=tuple(
+                (col, tuple(values)) for col, values in data.get("filters", [])
+            ),
+            follow_up=data.get("follow_up", False),
+            top=data.get("top"),
+            time_column=data.get("time_column"),
+            period=data.get("period"),
+            window=data.get("window"),
+            growth=data.get("growth", False),
+        )
+
+
+def _python_value(value: Any) -> Any:
+    # numpy scalars -> Python scalars, so intents serialize cleanly
+    return value.item() if hasattr(value, "item") else value
+
+
+def _plain(text: Any) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", str(text).lower()).split())
+
+
+def normalize_text(question: str, columns: Sequence[Any] = ()) -> str:
+    """
+    Normalize a question for parsing and cache keys.
+
+    Lowercases, replaces punctuation with spaces, collapses whitespace and maps
+    synonyms to one canonical word ("mean" -> "average", "total" -> "sum").
+    Words naming one of ``columns`` are left alone.
+    """
+    text = _plain(question)
+    for phrase, canonical in PHRASE_SYNONYMS:
+        text = re.sub(rf"\b{phrase}\b", canonical, text)
+    protected = {_plain(col) for col in columns}
+    return " ".join(
+        word if word in protected else SYNONYMS.get(word, word)
+        for word in text.split()
+    )
+
+
+def _word_pattern(word: str) -> str:
+    return r"(?<![\w-])" + re.escape(_plain(word)) + r"s?(?!\w)"
+
+
+def _name_variants(name: Any) -> List[str]:
+    # "unit_price" is also mentioned as "unit price" and "unit prices"
+    plain = _plain(name)
+    variants = {plain, plain.replace("_", " "), plain.replace(" ", "_")}
+    variants |= {variant.rstrip("s") for variant in variants}
+    return sorted(variants - {""})
+
+
+def _mentions(name: Any, question_lower: str) -> bool:
+    return any(
+        re.search(_word_pattern(variant), question_lower)
+        for variant in _name_variants(name)
+    )
+
+
+def numeric_columns(df: Any) -> List[Any]:
+    """
+    Numeric (non-boolean) columns of a dataset.
+
+    ``df`` is a DataFrame, or a dataset of another engine (see
+    core.backends).
+    """
+    if not isinstance(df, pd.DataFrame):
+        return list(df.numeric_columns)
+    return [
+        col
+        for col in df.select_dtypes(include=["number"]).columns
+        if not pd.api.types.is_bool_dtype(df[col])
+    ]
+
+
+def categorical_values(
+    df: Any, profile: Optional[Any] = None
+) -> Dict[str, List[Any]]:
+    """
+    Distinct values of the low-cardinality non-numeric columns.
+
+    Uses the group index of a matching profile when available, which avoids
+    scanning the columns. Datasets from other engines report their own.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df.categorical_values()
+    values = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(
+            df[col]
+        ):
+            continue
+        if profile is not None and profile.rows == len(df) and col in profile.groups:
+            values[col] = list(profile.groups[col])
+            continue
+        try:
+            unique = df[col].dropna().unique()
+        except TypeError:
+            continue
+        if len(unique) <= GROUP_MAX_CARDINALITY:
+            values[col] = list(unique)
+    return values
+
+
+def _operation(question_lower: str) -> str:
+    words = set(question_lower.split())
+    for operation, keywords in OPERATION_KEYWORDS:
+        if any(keyword in words or f"{keyword}s" in words for keyword in keywords):
+            return operation
+    return ""
+
+
+def _value_column(df: Any, question_lower: str) -> Optional[str]:
+    # Longest names first, so "total_charges" wins over "charges"
+    for col in sorted(numeric_columns(df), key=lambda name: -len(str(name))):
+        if _mentions(col, question_lower):
+            return col
+    return None
+
+
+def _group_column(
+    categories: Sequence[Any], question_lower: str
+) -> Optional[str]:
+    for col in categories:
+        for name in _name_variants(col):
+            for word in GROUP_WORDS:
+                pattern = rf"\b{word}\s+(?:the\s+)?{re.escape(name)}"
+                if re.search(pattern, question_lower):
+                    return col
+    return None
+
+
+def _is_boolean(values: Sequence[Any]) -> bool:
+    lowered = {str(value).lower() for value in values}
+    return bool(lowered) and lowered <= TRUTHY_VALUES | FALSY_VALUES
+
+
+def _filters(
+    categories: Dict[str, List[Any]], question_lower: str, exclude: Optional[str]
+) -> Tuple[List[Filter], Optional[str]]:
+    """Equality filters mentioned in the question, plus an implied group column."""
+    filters: List[Filter] = []
+    implied_group = None
+    for col, values in categories.items():
+        if col == exclude:
+            continue
+        if _is_boolean(values):
+            # "smokers" -> smoker = yes, "non-smokers" -> smoker = no
+            name = _plain(col).rstrip("s")
+            negated = re.search(
+                rf"\b(?:non|not)[\s-]?{re.escape(name)}", question_lower
+            )
+            positive = re.search(
+                rf"(?<![\w-]){re.escape(name)}s?(?!\w)",
+                re.sub(rf"\b(?:non|not)[\s-]?{re.escape(name)}s?", " ", question_lower),
+            )
+            if negated and positive:
+                # Comparing both sides: split by the column instead
+                implied_group = implied_group or col
+                continue
+            if negated or positive:
+                wanted = FALSY_VALUES if negated else TRUTHY_VALUES
+                matches = tuple(
+                    _python_value(value)
+                    for value in values
+                    if str(value).lower() in wanted
+                )
+                if matches:
+                    filters.append((col, matches))
+            continue
+        matches = tuple(
+            _python_value(value)
+            for value in values
+            if len(_plain(value)) > 1
+            and re.search(_word_pattern(str(value)), question_lower)
+        )
+        if matches:
+            filters.append((col, matches))
+    return filters, implied_group
+
+
+def _top(
+    columns: Sequence[Any], question_lower: str
+) -> Tuple[Optional[int], Optional[str]]:
+    """Size of a "top N" request and the group column it names, if any."""
+    match = re.search(r"\btop\s+(\d+)(?:\s+(\S+))?", question_lower)
+    if match is None or int(match.group(1)) == 0:
+        return None, None
+    word = match.group(2) or ""
+    for col in columns:
+        if any(re.fullmatch(_word_pattern(name), word) for name in _name_variants(col)):
+            return int(match.group(1)), col
+    return int(match.group(1)), None
+
+
+def _time_request(
+    question_lower: str,
+) -> Optional[Tuple[Optional[str], Optional[int], bool, str]]:
+    """
+    Time-series parts of a question, if it asks for a time series.
+
+    Returns:
+        Period (None for automatic), rolling window, growth flag and the
+        question without its rolling-average phrase (so "rolling average" is
+        not read as the per-period operation); None for other questions.
+    """
+    if not TIME_PATTERN.search(question_lower):
+        return None
+    units = "|".join(PERIOD_WORDS)
+    period = None
+    named = re.search(rf"\b({units})s?\b", question_lower)
+    if named:
+        period = PERIOD_WORDS[named.group(1)]
+
+    window = None
+    rolling = re.search(r"\b(?:rolling|moving)\b", question_lower)
+    if rolling:
+        sized = re.search(rf"\b(\d+)[\s-]*({units})s?\b", question_lower) or re.search(
+            r"\b(?:rolling|moving)\s+(?:average\s+)?(?:over\s+|of\s+)?(\d+)\b",
+            question_lower,
+        )
+        window = int(sized.group(1)) if sized else DEFAULT_WINDOW
+        if sized and sized.lastindex == 2:
+            period = PERIOD_WORDS[sized.group(2)]
+    growth = bool(re.search(r"\b(?:growth|grow|grew|growing)\b", question_lower))
+    remaining = re.sub(r"\b(?:rolling|moving)\s+average\b", " ", question_lower)
+    return period, window or None, growth, remaining
+
+
+def is_follow_up(question: str) -> bool:
+    """Whether the wording of a question refers back to the previous one."""
+    return normalize_text(question).startswith(FOLLOW_UP_PREFIXES)
+
+
+def parse_intent(
+    question: str,
+    df: Any,
+    profile: Optional[Any] = None,
+    previous: Optional[Intent] = None,
+) -> Intent:
+    """
+    Parse a question into an intent.
+
+    Args:
+        question: User's question.
+        df: Dataset the question is about (a DataFrame or a dataset of
+            another engine, see core.backends).
+        profile: Precomputed DatasetProfile of ``df``, if any.
+        previous: Intent of the previous question in the conversation.
+
+    Returns:
+        Intent: The parsed intent. When the question is a follow-up of
+        ``previous`` (it says so, or names no operation), missing parts are
+        inherited and filters are added to the previous ones.
+    """
+    question_lower = normalize_text(question, df.columns)
+    categories = categorical_values(df, profile)
+    operation = _operation(question_lower)
+    time = _time_request(question_lower)
+    time_column = None
+    if time is not None:
+        dates = datetime_columns(df)
+        if dates:
+            mentioned = [col for col in dates if _mentions(col, question_lower)]
+            time_column = (mentioned or dates)[0]
+            operation = _operation(time[3])
+            # Per-period totals unless an average or count is asked for
+            if operation not in ("mean", "sum", "count"):
+                operation = "sum"
+    period, window, growth = (None, None, False)
+    if time is not None and time_column is not None:
+        period, window, growth = time[:3]
+    column = _value_column(df, question_lower)
+    group_by = _group_column(list(categories), question_lower)
+    # Top-N questions may group by any non-numeric column ("top 10 customers")
+    numeric = set(numeric_columns(df))
+    labels = [col for col in df.columns if col not in numeric]
+    top, top_group = _top(labels, question_lower)
+    if top is not None and group_by is None:
+        group_by = top_group or _group_column(labels, question_lower)
+    filters, implied_group = _filters(categories, question_lower, group_by)
+    group_by = group_by or implied_group
+
+    refines = question_lower.startswith(FOLLOW_UP_PREFIXES) or (
+        not operation and column is None and bool(filters)
+    )
+    if previous is None or not refines:
+        return Intent(
+            operation,
+            column,
+            group_by,
+            tuple(filters),
+            top=top,
+            time_column=time_column,
+            period=period,
+            window=window,
+            growth=growth,
+        )
+
+    # Refine the previous intent: new filters replace those on the same column
+    group_by = group_by or previous.group_by
+    replaced = set(dict(filters)) | {group_by}
+    merged = [item for item in previous.filters if item[0] not in replaced]
+    return Intent(
+        operation=operation or previous.operation,
+        column=column or previous.column,
+        group_by=group_by,
+        filters=tuple(merged + filters),
+        follow_up=True,
+        top=top or previous.top,
+        time_column=time_column or previous.time_column,
+        period=period if time_column else previous.period,
+        window=window if time_column else previous.window,
+        growth=growth if time_column else previous.growth,
+    )
+
+
+def question_key(question: str, intent: Optional[Intent] = None) -> str:
+    """
+    Cache key of a question: the intent's canonical key when it has one,
+    otherwise the normalized question text.
+    """
+    key = intent.canonical_key() if intent is not None else ""
+    return key or normalize_text(question)
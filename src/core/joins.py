@@ -0,0 +1,492 @@
+"""
+Join-aware analysis over several related datasets.
+
+A ``JoinedDataset`` presents a primary dataset and related datasets as one
+dataset whose columns are the union of theirs, each related dataset being
+joined to the primary on a shared key column detected from column names and
+values. Questions are answered through the engine dataset interface (see
+core.backends), so intents work unchanged.
+
+Cross-dataset aggregates never materialize the joined frame: a hash-join
+index (the factorized key column) is built once per (dataset, column) and
+cached, the side without the grouping column is reduced to per-key counts
+and sums, and those are spread over the grouped side's rows with
+``np.bincount``. The result equals aggregating the inner join.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.cancellation import check_cancelled
+from core.intents import Filter, _plain, categorical_values, numeric_columns
+from core.profile import ColumnStats, top_groups
+
+# Distinct key values compared when checking that two columns join
+KEY_SAMPLE_VALUES = 1000
+# Share of the related dataset's sampled key values found in the primary
+MIN_KEY_OVERLAP = 0.5
+JOIN_INDEX_ENTRIES = 64
+
+
+def _key_candidate(series: pd.Series) -> bool:
+    # Float columns are measurements, not keys
+    return not pd.api.types.is_float_dtype(series.dtype) and not pd.api.types.is_bool_dtype(
+        series.dtype
+    )
+
+
+def key_overlap(left: pd.Series, right: pd.Series) -> float:
+    """Share of ``right``'s sampled distinct values that also occur in ``left``."""
+    sample = pd.Index(right.dropna().unique()[:KEY_SAMPLE_VALUES])
+    if len(sample) == 0:
+        return 0.0
+    try:
+        return float(sample.isin(left.dropna().unique()).mean())
+    except TypeError:
+        return 0.0
+
+
+def shared_keys(left: pd.DataFrame, right: pd.DataFrame) -> List[Tuple[Any, Any]]:
+    """
+    Column pairs on which two datasets join, best first.
+
+    Columns pair up when their names match ignoring case, spaces and
+    underscores and most of ``right``'s sampled values occur in ``left``.
+    Pairs are ranked by value overlap, then identifier-like names ("id").
+
+    Returns:
+        List[Tuple[Any, Any]]: (left column, right column) pairs.
+    """
+    by_name = {_plain(col).replace(" ", "_"): col for col in left.columns}
+    candidates = []
+    for right_col in right.columns:
+        left_col = by_name.get(_plain(right_col).replace(" ", "_"))
+        if left_col is None:
+            continue
+        if not (_key_candidate(left[left_col]) and _key_candidate(right[right_col])):
+            continue
+        overlap = key_overlap(left[left_col], right[right_col])
+        if overlap >= MIN_KEY_OVERLAP:
+            is_id = _plain(right_col).replace(" ", "_").split("_")[-1] == "id"
+            candidates.append((overlap, is_id, left_col, right_col))
+    candidates.sort(key=lambda item: (-item[0], not item[1]))
+    return [(left_col, right_col) for _, _, left_col, right_col in candidates]
+
+
+class HashJoinIndex:
+    """
+    A column factorized into integer codes, with a hash table of its values.
+
+    Attributes:
+        column: Column the index is built on.
+        codes: Code of each row (-1 for missing values).
+        uniques: Distinct values; the code of a value is its position.
+    """
+
+    __slots__ = ("column", "codes", "uniques")
+
+    def __init__(self, column: Any, codes: np.ndarray, uniques: pd.Index) -> None:
+        self.column = column
+        self.codes = codes
+        self.uniques = uniques
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, column: Any) -> "HashJoinIndex":
+        codes, uniques = pd.factorize(df[column])
+        return cls(column, codes.astype("int64"), pd.Index(uniques))
+
+    def __len__(self) -> int:
+        return len(self.uniques)
+
+    def translate(self, other: "HashJoinIndex") -> np.ndarray:
+        """
+        ``other``'s row codes mapped to this index's codes (-1 where the
+        value does not occur here), for joining ``other`` onto this index.
+        """
+        try:
+            positions = self.uniques.get_indexer(other.uniques)
+        except TypeError:
+            positions = np.full(len(other.uniques), -1, dtype="int64")
+        positions = np.append(positions, -1)
+        # Missing values (code -1) pick the trailing -1
+        return positions[other.codes]
+
+
+class JoinIndexCache:
+    """Thread-safe LRU of hash-join indexes keyed by (dataset, column)."""
+
+    def __init__(self, max_entries: int = JOIN_INDEX_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, HashJoinIndex]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset_key: str, df: pd.DataFrame, column: Any) -> HashJoinIndex:
+        """The index of ``column``, built on first use ("" disables caching)."""
+        key = (dataset_key, column)
+        if dataset_key:
+            with self._lock:
+                index = self._entries.get(key)
+                if index is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return index
+                self.misses += 1
+        index = HashJoinIndex.build(df, column)
+        if dataset_key:
+            with self._lock:
+                self._entries[key] = index
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class JoinedDataset:
+    """
+    A primary dataset joined to related datasets on shared key columns.
+
+    Implements the engine dataset interface described in ``core.backends``.
+    Columns of a related dataset keep their names unless the name is taken,
+    in which case they are qualified as "<dataset>.<column>"; its key column
+    is represented by the primary's. Questions on the primary's columns alone
+    are answered on the primary; questions using a related dataset's columns
+    are answered over its inner join with the primary, so "average Age" is
+    the average over the primary's rows that have a matching customer.
+
+    Args:
+        frames: Datasets by name.
+        primary: Name of the primary dataset in ``frames``.
+        keys: Content hash of each dataset, enabling reuse of join indexes
+            and intermediates across questions.
+        cache: Join index cache (the process-wide one if None).
+
+    Raises:
+        ValueError: If a related dataset shares no key column with the
+            primary.
+    """
+
+    def __init__(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        primary: str,
+        keys: Optional[Dict[str, str]] = None,
+        cache: Optional[JoinIndexCache] = None,
+    ) -> None:
+        self.primary = primary
+        self._frames = frames
+        self._keys = dict(keys or {})
+        self._cache = cache if cache is not None else get_join_index_cache()
+        base = frames[primary]
+        # Joined column name -> (dataset, column in that dataset)
+        self._sources: Dict[Any, Tuple[str, Any]] = {col: (primary, col) for col in base.columns}
+        self.links: Dict[str, Tuple[Any, Any]] = {}
+        for name, frame in frames.items():
+            if name == primary:
+                continue
+            pairs = shared_keys(base, frame)
+            if not pairs:
+                raise ValueError(f"No shared key column between {primary} and {name}.")
+            self.links[name] = pairs[0]
+            for col in frame.columns:
+                if col == pairs[0][1]:
+                    continue
+                joined = col if col not in self._sources else f"{name}.{col}"
+                self._sources[joined] = (name, col)
+        self.columns: List[Any] = list(self._sources)
+        self.numeric_columns: List[Any] = [
+            joined
+            for name, frame in frames.items()
+            for col in numeric_columns(frame)
+            for joined in self._names(name, col)
+        ]
+        self._categories: Optional[Dict[Any, List[Any]]] = None
+
+    def _names(self, name: str, col: Any) -> List[Any]:
+        return [
+            joined for joined, source in self._sources.items() if source == (name, col)
+        ]
+
+    @property
+    def key(self) -> str:
+        """Cache key of the joined datasets ("" unless every dataset has one)."""
+        if any(not self._keys.get(name) for name in self._frames):
+            return ""
+        return "join:" + "+".join(f"{name}={self._keys[name]}" for name in sorted(self._frames))
+
+    def __len__(self) -> int:
+        return len(self._frames[self.primary])
+
+    def source(self, column: Any) -> Tuple[str, Any]:
+        """The dataset and original name of a joined column."""
+        return self._sources[column]
+
+    def categorical_values(self) -> Dict[Any, List[Any]]:
+        """Distinct values of the low-cardinality non-numeric columns (cached)."""
+        if self._categories is None:
+            categories = {}
+            for name, frame in self._frames.items():
+                for col, values in categorical_values(frame).items():
+                    for joined in self._names(name, col):
+                        categories[joined] = values
+            self._categories = categories
+        return self._categories
+
+    def _index(self, name: str, column: Any) -> HashJoinIndex:
+        return self._cache.get(self._keys.get(name, ""), self._frames[name], column)
+
+    def _mask(self, name: str, filters: Tuple[Filter, ...]) -> np.ndarray:
+        frame = self._frames[name]
+        mask = np.ones(len(frame), dtype=bool)
+        for col, values in filters:
+            mask &= frame[col].isin(values).to_numpy()
+        return mask
+
+    def aggregates(
+        self,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[Any],
+        column: Optional[Any],
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Dict[Any, ColumnStats]:
+        """
+        Aggregates of ``column`` over the rows matching ``filters``.
+
+        Args:
+            filters: Equality filters on joined columns.
+            group_by: Joined column splitting the result, or None.
+            column: Numeric joined column, or None to count rows.
+            top: Keep only this many groups, ranked by ``rank_by``.
+            rank_by: "mean", "sum" or "count".
+
+        Returns:
+            Dict[Any, ColumnStats]: Group value (None when not grouped) ->
+            ColumnStats. Row counts have only ``count`` set.
+
+        Raises:
+            ValueError: If the columns come from two related datasets, which
+                are only joined through the primary.
+        """
+        local: Dict[str, List[Filter]] = {}
+        for col, values in filters:
+            name, original = self._sources[col]
+            local.setdefault(name, []).append((original, values))
+        used = set(local)
+        for col in (group_by, column):
+            if col is not None:
+                used.add(self._sources[col][0])
+        related = sorted(used - {self.primary})
+        if len(related) > 1:
+            raise ValueError(
+                f"Columns of {' and '.join(related)} can only be combined with {self.primary}."
+            )
+
+        if not related:
+            stats = self._single(
+                tuple(local.get(self.primary, ())),
+                self._sources[group_by][1] if group_by is not None else None,
+                self._sources[column][1] if column is not None else None,
+            )
+        else:
+            stats = self._joined(related[0], local, group_by, column)
+
+        if group_by is not None:
+            stats = top_groups(stats, top, rank_by)
+        return stats
+
+    def _single(
+        self,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[Any],
+        column: Optional[Any],
+    ) -> Dict[Any, ColumnStats]:
+        """Aggregates of the primary, through the shared intermediate cache."""
+        from core.conversation import get_intermediate_cache
+
+        return get_intermediate_cache().aggregates(
+            self._keys.get(self.primary, ""), self._frames[self.primary], filters, group_by, column
+        )
+
+    def _joined(
+        self,
+        name: str,
+        local: Dict[str, List[Filter]],
+        group_by: Optional[Any],
+        column: Optional[Any],
+    ) -> Dict[Any, ColumnStats]:
+        """Aggregates over the inner join of the primary and ``name``."""
+        primary_key, related_key = self.links[name]
+        primary_index = self._index(self.primary, primary_key)
+        # Related rows coded in the primary's key space
+        codes = {
+            self.primary: primary_index.codes,
+            name: primary_index.translate(self._index(name, related_key)),
+        }
+        size = len(primary_index)
+        check_cancelled()
+
+        # The grouped side keeps its rows; the other side is reduced per key
+        if group_by is not None:
+            grouped = self._sources[group_by][0]
+        elif column is not None and self._sources[column][0] == self.primary:
+            grouped = self.primary
+        else:
+            grouped = name
+        reduced = name if grouped == self.primary else self.primary
+        measure_side = self._sources[column][0] if column is not None else None
+
+        reduced_rows = self._mask(reduced, tuple(local.get(reduced, ())))
+        reduced_rows &= codes[reduced] >= 0
+        reduced_codes = codes[reduced][reduced_rows]
+        matches = np.bincount(reduced_codes, minlength=size)
+
+        rows = self._mask(grouped, tuple(local.get(grouped, ())))
+        rows &= codes[grouped] >= 0
+        row_codes = codes[grouped][rows]
+        if group_by is not None:
+            group_index = self._index(grouped, self._sources[group_by][1])
+            groups = group_index.codes[rows]
+            labels: List[Any] = list(group_index.uniques)
+            keep = groups >= 0
+            groups, row_codes = groups[keep], row_codes[keep]
+        else:
+            groups = np.zeros(len(row_codes), dtype="int64")
+            labels = [None]
+        slots = len(labels)
+        check_cancelled()
+
+        def total(weights: np.ndarray) -> np.ndarray:
+            return np.bincount(groups, weights=weights, minlength=slots)
+
+        weight = matches[row_codes].astype("float64")
+        joined_rows = total(weight)
+        minimum = np.full(slots, np.inf)
+        maximum = np.full(slots, -np.inf)
+        if column is None:
+            count, nulls = joined_rows, np.zeros(slots)
+            sums = squares = np.zeros(slots)
+        elif measure_side == reduced:
+            frame = self._frames[reduced]
+            values = frame[self._sources[column][1]].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[reduced_rows]
+            present = ~np.isnan(values)
+            filled = np.where(present, values, 0.0)
+            key_count = np.bincount(reduced_codes, weights=present, minlength=size)
+            key_sum = np.bincount(reduced_codes, weights=filled, minlength=size)
+            key_sq = np.bincount(reduced_codes, weights=filled * filled, minlength=size)
+            key_min = np.full(size, np.inf)
+            key_max = np.full(size, -np.inf)
+            np.minimum.at(key_min, reduced_codes[present], values[present])
+            np.maximum.at(key_max, reduced_codes[present], values[present])
+            count = total(key_count[row_codes])
+            nulls = joined_rows - count
+            sums = total(key_sum[row_codes])
+            squares = total(key_sq[row_codes])
+            np.minimum.at(minimum, groups, key_min[row_codes])
+            np.maximum.at(maximum, groups, key_max[row_codes])
+        else:
+            frame = self._frames[grouped]
+            values = frame[self._sources[column][1]].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[rows]
+            if group_by is not None:
+                values = values[keep]
+            present = ~np.isnan(values) & (weight > 0)
+            filled = np.where(present, values, 0.0)
+            count = total(np.where(present, weight, 0.0))
+            nulls = joined_rows - count
+            sums = total(filled * weight)
+            squares = total(filled * filled * weight)
+            np.minimum.at(minimum, groups[present], values[present])
+            np.maximum.at(maximum, groups[present], values[present])
+
+        stats = {}
+        for slot, label in enumerate(labels):
+            if joined_rows[slot] == 0 and group_by is not None:
+                continue
+            if column is None:
+                stats[label] = ColumnStats(count=int(joined_rows[slot]))
+            elif count[slot] == 0:
+                stats[label] = ColumnStats(nulls=int(nulls[slot]))
+            else:
+                stats[label] = ColumnStats(
+                    count=int(count[slot]),
+                    nulls=int(nulls[slot]),
+                    total=float(sums[slot]),
+                    total_sq=float(squares[slot]),
+                    minimum=float(minimum[slot]),
+                    maximum=float(maximum[slot]),
+                )
+        return stats
+
+
+_default_cache: Optional[JoinIndexCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_join_index_cache() -> JoinIndexCache:
+    """Return the process-wide JoinIndexCache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = JoinIndexCache()
+        return _default_cache
+
+
+# Name of the primary dataset in a JoinedDataset built by join_datasets
+PRIMARY = "main"
+JOINED_ENTRIES = 16
+_joined: "OrderedDict[str, JoinedDataset]" = OrderedDict()
+_joined_lock = threading.Lock()
+
+
+def join_datasets(
+    df: Any,
+    datasets: Optional[Dict[str, pd.DataFrame]] = None,
+    dataset_key: str = "",
+    dataset_keys: Optional[Dict[str, str]] = None,
+) -> Any:
+    """
+    ``df`` joined to related datasets, or ``df`` itself when there are none.
+
+    Joined datasets with a cache key are kept, so shared keys are detected
+    once per combination of datasets.
+
+    Args:
+        df: Primary dataset (named ``PRIMARY`` in the joined dataset).
+        datasets: Related DataFrames by name.
+        dataset_key: Content hash of ``df``.
+        dataset_keys: Content hash of each related dataset.
+
+    Raises:
+        ValueError: If a related dataset shares no key column with ``df``.
+    """
+    if not datasets or not isinstance(df, pd.DataFrame):
+        return df
+    keys = dict(dataset_keys or {})
+    keys[PRIMARY] = dataset_key
+    frames = {PRIMARY: df, **datasets}
+    key = "+".join(f"{name}={keys.get(name, '')}" for name in sorted(frames))
+    cacheable = all(keys.get(name) for name in frames)
+    if cacheable:
+        with _joined_lock:
+            joined = _joined.get(key)
+            if joined is not None:
+                _joined.move_to_end(key)
+                return joined
+    joined = JoinedDataset(frames, PRIMARY, keys)
+    if cacheable:
+        with _joined_lock:
+            _joined[key] = joined
+            while len(_joined) > JOINED_ENTRIES:
+                _joined.popitem(last=False)
+    return joined
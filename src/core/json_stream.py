@@ -0,0 +1,297 @@
+"""
+Streaming JSON ingestion for the Data Analyst Agent.
+
+Handles both JSON Lines and array-of-records documents. Records are decoded
+one at a time, nested objects are flattened on the fly, and values are written
+into per-column buffers that are converted to typed arrays every few thousand
+rows, so peak memory stays close to the size of the final DataFrame instead of
+holding a list of dicts for the whole file.
+"""
+
+import codecs
+import io
+import json
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+_loads: Callable[..., Any]
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    _loads = json.loads
+
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_CHUNK_ROWS = 10_000
+READ_CHUNK_BYTES = 1024 * 1024
+# Bytes inspected to tell arrays, JSON Lines and single objects apart
+DETECT_BYTES = 1024 * 1024
+FLATTEN_SEPARATOR = "."
+
+LAYOUT_ARRAY = "array"
+LAYOUT_LINES = "lines"
+LAYOUT_OBJECT = "object"
+LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+def detect_json_layout(head: bytes, file_name: str = "") -> str:
+    """
+    Detect whether a document is a JSON array, JSON Lines or a single object.
+
+    ``.jsonl``/``.ndjson`` files are JSON Lines whatever their first line. A
+    lone object is read as one record when it cannot be column-oriented (no
+    list values) and is either all scalars or a single newline-terminated line.
+
+    Args:
+        head: First bytes of the document (a few KB are enough).
+        file_name: Name of the file, if known.
+
+    Returns:
+        str: ``"array"``, ``"lines"`` or ``"object"``.
+    """
+    if file_name.lower().endswith(LINES_EXTENSIONS):
+        return LAYOUT_LINES
+    text = head.decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+    if text.startswith("["):
+        return LAYOUT_ARRAY
+    first_line, newline, rest = text.partition("\n")
+    try:
+        first = json.loads(first_line)
+    except ValueError:
+        # The first object spans several lines: a regular JSON document
+        return LAYOUT_OBJECT
+    if rest.strip():
+        return LAYOUT_LINES
+    if isinstance(first, dict) and first:
+        values = first.values()
+        if not any(isinstance(value, list) for value in values) and (
+            newline or not any(isinstance(value, dict) for value in values)
+        ):
+            return LAYOUT_LINES
+    return LAYOUT_OBJECT
+
+
+def flatten_record(
+    record: Dict[str, Any],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    sep: str = FLATTEN_SEPARATOR,
+) -> Dict[str, Any]:
+    """
+    Flatten nested objects into dotted column names.
+
+    Objects nested deeper than ``max_depth`` levels are kept as values; lists
+    are never expanded.
+
+    Args:
+        record: Decoded JSON object.
+        max_depth: Number of nesting levels to flatten (0 keeps the record as is).
+        sep: Separator between parent and child keys.
+
+    Returns:
+        Dict[str, Any]: Flat record.
+    """
+    if max_depth <= 0 or not any(isinstance(v, dict) for v in record.values()):
+        return record
+    flat: Dict[str, Any] = {}
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            for sub_key, sub_value in flatten_record(value, max_depth - 1, sep).items():
+                flat[f"{key}{sep}{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+
+def _iter_lines(stream: BinaryIO, partial: bool) -> Iterator[Any]:
+    for line in stream:
+        line = line.strip().lstrip(b"\xef\xbb\xbf")
+        if not line:
+            continue
+        try:
+            yield _loads(line)
+        except ValueError:
+            if partial:
+                return  # last line cut by the sample boundary
+            raise
+
+
+def _iter_array(stream: BinaryIO, partial: bool) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip separators between records
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("JSON document is not an array of records.")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == "]":
+            return
+        if pos < len(buffer):
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    if partial:
+                        return
+                    raise
+            else:
+                pos = end
+                yield record
+                continue
+        if eof:
+            if partial or not started:
+                return
+            raise ValueError("Unexpected end of JSON array.")
+        chunk = stream.read(READ_CHUNK_BYTES)
+        eof = not chunk
+        # Drop consumed text so the buffer only holds the unread tail
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+
+def iter_records(
+    stream: BinaryIO,
+    layout: Optional[str] = None,
+    partial: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Decode records one at a time from a JSON array or JSON Lines stream.
+
+    Args:
+        stream: Binary stream positioned at the start of the document.
+        layout: ``"array"`` or ``"lines"``; detected from the stream when None.
+        partial: Stop quietly at a truncated last record (used for samples).
+
+    Yields:
+        Dict[str, Any]: Decoded records; scalars are wrapped as ``{"value": x}``.
+    """
+    if layout is None:
+        head = stream.read(DETECT_BYTES)
+        stream = io.BufferedReader(_Rewound(head, stream))
+        layout = detect_json_layout(head)
+    if layout == LAYOUT_LINES:
+        records = _iter_lines(stream, partial)
+    else:
+        records = _iter_array(stream, partial)
+    for record in records:
+        yield record if isinstance(record, dict) else {"value": record}
+
+
+class _Rewound(io.RawIOBase):
+    """Stream that replays already read bytes before the rest of ``stream``."""
+
+    def __init__(self, head: bytes, stream: BinaryIO) -> None:
+        self._head = io.BytesIO(head)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self._head.read(len(buffer)) or self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class _ColumnBuilder:
+    """
+    Accumulates records column by column.
+
+    Python values are kept only for the current chunk of rows; full chunks are
+    converted to typed Series and the Python objects are released.
+    """
+
+    def __init__(self, chunk_rows: int) -> None:
+        self._chunk_rows = chunk_rows
+        self._values: Dict[str, List[Any]] = {}
+        self._rows = 0
+        self._pieces: Dict[str, Dict[int, pd.Series]] = {}
+        self._chunk_lengths: List[int] = []
+
+    def append(self, record: Dict[str, Any]) -> None:
+        rows = self._rows
+        for key, value in record.items():
+            column = self._values.get(key)
+            if column is None:
+                column = self._values[key] = []
+                self._pieces.setdefault(key, {})
+            if len(column) < rows:
+                column.extend([None] * (rows - len(column)))
+            column.append(value)
+        self._rows += 1
+        if self._rows >= self._chunk_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        rows = self._rows
+        if rows == 0:
+            return
+        chunk_index = len(self._chunk_lengths)
+        for key, column in self._values.items():
+            if len(column) < rows:
+                column.extend([None] * (rows - len(column)))
+            self._pieces[key][chunk_index] = pd.Series(column)
+        self._chunk_lengths.append(rows)
+        self._values = {key: [] for key in self._values}
+        self._rows = 0
+
+    def build(self) -> pd.DataFrame:
+        self._flush()
+        columns = {}
+        for key, pieces in self._pieces.items():
+            # Chunks read before the column first appeared are missing values
+            parts = [
+                pieces[index] if index in pieces else pd.Series(np.full(length, np.nan))
+                for index, length in enumerate(self._chunk_lengths)
+            ]
+            if len(parts) == 1:
+                columns[key] = parts[0]
+            else:
+                columns[key] = pd.concat(parts, ignore_index=True)
+        return pd.DataFrame(columns, copy=False)
+
+
+def read_json_stream(
+    source: Union[bytes, BinaryIO],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    file_name: str = "",
+) -> pd.DataFrame:
+    """
+    Load a JSON array or JSON Lines document into a DataFrame incrementally.
+
+    Single JSON objects (e.g. column-oriented documents) are handed to
+    ``pd.read_json``, which already handles them efficiently.
+
+    Args:
+        source: Raw bytes or binary stream with the document.
+        max_depth: Nesting levels of objects to flatten into columns.
+        chunk_rows: Rows buffered as Python objects before conversion.
+        file_name: Name of the file, used to recognize JSON Lines.
+
+    Returns:
+        pd.DataFrame: Loaded DataFrame.
+    """
+    stream = io.BytesIO(source) if isinstance(source, bytes) else source
+    head = stream.read(DETECT_BYTES)
+    stream = io.BufferedReader(_Rewound(head, stream))
+    layout = detect_json_layout(head, file_name)
+    if layout == LAYOUT_OBJECT:
+        return pd.read_json(stream)
+
+    builder = _ColumnBuilder(chunk_rows)
+    for record in iter_records(stream, layout):
+        builder.append(flatten_record(record, max_depth))
+    return builder.build()
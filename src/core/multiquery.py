@@ -0,0 +1,283 @@
+"""
+Answering many questions about one dataset at once.
+
+Each question is parsed into its intent and the aggregates the intent needs
+are listed as (filters, group by, column) requests. Requests are deduplicated
+across questions and grouped into passes, one per distinct row slice
+(filters and group-by column): a pass builds the slice's filter mask and
+group codes once and aggregates every column requested on it together.
+Requests that can be merged from another pass's groups, or read from the
+dataset profile, take no pass at all. The answers are then written from the
+pass results, identical to answering each question on its own.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.answer_cache import AnswerResult
+from core.cancellation import check_cancelled
+from core.conversation import Aggregates, IntermediateCache, question_result
+from core.intents import Filter, Intent, numeric_columns, parse_intent
+from core.profile import ColumnStats
+
+# Filter masks kept while running the passes, reused by passes sharing a
+# filter prefix
+MASK_ENTRIES = 16
+
+Request = Tuple[Tuple[Filter, ...], Optional[Any], Optional[Any]]  # filters, group_by, column
+Slice = Tuple[Tuple[Filter, ...], Optional[Any]]  # filters, group_by
+
+
+class QueryPlan(NamedTuple):
+    """
+    Aggregates to compute for a set of intents.
+
+    Attributes:
+        passes: Row slice -> columns aggregated in its pass (None counts rows),
+            in execution order.
+        derived: Ungrouped requests merged from a grouped pass's groups.
+    """
+
+    passes: Dict[Slice, List[Optional[Any]]]
+    derived: List[Request]
+
+
+def required_aggregates(df: Any, intent: Intent) -> List[Request]:
+    """
+    Aggregates ``answer_intent`` reads to answer ``intent``.
+
+    Returns:
+        List[Request]: (filters, group_by, column) requests; empty for intents
+        answered otherwise (keyword, time-series or plain summary questions).
+    """
+    if not intent.canonical_key() or intent.time_column is not None:
+        return []
+    if intent.operation == "count":
+        return [(intent.filters, intent.group_by, None)]
+    if intent.operation == "summary" and not intent.is_sliced:
+        return []
+    columns = [intent.column] if intent.column else numeric_columns(df)
+    requests = [(intent.filters, intent.group_by, column) for column in columns]
+    if intent.operation == "summary" and columns:
+        requests.insert(0, (intent.filters, intent.group_by, None))
+    return requests
+
+
+def _profiled(df: pd.DataFrame, profile: Optional[Any], request: Request) -> bool:
+    """Whether the dataset profile answers ``request`` without a pass."""
+    filters, group_by, column = request
+    if not filters and group_by is None and column is None:
+        return True
+    if profile is None or profile.rows != len(df) or column not in profile.numeric:
+        return False
+    if not filters:
+        return group_by is None or profile.group_stats(group_by, column) is not None
+    # One filter on an indexed column merges the profiled groups it selects
+    return (
+        group_by is None
+        and len(filters) == 1
+        and profile.group_stats(filters[0][0], column) is not None
+    )
+
+
+def _derivable(request: Request, planned: set) -> bool:
+    """Whether an ungrouped filtered request merges from a planned grouped one."""
+    filters, group_by, column = request
+    if group_by is not None:
+        return False
+    for position, (col, _) in enumerate(filters):
+        rest = filters[:position] + filters[position + 1:]
+        if (rest, col, column) in planned:
+            return True
+    return False
+
+
+def plan_aggregates(
+    df: pd.DataFrame, intents: Sequence[Intent], profile: Optional[Any] = None
+) -> QueryPlan:
+    """
+    Plan the passes answering ``intents`` on ``df``.
+
+    Grouped slices run first, so a filtered question ("average Price where
+    Region = North") is merged from a grouped one ("average Price by Region")
+    asked in the same batch. Passes are ordered by filters, so passes sharing
+    a filter prefix reuse its mask.
+    """
+    requests: Dict[Request, None] = {}
+    for intent in intents:
+        for request in required_aggregates(df, intent):
+            if not _profiled(df, profile, request):
+                requests.setdefault(request)
+    planned = {request for request in requests if request[1] is not None}
+    derived = [request for request in requests if _derivable(request, planned)]
+    skipped = set(derived)
+
+    passes: Dict[Slice, List[Optional[Any]]] = {}
+    ordered = sorted(
+        (request for request in requests if request not in skipped),
+        key=lambda request: (request[1] is None, repr(request[0])),
+    )
+    for filters, group_by, column in ordered:
+        passes.setdefault((filters, group_by), []).append(column)
+    return QueryPlan(passes, derived)
+
+
+def _scan(
+    df: pd.DataFrame,
+    mask: Optional[np.ndarray],
+    group_by: Optional[Any],
+    columns: Sequence[Optional[Any]],
+) -> Dict[Optional[Any], Aggregates]:
+    """Aggregates of every column of one slice, from one set of group codes."""
+    result: Dict[Optional[Any], Aggregates] = {}
+    if group_by is None:
+        row_count = int(mask.sum()) if mask is not None else len(df)
+        for column in columns:
+            check_cancelled()
+            if column is None:
+                result[None] = {None: ColumnStats(count=row_count)}
+            else:
+                values = df[column] if mask is None else df[column][mask]
+                result[column] = {None: ColumnStats.from_series(values)}
+        return result
+
+    keys = df[group_by] if mask is None else df[group_by][mask]
+    codes, uniques = pd.factorize(keys, sort=False)
+    # Rows whose group is missing belong to no group, as in a groupby
+    keyed = codes >= 0
+    groups = len(uniques)
+    group_rows = np.bincount(codes[keyed], minlength=groups)
+    for column in columns:
+        check_cancelled()
+        if column is None:
+            result[None] = {key: ColumnStats(count=int(n)) for key, n in zip(uniques, group_rows)}
+            continue
+        values = df[column].to_numpy(dtype="float64", na_value=np.nan)
+        if mask is not None:
+            values = values[mask]
+        present = keyed & ~np.isnan(values)
+        group, values = codes[present], values[present]
+        count = np.bincount(group, minlength=groups)
+        total = np.bincount(group, weights=values, minlength=groups)
+        total_sq = np.bincount(group, weights=values * values, minlength=groups)
+        minimum = np.full(groups, np.inf)
+        np.minimum.at(minimum, group, values)
+        maximum = np.full(groups, -np.inf)
+        np.maximum.at(maximum, group, values)
+        result[column] = {
+            key: ColumnStats(
+                count=int(count[i]),
+                nulls=int(group_rows[i] - count[i]),
+                total=float(total[i]),
+                total_sq=float(total_sq[i]),
+                minimum=float(minimum[i]),
+                maximum=float(maximum[i]),
+            )
+            for i, key in enumerate(uniques)
+        }
+    return result
+
+
+def execute_plan(df: pd.DataFrame, plan: QueryPlan) -> Dict[Request, Aggregates]:
+    """
+    Run the passes of ``plan``.
+
+    Returns:
+        Dict[Request, Aggregates]: Aggregates of every planned request, in
+        the form ``IntermediateCache.aggregates`` returns them.
+    """
+    # Private to this run, so any non-empty key enables mask reuse
+    masks = IntermediateCache(max_entries=MASK_ENTRIES)
+    results: Dict[Request, Aggregates] = {}
+    for (filters, group_by), columns in plan.passes.items():
+        check_cancelled()
+        mask = masks.mask("plan", df, filters)
+        for column, aggregates in _scan(df, mask, group_by, columns).items():
+            results[(filters, group_by, column)] = aggregates
+    for filters, group_by, column in plan.derived:
+        for position, (col, values) in enumerate(filters):
+            rest = filters[:position] + filters[position + 1:]
+            grouped = results.get((rest, col, column))
+            if grouped is not None:
+                merged = ColumnStats()
+                for value in values:
+                    if value in grouped:
+                        merged = merged.merge(grouped[value])
+                results[(filters, group_by, column)] = {None: merged}
+                break
+    return results
+
+
+class PlannedCache(IntermediateCache):
+    """Intermediate cache serving the results of ``execute_plan`` first."""
+
+    def __init__(self, results: Dict[Request, Aggregates]) -> None:
+        super().__init__()
+        self._results = results
+
+    def aggregates(
+        self,
+        dataset_key: str,
+        df: Any,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[Any],
+        column: Optional[Any],
+        profile: Optional[Any] = None,
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Aggregates:
+        planned = self._results.get((filters, group_by, column))
+        if planned is not None and isinstance(df, pd.DataFrame):
+            return planned
+        return super().aggregates(
+            dataset_key, df, filters, group_by, column, profile, top, rank_by
+        )
+
+
+def answer_questions(
+    df: Any,
+    questions: Sequence[str],
+    profile: Optional[Any] = None,
+    dataset_key: str = "",
+    intents: Optional[Sequence[Intent]] = None,
+) -> List[AnswerResult]:
+    """
+    Answer many independent questions about one dataset.
+
+    Answers are the same as ``core.conversation.question_result`` gives for
+    each question, but the aggregates behind all of them are computed
+    together (see ``plan_aggregates``) and questions sharing an intent are
+    answered once. Engines other than pandas compute each distinct aggregate
+    once in their own query.
+
+    Args:
+        df: Dataset.
+        questions: Questions, none of them a follow-up of another.
+        profile: DatasetProfile of ``df``, if available.
+        dataset_key: Content hash of ``df``, enabling reuse of intermediates.
+        intents: Intents already parsed from the questions (parsed if None).
+
+    Returns:
+        List[AnswerResult]: Textual answer, chart (always None here) and
+        ``AnalysisResult.to_dict()`` per question, in order, as the answer
+        cache stores them.
+    """
+    if intents is None:
+        intents = [parse_intent(question, df, profile) for question in questions]
+    results: Dict[Request, Aggregates] = {}
+    if isinstance(df, pd.DataFrame):
+        results = execute_plan(df, plan_aggregates(df, intents, profile))
+    cache = PlannedCache(results)
+
+    answers: Dict[Any, AnswerResult] = {}
+    output = []
+    for question, intent in zip(questions, intents):
+        key = intent.canonical_key()
+        shared = key or ("question", question)
+        if shared not in answers:
+            result = question_result(df, question, profile, dataset_key, intent, cache)
+            answers[shared] = result.text, result.chart, result.to_dict()
+        output.append(answers[shared])
+    return output
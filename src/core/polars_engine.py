@@ -0,0 +1,207 @@
+"""
+Analysis engine backed by Polars lazy frames.
+
+A ``PolarsDataset`` wraps a lazily scanned CSV/Parquet file (or an in-memory
+DataFrame) and answers intents by building lazy query plans, so Polars applies
+projection and predicate pushdown and runs them multi-threaded. Only the
+final aggregates are converted back to Python, when the answer is formatted.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # pragma: no cover - polars is optional
+    pl = None  # type: ignore[assignment]
+
+from core.profile import GROUP_MAX_CARDINALITY, ColumnStats
+from core.schema import NA_VALUES
+
+# Rows checked before scanning a whole file for text columns holding numbers
+NUMERIC_TEXT_SAMPLE_ROWS = 10_000
+
+Filter = Tuple[str, Tuple[Any, ...]]
+
+
+def _numeric_text_casts(frame: Any, columns: Sequence[str]) -> Dict[str, Any]:
+    """
+    Text columns whose values all parse as numbers once trimmed, as pandas
+    reads them (e.g. a value with a trailing space), and their Polars type.
+
+    A sample of rows rules most columns out; the remaining candidates are
+    checked over the whole file in one plan.
+    """
+
+    def parses(source: Any, candidates: Sequence[str]) -> Dict[str, Any]:
+        checks = []
+        for col in candidates:
+            value = pl.col(col).str.strip_chars()
+            checks += [
+                (pl.col(col).count() == value.cast(pl.Float64, strict=False).count()).alias(f"{col}:float"),
+                (pl.col(col).count() == value.cast(pl.Int64, strict=False).count()).alias(f"{col}:int"),
+            ]
+        row = source.select(checks).collect().row(0, named=True)
+        return {
+            col: pl.Int64 if row[f"{col}:int"] else pl.Float64
+            for col in candidates
+            if row[f"{col}:float"]
+        }
+
+    if not columns:
+        return {}
+    sample = parses(frame.head(NUMERIC_TEXT_SAMPLE_ROWS), columns)
+    return parses(frame, list(sample)) if sample else {}
+
+
+class PolarsDataset:
+    """
+    A dataset queried through Polars lazy frames.
+
+    Implements the engine dataset interface described in ``core.backends``.
+    Query plans are rebuilt from the lazy frame for every question, so the
+    dataset is safe to query from several threads.
+
+    Args:
+        source: CSV or Parquet path (scanned lazily), or a pandas DataFrame.
+
+    Raises:
+        ImportError: If polars is not installed.
+        ValueError: If a path has an extension Polars cannot scan.
+    """
+
+    def __init__(self, source: Union[str, pd.DataFrame]) -> None:
+        if pl is None:
+            raise ImportError("The Polars engine needs the polars package.")
+        if isinstance(source, pd.DataFrame):
+            frame = pl.from_pandas(source).lazy()
+        elif str(source).lower().endswith((".csv", ".tsv")):
+            separator = "\t" if str(source).lower().endswith(".tsv") else ","
+            # Missing values and space-padded numbers are read like pandas does
+            frame = pl.scan_csv(
+                source,
+                separator=separator,
+                infer_schema_length=10000,
+                null_values=NA_VALUES,
+            )
+            text = [col for col, dtype in frame.collect_schema().items() if dtype == pl.String]
+            casts = _numeric_text_casts(frame, text)
+            if casts:
+                frame = frame.with_columns(
+                    pl.col(col).str.strip_chars().cast(dtype, strict=False)
+                    for col, dtype in casts.items()
+                )
+        elif str(source).lower().endswith(".parquet"):
+            frame = pl.scan_parquet(source)
+        else:
+            raise ValueError(f"The Polars engine reads .csv, .tsv and .parquet files, not {source}.")
+
+        self.path = source if isinstance(source, str) else None
+        self._frame = frame
+        schema = frame.collect_schema()
+        self.columns: List[str] = list(schema.names())
+        self.numeric_columns: List[str] = [
+            col
+            for col, dtype in schema.items()
+            if dtype.is_numeric() and dtype != pl.Boolean
+        ]
+        self._rows: Optional[int] = None
+        self._categories: Optional[Dict[str, List[Any]]] = None
+
+    def __len__(self) -> int:
+        if self._rows is None:
+            self._rows = self._frame.select(pl.len()).collect().item()
+        return self._rows
+
+    def categorical_values(self) -> Dict[str, List[Any]]:
+        """Distinct values of the low-cardinality non-numeric columns (cached)."""
+        if self._categories is None:
+            labels = [col for col in self.columns if col not in self.numeric_columns]
+            plans = [
+                self._frame.select(
+                    pl.col(col).drop_nulls().unique(maintain_order=True)
+                ).head(GROUP_MAX_CARDINALITY + 1)
+                for col in labels
+            ]
+            # One parallel collect for all columns
+            categories = {}
+            for col, values in zip(labels, pl.collect_all(plans)):
+                if values.height <= GROUP_MAX_CARDINALITY:
+                    categories[col] = values.to_series().to_list()
+            self._categories = categories
+        return self._categories
+
+    def aggregates(
+        self,
+        filters: Tuple[Filter, ...],
+        group_by: Optional[str],
+        column: Optional[str],
+        top: Optional[int] = None,
+        rank_by: str = "mean",
+    ) -> Dict[Any, ColumnStats]:
+        """
+        Aggregates of ``column`` over the rows matching ``filters``, in one plan.
+
+        Args:
+            filters: Equality filters, pushed down into the scan.
+            group_by: Column splitting the result, or None for one group.
+            column: Numeric column, or None to count rows.
+            top: Keep only this many groups, ranked by ``rank_by`` (largest
+                first) inside the plan.
+            rank_by: "mean", "sum" or "count".
+
+        Returns:
+            Dict[Any, ColumnStats]: Group value (None when not grouped) ->
+            ColumnStats. Row counts have only ``count`` set.
+        """
+        frame = self._frame
+        if filters:
+            frame = frame.filter(
+                pl.all_horizontal([pl.col(col).is_in(list(values)) for col, values in filters])
+            )
+
+        if column is None:
+            aggregations = [pl.len().alias("count")]
+            rank = "count"
+        else:
+            value = pl.col(column).cast(pl.Float64)
+            aggregations = [
+                value.count().alias("count"),
+                value.null_count().alias("nulls"),
+                value.sum().alias("total"),
+                (value * value).sum().alias("total_sq"),
+                value.min().alias("minimum"),
+                value.max().alias("maximum"),
+            ]
+            rank = {"mean": "mean", "sum": "total", "count": "count"}[rank_by]
+            if rank == "mean":
+                aggregations.append(value.mean().alias("mean"))
+
+        if group_by is None:
+            rows = frame.select(aggregations).collect().rows(named=True)
+            keys = [None]
+        else:
+            plan = frame.group_by(group_by).agg(aggregations)
+            if top:
+                plan = plan.sort(rank, descending=True, nulls_last=True).head(top)
+            result = plan.collect()
+            keys = result.get_column(group_by).to_list()
+            rows = result.rows(named=True)
+
+        stats: Dict[Any, ColumnStats] = {}
+        for key, row in zip(keys, rows):
+            if column is None:
+                stats[key] = ColumnStats(count=int(row["count"]))
+            elif not row["count"]:
+                stats[key] = ColumnStats(nulls=int(row["nulls"]))
+            else:
+                stats[key] = ColumnStats(
+                    count=int(row["count"]),
+                    nulls=int(row["nulls"]),
+                    total=float(row["total"]),
+                    total_sq=float(row["total_sq"]),
+                    minimum=float(row["minimum"]),
+                    maximum=float(row["maximum"]),
+                )
+        return stats
@@ -0,0 +1,146 @@
+"""
+Background precomputation after a dataset is loaded.
+
+Right after load, a worker thread profiles the dataset and answers the
+suggested questions shown in the UI, drawing the charts of those that ask for
+one, and fills the answer cache so that picking a suggestion returns
+immediately.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from core.charts import render_chart, wants_chart
+from core.conversation import answer_key
+from core.governor import estimate_working_set, get_memory_governor
+from core.intents import parse_intent, question_key
+from core.multiquery import answer_questions
+from core.answer_cache import AnyAnswerCache, get_answer_cache
+from core.profile import DatasetProfile, ProfileRegistry, get_profile_registry
+
+# Jobs remembered per dataset; older ones are dropped, so their datasets are
+# prefetched again if scheduled later
+MAX_JOBS = 32
+
+
+def _failed(job: "Future[DatasetProfile]") -> bool:
+    return job.cancelled() or job.exception() is not None
+
+
+class Prefetcher:
+    """
+    Runs one prefetch job per dataset on a background worker.
+
+    Jobs are deduplicated by dataset key, so calling ``schedule`` on every
+    Streamlit rerun is cheap. Only the ``max_jobs`` most recently scheduled
+    jobs are remembered, and failed jobs are forgotten so they are retried.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[AnyAnswerCache] = None,
+        registry: Optional[ProfileRegistry] = None,
+        max_workers: int = 1,
+        max_jobs: int = MAX_JOBS,
+    ) -> None:
+        self._cache = cache if cache is not None else get_answer_cache()
+        self._registry = registry if registry is not None else get_profile_registry()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Future[DatasetProfile]]" = OrderedDict()
+        self._max_jobs = max_jobs
+
+    def schedule(
+        self, dataset_key: str, df: pd.DataFrame, questions: Sequence[str]
+    ) -> "Future[DatasetProfile]":
+        """
+        Start precomputing the profile and answers for a dataset.
+
+        Args:
+            dataset_key: Content hash of the dataset.
+            df: Dataset to analyze (must not be mutated while the job runs).
+            questions: Suggested questions to answer ahead of time.
+
+        Returns:
+            Future[DatasetProfile]: Resolves to the dataset profile once all
+            answers are cached.
+        """
+        with self._lock:
+            job = self._jobs.get(dataset_key)
+            if job is not None and not (job.done() and _failed(job)):
+                self._jobs.move_to_end(dataset_key)
+                return job
+            job = self._executor.submit(self._run, dataset_key, df, list(questions))
+            self._jobs[dataset_key] = job
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+        # Outside the lock: runs right away if the job already finished
+        job.add_done_callback(lambda done: self._forget_failed(dataset_key, done))
+        return job
+
+    def release(self, dataset_key: str) -> None:
+        """Forget the job of a dataset that is no longer used."""
+        with self._lock:
+            self._jobs.pop(dataset_key, None)
+
+    def _forget_failed(self, dataset_key: str, job: "Future[DatasetProfile]") -> None:
+        if _failed(job):
+            with self._lock:
+                if self._jobs.get(dataset_key) is job:
+                    del self._jobs[dataset_key]
+
+    def profile(self, dataset_key: str) -> Optional[DatasetProfile]:
+        """The profile of a dataset if its prefetch job has finished, else None."""
+        with self._lock:
+            job = self._jobs.get(dataset_key)
+        if job is None or not job.done() or job.exception() is not None:
+            return None
+        return job.result()
+
+    def _run(
+        self, dataset_key: str, df: pd.DataFrame, questions: Sequence[str]
+    ) -> DatasetProfile:
+        profile = self._registry.profile_for(df, key=dataset_key)
+        missing = []
+        for question in questions:
+            # Keyed like the analysis node, on the question's canonical intent
+            intent = parse_intent(question, df, profile)
+            key = answer_key(question, question_key(question, intent))
+            if not self._cache.contains(dataset_key, key):
+                missing.append((question, intent, key))
+        if missing:
+            questions, intents, keys = zip(*missing)
+            results = answer_questions(df, questions, profile, dataset_key, intents)
+            for question, key, (text, chart, result) in zip(questions, keys, results):
+                if chart is None and wants_chart(question):
+                    chart = self._chart(df, question, profile)
+                self._cache.put(dataset_key, key, (text, chart, result))
+        return profile
+
+    @staticmethod
+    def _chart(df: pd.DataFrame, question: str, profile: DatasetProfile) -> Optional[str]:
+        # As the chart node draws it; on failure the node tries again when asked
+        try:
+            with get_memory_governor().admit(estimate_working_set(df, None, profile)):
+                return render_chart(df, question, profile=profile)
+        except Exception:
+            return None
+
+
+_default_prefetcher: Optional[Prefetcher] = None
+_default_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Return the process-wide Prefetcher."""
+    global _default_prefetcher
+    with _default_prefetcher_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = Prefetcher()
+        return _default_prefetcher
@@ -0,0 +1,379 @@
+"""
+Mergeable dataset profiles for the Data Analyst Agent.
+
+A profile holds per-column aggregates, per-group aggregates for low-cardinality
+columns and distinct-count sketches. Every part can be merged, so when a new
+upload is the previous dataset plus appended rows, only the new rows are
+scanned and folded into the existing profile.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns with more distinct values than this get no group index
+GROUP_MAX_CARDINALITY = 100
+# Number of hashes kept by each distinct-count sketch
+SKETCH_SIZE = 256
+# Rows per digest of the profiled data, compared to recognise appends
+FINGERPRINT_CHUNK_ROWS = 64 * 1024
+REGISTRY_SIZE = 32
+
+
+class ColumnStats:
+    """Mergeable aggregates of a numeric column."""
+
+    __slots__ = ("count", "nulls", "total", "total_sq", "minimum", "maximum")
+
+    def __init__(
+        self,
+        count: int = 0,
+        nulls: int = 0,
+        total: float = 0.0,
+        total_sq: float = 0.0,
+        minimum: float = np.inf,
+        maximum: float = -np.inf,
+    ) -> None:
+        self.count = count
+        self.nulls = nulls
+        self.total = total
+        self.total_sq = total_sq
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "ColumnStats":
+        values = series.dropna().to_numpy(dtype="float64")
+        if len(values) == 0:
+            return cls(nulls=len(series))
+        return cls(
+            count=len(values),
+            nulls=len(series) - len(values),
+            total=float(values.sum()),
+            total_sq=float(np.dot(values, values)),
+            minimum=float(values.min()),
+            maximum=float(values.max()),
+        )
+
+    def merge(self, other: "ColumnStats") -> "ColumnStats":
+        return ColumnStats(
+            count=self.count + other.count,
+            nulls=self.nulls + other.nulls,
+            total=self.total + other.total,
+            total_sq=self.total_sq + other.total_sq,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (same convention as pandas)."""
+        if self.count < 2:
+            return float("nan")
+        squares = self.total_sq - self.total * self.total / self.count
+        variance = squares / (self.count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+
+def top_groups(
+    stats: Dict[Any, ColumnStats], top: Optional[int], rank_by: str = "mean"
+) -> Dict[Any, ColumnStats]:
+    """
+    The ``top`` groups of ``stats`` ranked by ``rank_by`` ("mean", "sum" or
+    "count"), largest first; all groups when ``top`` is None.
+    """
+    if not top:
+        return stats
+
+    def rank(item: Tuple[Any, ColumnStats]) -> float:
+        column_stats = item[1]
+        if rank_by == "sum":
+            value = column_stats.total
+        elif rank_by == "mean":
+            value = column_stats.mean
+        else:
+            value = column_stats.count
+        return -value if value == value else np.inf
+
+    return dict(sorted(stats.items(), key=rank)[:top])
+
+
+class DistinctSketch:
+    """
+    K-minimum-values sketch estimating the number of distinct values.
+
+    Exact while fewer than ``SKETCH_SIZE`` distinct values have been seen.
+    """
+
+    __slots__ = ("hashes",)
+
+    def __init__(self, hashes: Optional[np.ndarray] = None) -> None:
+        self.hashes = hashes if hashes is not None else np.empty(0, dtype="uint64")
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "DistinctSketch":
+        return cls(np.unique(_hash_values(series.dropna()))[:SKETCH_SIZE])
+
+    def merge(self, other: "DistinctSketch") -> "DistinctSketch":
+        return DistinctSketch(np.union1d(self.hashes, other.hashes)[:SKETCH_SIZE])
+
+    @property
+    def estimate(self) -> int:
+        if len(self.hashes) < SKETCH_SIZE:
+            return len(self.hashes)
+        kth = float(self.hashes[-1]) / float(np.iinfo(np.uint64).max)
+        return int(round((SKETCH_SIZE - 1) / kth))
+
+
+def _hash_values(obj: Any) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(obj, index=False).to_numpy()
+    except TypeError:
+        # Nested JSON values (lists, dicts) are unhashable; hash their text form
+        return pd.util.hash_pandas_object(obj.astype(str), index=False).to_numpy()
+
+
+def _rows_digest(df: pd.DataFrame) -> str:
+    return hashlib.sha256(_hash_values(df).tobytes()).hexdigest()
+
+
+def _chunk_digests(df: pd.DataFrame, start: int = 0) -> List[str]:
+    """Digests of ``df`` in ``FINGERPRINT_CHUNK_ROWS`` chunks, from chunk ``start``."""
+    return [
+        _rows_digest(df.iloc[offset:offset + FINGERPRINT_CHUNK_ROWS])
+        for offset in range(start * FINGERPRINT_CHUNK_ROWS, len(df), FINGERPRINT_CHUNK_ROWS)
+    ]
+
+
+def _schema(df: pd.DataFrame) -> Tuple[Tuple[str, bool], ...]:
+    # Numeric-ness rather than exact dtype, so sampled schema differences
+    # (e.g. category vs object) between uploads don't hide an append
+    return tuple(
+        (str(col), pd.api.types.is_numeric_dtype(dtype))
+        for col, dtype in df.dtypes.items()
+    )
+
+
+class DatasetProfile:
+    """
+    Aggregates, group indexes and sketches describing a dataset.
+
+    Attributes:
+        rows: Number of rows profiled.
+        numeric: Aggregates per numeric column.
+        groups: group column -> group value -> numeric column -> aggregates.
+        distinct: Distinct-count sketch per column.
+        appended_rows: Rows added by the last incremental refresh (0 if the
+            profile was built from scratch).
+    """
+
+    def __init__(self) -> None:
+        self.schema: Tuple[Tuple[str, bool], ...] = ()
+        self.rows = 0
+        self.numeric: Dict[str, ColumnStats] = {}
+        self.groups: Dict[str, Dict[Any, Dict[str, ColumnStats]]] = {}
+        self.distinct: Dict[str, DistinctSketch] = {}
+        self.appended_rows = 0
+        self._digests: List[str] = []
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "DatasetProfile":
+        """Profile a whole DataFrame."""
+        profile = cls()
+        profile.schema = _schema(df)
+        profile._absorb(df)
+        profile._digests = _chunk_digests(df)
+        return profile
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return list(self.numeric)
+
+    def _absorb(self, df: pd.DataFrame) -> None:
+        numeric_columns = df.select_dtypes(include=["number"]).columns.tolist()
+        for col in numeric_columns:
+            stats = ColumnStats.from_series(df[col])
+            current = self.numeric.get(col)
+            self.numeric[col] = current.merge(stats) if current is not None else stats
+
+        for col in df.columns:
+            sketch = DistinctSketch.from_series(df[col])
+            current_sketch = self.distinct.get(col)
+            if current_sketch is not None:
+                sketch = current_sketch.merge(sketch)
+            self.distinct[col] = sketch
+
+        values = df[numeric_columns].astype("float64")
+        squares = values * values
+        for col in df.columns:
+            if col in numeric_columns:
+                continue
+            if self.distinct[col].estimate > GROUP_MAX_CARDINALITY:
+                self.groups.pop(col, None)
+                continue
+            try:
+                self._absorb_groups(col, df[col], values, squares)
+            except TypeError:
+                # Unhashable values (e.g. nested JSON lists) cannot be grouped
+                self.groups.pop(col, None)
+        self.rows += len(df)
+
+    def _absorb_groups(
+        self,
+        col: str,
+        keys: pd.Series,
+        values: pd.DataFrame,
+        squares: pd.DataFrame,
+    ) -> None:
+        grouped = values.groupby(keys, observed=True, sort=False)
+        sizes = grouped.size()
+        counts = grouped.count()
+        totals = grouped.sum()
+        totals_sq = squares.groupby(keys, observed=True, sort=False).sum()
+        minimums = grouped.min()
+        maximums = grouped.max()
+        index = self.groups.setdefault(col, {})
+        for value in counts.index:
+            per_column = index.setdefault(value, {})
+            for num_col in values.columns:
+                count = int(counts.at[value, num_col])
+                stats = ColumnStats(
+                    count=count,
+                    nulls=int(sizes.at[value]) - count,
+                    total=float(totals.at[value, num_col]),
+                    total_sq=float(totals_sq.at[value, num_col]),
+                    minimum=float(minimums.at[value, num_col]) if count else np.inf,
+                    maximum=float(maximums.at[value, num_col]) if count else -np.inf,
+                )
+                current = per_column.get(num_col)
+                per_column[num_col] = current.merge(stats) if current else stats
+
+    def is_prefix_of(self, df: pd.DataFrame) -> bool:
+        """
+        Whether ``df`` starts with the rows this profile was built from.
+
+        Every profiled row is compared, chunk by chunk against the digests
+        kept with the profile, stopping at the first chunk that differs.
+        """
+        if _schema(df) != self.schema or len(df) < self.rows or self.rows == 0:
+            return False
+        known = df.iloc[:self.rows]
+        for index, digest in enumerate(self._digests):
+            offset = index * FINGERPRINT_CHUNK_ROWS
+            if _rows_digest(known.iloc[offset:offset + FINGERPRINT_CHUNK_ROWS]) != digest:
+                return False
+        return True
+
+    def extend(self, df: pd.DataFrame) -> "DatasetProfile":
+        """
+        Return the profile of ``df``, a dataset that starts with this one.
+
+        Only the rows after ``self.rows`` are scanned. The current profile is
+        left untouched, since other sessions may still use the shorter dataset.
+        """
+        delta = df.iloc[self.rows:]
+        profile = DatasetProfile()
+        profile.schema = self.schema
+        profile.rows = self.rows
+        profile.numeric = dict(self.numeric)
+        profile.distinct = dict(self.distinct)
+        profile.groups = {
+            col: {value: dict(stats) for value, stats in index.items()}
+            for col, index in self.groups.items()
+        }
+        profile._absorb(delta)
+        # Full chunks are unchanged; the last one may have grown
+        full = self.rows // FINGERPRINT_CHUNK_ROWS
+        profile._digests = self._digests[:full] + _chunk_digests(df, full)
+        profile.appended_rows = len(delta)
+        return profile
+
+    def group_stats(
+        self, group_col: str, value_col: str
+    ) -> Optional[Dict[Any, ColumnStats]]:
+        """Aggregates of ``value_col`` for every value of ``group_col``, if indexed."""
+        index = self.groups.get(group_col)
+        if index is None or value_col not in self.numeric:
+            return None
+        return {
+            value: stats[value_col]
+            for value, stats in index.items()
+            if value_col in stats
+        }
+
+
+class ProfileRegistry:
+    """
+    Process-wide registry of recent dataset profiles.
+
+    ``profile_for`` reuses the profile of an identical dataset, extends the
+    profile of a dataset that the new one appends to, or builds a fresh one.
+    """
+
+    def __init__(self, max_profiles: int = REGISTRY_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, DatasetProfile]" = OrderedDict()
+        self._max_profiles = max_profiles
+
+    def profile_for(
+        self, df: pd.DataFrame, key: Optional[str] = None
+    ) -> DatasetProfile:
+        """
+        Get the profile of ``df``, scanning only rows not profiled before.
+
+        Args:
+            df: Dataset to profile.
+            key: Content hash of the dataset, when known (e.g. a store key).
+
+        Returns:
+            DatasetProfile: Profile of the whole dataset.
+        """
+        with self._lock:
+            if key is not None and key in self._profiles:
+                self._profiles.move_to_end(key)
+                return self._profiles[key]
+            candidates = list(self._profiles.items())
+
+        base_key, base = None, None
+        for candidate_key, candidate in reversed(candidates):
+            if base is not None and candidate.rows <= base.rows:
+                continue
+            if candidate.is_prefix_of(df):
+                base_key, base = candidate_key, candidate
+
+        if base is None:
+            profile = DatasetProfile.build(df)
+        elif base.rows == len(df):
+            profile = base
+        else:
+            profile = base.extend(df)
+
+        with self._lock:
+            if base_key is not None and base is not profile:
+                # The grown dataset supersedes the shorter one
+                self._profiles.pop(base_key, None)
+            self._profiles[key or _rows_digest(df)] = profile
+            while len(self._profiles) > self._max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+
+_default_registry: Optional[ProfileRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_profile_registry() -> ProfileRegistry:
+    """Return the process-wide ProfileRegistry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ProfileRegistry()
+        return _default_registry
@@ -0,0 +1,332 @@
+"""
+Opt-in profiling of graph runs.
+
+``profiled_invoke`` runs the graph like ``graph.invoke`` and, for requests
+that ask for it or are picked by the sampling rate, samples the calling
+thread's stack every few milliseconds (graph nodes run on the thread that
+invokes the graph). The resulting flame graph is written as a speedscope
+file and as collapsed stacks (for flamegraph.pl and similar tools), tagged
+with the question, the dataset fingerprint and per-node timings. Only the
+slowest ``max_entries`` profiles are kept on disk.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PROFILE_DIR = os.path.abspath(os.path.join(".cache", "profiles"))
+DEFAULT_KEEP = 20
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling one thread's stack at a fixed interval.
+
+    Args:
+        interval: Seconds between samples.
+        thread_id: Thread to sample (the one calling ``start`` if None).
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: "Counter[Tuple[Frame, ...]]" = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(self.thread_id,), name="profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def _run(self, thread_id: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks: one "root;...;leaf count" line per distinct stack."""
+        lines = []
+        for stack, count in sorted(self.samples.items()):
+            names = ";".join(
+                f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack
+            )
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples as a speedscope "sampled" profile (weights in seconds)."""
+        frames: List[Dict[str, Any]] = []
+        positions: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            indexes = []
+            for frame in stack:
+                if frame not in positions:
+                    positions[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(positions[frame])
+            samples.append(indexes)
+            weights.append(count * self.interval)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "data-analyst-agent",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class ProfileArchive:
+    """
+    On-disk archive keeping the profiles of the slowest runs.
+
+    Each entry is three files sharing an id: ``<id>.speedscope.json``,
+    ``<id>.collapsed.txt`` and ``<id>.meta.json`` (question, dataset
+    fingerprint, node timings, total time). Entries already on disk count
+    towards the bound, so it holds across restarts.
+
+    Args:
+        directory: Where profiles are written.
+        max_entries: Profiles kept; a faster run than all of them is dropped.
+    """
+
+    SUFFIXES = (".speedscope.json", ".collapsed.txt", ".meta.json")
+
+    def __init__(self, directory: str = DEFAULT_PROFILE_DIR, max_entries: int = DEFAULT_KEEP) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, float]] = None
+
+    def _load_index(self) -> Dict[str, float]:
+        if self._index is None:
+            index = {}
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if not name.endswith(".meta.json"):
+                        continue
+                    try:
+                        with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                            index[name[: -len(".meta.json")]] = float(json.load(file)["total_ms"])
+                    except (OSError, ValueError, KeyError):
+                        continue
+            self._index = index
+        return self._index
+
+    def _write(self, path: str, text: str) -> None:
+        temp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp, path)
+
+    def add(self, profiler: SamplingProfiler, metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Archive a profile if it is among the slowest.
+
+        Args:
+            profiler: Stopped profiler holding the samples.
+            metadata: Tags of the run; must include "total_ms".
+
+        Returns:
+            Optional[str]: Id of the archived profile, or None when it was
+            faster than every kept profile.
+        """
+        total_ms = float(metadata["total_ms"])
+        with self._lock:
+            index = self._load_index()
+            if len(index) >= self.max_entries and (
+                not index or total_ms <= min(index.values())
+            ):
+                return None
+            profile_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, profile_id)
+            title = f"{metadata.get('question', '')} ({total_ms:.0f} ms)"
+            self._write(base + ".speedscope.json", json.dumps(profiler.speedscope(title)))
+            self._write(base + ".collapsed.txt", profiler.collapsed())
+            self._write(base + ".meta.json", json.dumps({"id": profile_id, **metadata}, indent=2))
+            index[profile_id] = total_ms
+            while len(index) > self.max_entries:
+                fastest = min(index, key=lambda profile_id: index[profile_id])
+                del index[fastest]
+                for suffix in self.SUFFIXES:
+                    try:
+                        os.remove(os.path.join(self.directory, fastest + suffix))
+                    except OSError:
+                        pass
+            return profile_id
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Metadata of the archived profiles, slowest first."""
+        with self._lock:
+            ids = sorted(self._load_index().items(), key=lambda item: -item[1])
+        entries = []
+        for profile_id, _ in ids:
+            try:
+                with open(os.path.join(self.directory, profile_id + ".meta.json"), encoding="utf-8") as file:
+                    entries.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+
+def dataset_fingerprint(state: Dict[str, Any]) -> str:
+    """Content key of the state's dataset: its dataset key, or a hash of it."""
+    if state.get("dataset_key"):
+        return state["dataset_key"]
+    df = state.get("df")
+    if df is None:
+        return ""
+    if hasattr(df, "fingerprint"):
+        return df.fingerprint()
+    import pandas as pd
+
+    if isinstance(df, pd.DataFrame):
+        from core.store import hash_dataframe
+
+        return hash_dataframe(df)
+    return ""
+
+
+def should_profile(requested: Optional[bool], sample_rate: float) -> bool:
+    """Profile when asked to, else for a ``sample_rate`` share of runs."""
+    if requested is not None:
+        return requested
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def profiled_invoke(
+    graph: Any,
+    state: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None,
+    profile: Optional[bool] = None,
+    sample_rate: Optional[float] = None,
+    archive: Optional[ProfileArchive] = None,
+) -> Dict[str, Any]:
+    """
+    ``graph.invoke(state, config)``, profiled when requested or sampled.
+
+    Args:
+        graph: Compiled graph.
+        state: Input state.
+        config: Graph config.
+        profile: True/False to force profiling on/off for this run; None
+            leaves it to the sampling rate.
+        sample_rate: Share of runs profiled (``PROFILE_SAMPLE_RATE``
+            environment variable, default 0, if None).
+        archive: Where profiles go (the process-wide archive if None).
+
+    Returns:
+        Dict[str, Any]: The final state. Profiled runs that were archived
+        also carry "profile_id".
+    """
+    if sample_rate is None:
+        sample_rate = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+    if not should_profile(profile, sample_rate):
+        return graph.invoke(state, config)
+
+    result = dict(state)
+    timings = []
+    profiler = SamplingProfiler()
+    started = last = time.perf_counter()
+    with profiler:
+        # Nodes run one after another, so each update closes its node's span
+        for mode, chunk in graph.stream(state, config, stream_mode=["updates", "values"]):
+            if mode == "values":
+                result = chunk
+                continue
+            now = time.perf_counter()
+            for node in chunk:
+                timings.append({"node": node, "ms": round((now - last) * 1000, 3)})
+            last = now
+    total_ms = (time.perf_counter() - started) * 1000
+
+    metadata = {
+        "question": state.get("question", ""),
+        "dataset": dataset_fingerprint(state),
+        "status": result.get("status", ""),
+        "total_ms": round(total_ms, 3),
+        "nodes": timings,
+        "samples": sum(profiler.samples.values()),
+        "interval_ms": profiler.interval * 1000,
+        "created": time.time(),
+    }
+    archive = archive if archive is not None else get_profile_archive()
+    profile_id = archive.add(profiler, metadata)
+    if profile_id is not None:
+        result = {**result, "profile_id": profile_id}
+    return result
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+_default_archive: Optional[ProfileArchive] = None
+_default_archive_lock = threading.Lock()
+
+
+def get_profile_archive() -> ProfileArchive:
+    """
+    Return the process-wide ProfileArchive, in ``PROFILE_DIR`` keeping the
+    slowest ``PROFILE_KEEP`` runs.
+    """
+    global _default_archive
+    with _default_archive_lock:
+        if _default_archive is None:
+            _default_archive = ProfileArchive(
+                os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR),
+                int(_env_float("PROFILE_KEEP", DEFAULT_KEEP)),
+            )
+        return _default_archive
@@ -0,0 +1,152 @@
+"""
+Structured analysis results.
+
+Answers are built as ``AnalysisResult`` objects holding their values in
+``ResultTable`` rows, with the column names and the unit of the values, plus
+an optional one-line summary and a chart. Text is rendered from them once,
+when first asked for, so the API, caches and UI can reuse the values without
+parsing the text. ``to_dict`` gives the plain-data form kept in graph state.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# How values are written: two decimals, whole numbers, or as they are
+UNITS = ("number", "count", "text")
+
+
+def _plain(value: Any) -> Any:
+    # numpy scalars -> Python scalars, NaN -> None and other labels (dates) ->
+    # text, so results serialize cleanly
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def format_value(value: Any, unit: str = "number") -> str:
+    """A value as it appears in text answers."""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        # Missing aggregates (e.g. the mean of no values), as pandas writes them
+        return "nan"
+    if unit == "count":
+        return str(int(value))
+    if unit == "number":
+        return f"{value:.2f}"
+    return str(value)
+
+
+class ResultTable:
+    """
+    Labelled values of one part of an answer, e.g. the average charges per
+    region.
+
+    Attributes:
+        title: Heading, e.g. "Average charges by region".
+        columns: Names of the label and value columns.
+        rows: (label, value) pairs, in display order.
+        unit: Unit of the values (see ``UNITS``); string values are written
+            as they are.
+    """
+
+    __slots__ = ("title", "columns", "rows", "unit")
+
+    def __init__(
+        self,
+        title: str,
+        columns: Tuple[str, str],
+        rows: Optional[List[Tuple[Any, Any]]] = None,
+        unit: str = "number",
+    ) -> None:
+        self.title = title
+        self.columns = columns
+        self.rows = rows if rows is not None else []
+        self.unit = unit
+
+    def add(self, label: Any, value: Any) -> None:
+        self.rows.append((label, value))
+
+    def render(self) -> str:
+        lines = [f"{self.title}:"]
+        lines.extend(f"- {label}: {format_value(value, self.unit)}" for label, value in self.rows)
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "columns": list(self.columns),
+            "unit": self.unit,
+            "rows": [[_plain(label), _plain(value)] for label, value in self.rows],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultTable":
+        return cls(
+            data["title"],
+            tuple(data["columns"]),
+            [tuple(row) for row in data.get("rows", [])],
+            data.get("unit", "number"),
+        )
+
+
+class AnalysisResult:
+    """
+    Answer to a question.
+
+    Attributes:
+        summary: One-line answer, e.g. "The average Price is 20.00"; when
+            set it is the text of the answer and ``tables`` hold its values.
+        tables: Values of the answer; rendered one after another when there
+            is no summary.
+        chart: Base64 PNG of the chart, if one was drawn.
+    """
+
+    __slots__ = ("summary", "tables", "chart", "_text")
+
+    def __init__(
+        self,
+        summary: str = "",
+        tables: Sequence[ResultTable] = (),
+        chart: Optional[str] = None,
+    ) -> None:
+        self.summary = summary
+        self.tables = list(tables)
+        self.chart = chart
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_text(cls, text: str, chart: Optional[str] = None) -> "AnalysisResult":
+        """Result of an analysis that only produced text."""
+        return cls(summary=text, chart=chart)
+
+    @property
+    def text(self) -> str:
+        """The answer as text, rendered on first use."""
+        if self._text is None:
+            if self.summary:
+                self._text = self.summary
+            else:
+                self._text = "".join(table.render() for table in self.tables)
+        return self._text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-data form (without the chart), safe to store in graph checkpoints."""
+        return {
+            "summary": self.summary,
+            "tables": [table.to_dict() for table in self.tables],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], chart: Optional[str] = None) -> "AnalysisResult":
+        return cls(
+            data.get("summary", ""),
+            [ResultTable.from_dict(table) for table in data.get("tables", [])],
+            chart,
+        )
@@ -0,0 +1,291 @@
+"""
+Schema inference for CSV and JSON ingestion.
+
+A small byte sample from the start of the file is parsed to infer numeric
+dtypes, categoricals and date columns. The full file is then parsed once with
+explicit types (using the pyarrow CSV reader when available) instead of letting
+pandas infer types over every row. Inferred schemas are cached by file layout,
+so repeated uploads with the same columns skip inference.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from core.json_stream import (
+    DEFAULT_MAX_DEPTH,
+    LAYOUT_OBJECT,
+    detect_json_layout,
+    flatten_record,
+    iter_records,
+    read_json_stream,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pa_csv = None
+
+SAMPLE_BYTES = 64 * 1024
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+# Cells pandas reads as missing by default, applied to the Arrow reader too
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
+SCHEMA_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Column types inferred from a sample of a file."""
+
+    dtypes: Dict[str, str] = field(default_factory=dict)
+    dates: Tuple[str, ...] = ()
+
+    @property
+    def categories(self) -> List[str]:
+        """Columns loaded as categoricals."""
+        return [col for col, dtype in self.dtypes.items() if dtype == "category"]
+
+
+_schema_cache: "OrderedDict[str, Schema]" = OrderedDict()
+_schema_cache_lock = threading.Lock()
+
+
+def _cache_get(layout_key: str) -> Optional[Schema]:
+    with _schema_cache_lock:
+        schema = _schema_cache.get(layout_key)
+        if schema is not None:
+            _schema_cache.move_to_end(layout_key)
+        return schema
+
+
+def _cache_put(layout_key: str, schema: Schema) -> None:
+    with _schema_cache_lock:
+        _schema_cache[layout_key] = schema
+        _schema_cache.move_to_end(layout_key)
+        while len(_schema_cache) > SCHEMA_CACHE_SIZE:
+            _schema_cache.popitem(last=False)
+
+
+def _cache_drop(layout_key: str) -> None:
+    with _schema_cache_lock:
+        _schema_cache.pop(layout_key, None)
+
+
+def clear_schema_cache() -> None:
+    """Forget every cached schema."""
+    with _schema_cache_lock:
+        _schema_cache.clear()
+
+
+def infer_frame_schema(sample: pd.DataFrame) -> Schema:
+    """
+    Infer column types from a parsed sample.
+
+    Args:
+        sample: First rows of the dataset, parsed with default inference.
+
+    Returns:
+        Schema: Explicit dtypes, categoricals and date columns.
+    """
+    dtypes: Dict[str, str] = {}
+    dates: List[str] = []
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            dtypes[col] = "bool"
+        elif pd.api.types.is_integer_dtype(series):
+            dtypes[col] = "int64"
+        elif pd.api.types.is_float_dtype(series):
+            dtypes[col] = "float64"
+        elif series.dtype == object:
+            values = series.dropna()
+            if values.empty or not all(isinstance(value, str) for value in values):
+                continue
+            try:
+                pd.to_datetime(values, format="ISO8601")
+                dates.append(col)
+                continue
+            except (ValueError, TypeError):
+                pass
+            if values.nunique() <= max(1, CATEGORY_MAX_RATIO * len(values)):
+                dtypes[col] = "category"
+    return Schema(dtypes=dtypes, dates=tuple(dates))
+
+
+def _layout_key(kind: str, layout: Any) -> str:
+    return hashlib.sha256(f"{kind}:{layout!r}".encode()).hexdigest()
+
+
+def _csv_sample(data: bytes) -> bytes:
+    sample = data[:SAMPLE_BYTES]
+    if len(data) > SAMPLE_BYTES and b"\n" in sample:
+        # Drop the partial last line
+        sample = sample[: sample.rindex(b"\n") + 1]
+    return sample
+
+
+def infer_csv_schema(data: bytes) -> Tuple[str, Schema]:
+    """
+    Infer the schema of a CSV file from its first ``SAMPLE_BYTES`` bytes.
+
+    Args:
+        data: Raw CSV content.
+
+    Returns:
+        Tuple[str, Schema]: Layout key (hash of the header) and the schema.
+    """
+    header = data.split(b"\n", 1)[0].strip()
+    layout_key = _layout_key("csv", header)
+    schema = _cache_get(layout_key)
+    if schema is None:
+        schema = infer_frame_schema(pd.read_csv(io.BytesIO(_csv_sample(data))))
+        _cache_put(layout_key, schema)
+    return layout_key, schema
+
+
+def _arrow_type(dtype: str) -> Any:
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return {"int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_()}[dtype]
+
+
+def _read_csv_typed(data: bytes, schema: Schema) -> pd.DataFrame:
+    if pa_csv is not None:
+        column_types = {
+            col: _arrow_type(dtype) for col, dtype in schema.dtypes.items()
+        }
+        column_types.update({col: pa.timestamp("ns") for col in schema.dates})
+        table = pa_csv.read_csv(
+            io.BytesIO(data),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                null_values=NA_VALUES,
+                strings_can_be_null=True,
+            ),
+        )
+        return table.to_pandas()
+    return pd.read_csv(
+        io.BytesIO(data), dtype=schema.dtypes, parse_dates=list(schema.dates)
+    )
+
+
+def read_csv_with_schema(data: bytes) -> pd.DataFrame:
+    """
+    Load a CSV file using a sampled schema and explicit dtypes.
+
+    Falls back to plain ``pd.read_csv`` (and forgets the cached schema) when
+    rows beyond the sample do not fit the inferred types.
+
+    Args:
+        data: Raw CSV content.
+
+    Returns:
+        pd.DataFrame: Loaded DataFrame.
+    """
+    layout_key, schema = infer_csv_schema(data)
+    try:
+        return _read_csv_typed(data, schema)
+    except (ValueError, TypeError):
+        _cache_drop(layout_key)
+        return pd.read_csv(io.BytesIO(data))
+
+
+def sample_json_records(
+    data: bytes,
+    limit: int = SAMPLE_BYTES,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    file_name: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    Decode and flatten the complete records in the first ``limit`` bytes.
+
+    Works for JSON arrays and JSON Lines; returns an empty list for other
+    layouts (e.g. a single column-oriented object).
+    """
+    head = data[:limit]
+    layout = detect_json_layout(head, file_name)
+    if layout == LAYOUT_OBJECT:
+        return []
+    return [
+        flatten_record(record, max_depth)
+        for record in iter_records(io.BytesIO(head), layout, partial=True)
+    ]
+
+
+def infer_json_schema(
+    data: bytes, max_depth: int = DEFAULT_MAX_DEPTH, file_name: str = ""
+) -> Tuple[Optional[str], Schema]:
+    """
+    Infer the schema of a JSON records document from its first records.
+
+    Returns:
+        Tuple[Optional[str], Schema]: Layout key (hash of the first record's
+        keys), or None with an empty schema when the layout is not supported.
+    """
+    records = sample_json_records(data, max_depth=max_depth, file_name=file_name)
+    if not records:
+        return None, Schema()
+    layout_key = _layout_key("json", tuple(records[0]))
+    schema = _cache_get(layout_key)
+    if schema is None:
+        schema = infer_frame_schema(pd.DataFrame.from_records(records))
+        _cache_put(layout_key, schema)
+    return layout_key, schema
+
+
+def apply_schema(df: pd.DataFrame, schema: Schema) -> pd.DataFrame:
+    """
+    Cast loaded columns to the schema's types where the data allows it.
+
+    Columns whose values do not fit the sampled type keep their loaded dtype.
+    """
+    for col, dtype in schema.dtypes.items():
+        # The loader already infers exact int/bool columns; casting floats to
+        # int here would truncate values
+        if dtype in ("int64", "bool"):
+            continue
+        if col in df.columns and str(df[col].dtype) != dtype:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+    for col in schema.dates:
+        if col in df.columns:
+            try:
+                df[col] = pd.to_datetime(df[col], format="ISO8601")
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def read_json_with_schema(
+    data: bytes, max_depth: int = DEFAULT_MAX_DEPTH, file_name: str = ""
+) -> pd.DataFrame:
+    """
+    Stream a JSON array or JSON Lines file and apply its sampled schema.
+
+    Args:
+        data: Raw JSON content.
+        max_depth: Nesting levels of objects to flatten into columns.
+        file_name: Name of the file, used to recognize JSON Lines.
+
+    Returns:
+        pd.DataFrame: Loaded DataFrame.
+    """
+    layout_key, schema = infer_json_schema(data, max_depth, file_name)
+    df = read_json_stream(io.BytesIO(data), max_depth=max_depth, file_name=file_name)
+    if layout_key is None:
+        return df
+    return apply_schema(df, schema)
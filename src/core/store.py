@@ -0,0 +1,232 @@
+"""
+Process-wide dataset store for the Data Analyst Agent.
+
+Sessions hold lightweight handles to datasets instead of private DataFrame copies.
+Datasets are keyed by content hash, so every session that loads the same file
+shares a single read-only copy in memory.
+"""
+
+import hashlib
+import os
+import threading
+import weakref
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Compute the content hash used as a dataset key for raw file bytes.
+
+    Args:
+        data: Raw file content.
+
+    Returns:
+        str: Hex digest identifying the content.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """
+    Compute the content hash used as a dataset key for an in-memory DataFrame.
+
+    Args:
+        df: pandas DataFrame
+
+    Returns:
+        str: Hex digest covering column names, dtypes and row values.
+    """
+    digest = hashlib.sha256()
+    schema = [(str(col), str(dtype)) for col, dtype in df.dtypes.items()]
+    digest.update(repr(schema).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuild a DataFrame on top of read-only numpy buffers.
+
+    Any in-place write into the shared frame raises ``ValueError`` instead of
+    silently changing the data seen by other sessions.
+    """
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy()
+            # Buffers that are already read-only (e.g. memory-mapped snapshots)
+            # are shared as-is; anything writable is copied once.
+            if values.flags.writeable:
+                values = values.copy()
+                values.flags.writeable = False
+            series = pd.Series(values, index=df.index, name=name, copy=False)
+        columns[name] = series
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+class _Entry:
+    """Shared frame plus its reference count."""
+
+    __slots__ = ("frame", "refs")
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.refs = 0
+
+
+class DatasetHandle:
+    """
+    Session-owned reference to a dataset held by a DatasetStore.
+
+    The handle is released explicitly with ``release()`` or automatically when
+    it is garbage collected (e.g. when a Streamlit session goes away).
+    """
+
+    def __init__(self, store: "DatasetStore", key: str) -> None:
+        self._store = store
+        self._key = key
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    @property
+    def key(self) -> str:
+        """Content hash of the dataset."""
+        return self._key
+
+    @property
+    def released(self) -> bool:
+        """Whether the handle no longer holds a reference."""
+        return not self._finalizer.alive
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Return a zero-copy view of the shared dataset.
+
+        Adding or replacing columns only affects the returned view; in-place
+        writes into existing values are rejected. Use ``mutable()`` when the
+        data itself needs to change.
+        """
+        if self.released:
+            raise ValueError("Dataset handle has already been released.")
+        return self._store._frame(self._key).copy(deep=False)
+
+    def mutable(self) -> pd.DataFrame:
+        """Return a private, writable copy of the dataset (copy-on-write)."""
+        if self.released:
+            raise ValueError("Dataset handle has already been released.")
+        return self._store._frame(self._key).copy(deep=True)
+
+    def release(self) -> None:
+        """Drop this handle's reference. Safe to call more than once."""
+        self._finalizer()
+
+    def __enter__(self) -> "DatasetHandle":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+
+class DatasetStore:
+    """
+    Reference-counted, content-addressed store of read-only DataFrames.
+
+    A dataset stays in memory while at least one handle references it and is
+    dropped as soon as the last handle is released.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def acquire(self, key: str, loader: Callable[[], pd.DataFrame]) -> DatasetHandle:
+        """
+        Get a handle to the dataset stored under ``key``, loading it if needed.
+
+        Args:
+            key: Content hash identifying the dataset.
+            loader: Called to build the DataFrame when the key is not stored yet.
+
+        Returns:
+            DatasetHandle: New handle referencing the shared dataset.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refs += 1
+                return DatasetHandle(self, key)
+
+        # Load outside the lock so slow parses don't block other sessions.
+        frame = _freeze(loader())
+
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry(frame))
+            entry.refs += 1
+            return DatasetHandle(self, key)
+
+    def acquire_frame(self, df: pd.DataFrame) -> DatasetHandle:
+        """Store an already loaded DataFrame, keyed by its content."""
+        return self.acquire(hash_dataframe(df), lambda: df)
+
+    def acquire_file(
+        self,
+        path: Union[str, os.PathLike],
+        reader: Callable[..., pd.DataFrame] = pd.read_csv,
+    ) -> DatasetHandle:
+        """
+        Store the dataset read from ``path``, keyed by the file's bytes.
+
+        The file is hashed first, so a dataset that is already stored is never
+        parsed again.
+        """
+        with open(path, "rb") as file:
+            key = hash_bytes(file.read())
+        return self.acquire(key, lambda: reader(path))
+
+    def refcount(self, key: str) -> int:
+        """Number of live handles for ``key`` (0 when not stored)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refs if entry is not None else 0
+
+    def keys(self) -> List[str]:
+        """Keys of the datasets currently held in memory."""
+        with self._lock:
+            return list(self._entries)
+
+    def _frame(self, key: str) -> pd.DataFrame:
+        with self._lock:
+            return self._entries[key].frame
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                del self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_default_store: Optional[DatasetStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_dataset_store() -> DatasetStore:
+    """Return the process-wide DatasetStore shared by all sessions."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DatasetStore()
+        return _default_store
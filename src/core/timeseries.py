@@ -0,0 +1,394 @@
+"""
+Time-series analysis for the Data Analyst Agent.
+
+Datetime columns are detected once, and a ``TimeIndex`` holding the rows in
+time order and their period codes is built once per (dataset, column) and
+cached. "Trend", "by month", "rolling average" and "growth" intents are then
+answered with vectorized kernels over the sorted rows (run-length reductions
+per period, cumulative-sum rolling windows, shifted differences), without
+re-parsing or re-sorting dates.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.results import AnalysisResult, ResultTable
+
+# Period codes: day, week, month, quarter, year
+PERIOD_NAMES = {"D": "day", "W": "week", "M": "month", "Q": "quarter", "Y": "year"}
+# Text columns are treated as dates when this many sampled values all parse
+DATE_SAMPLE_ROWS = 50
+# Periods listed in an answer (the most recent ones)
+MAX_PERIODS_SHOWN = 24
+# Groups of a grouped time series ("monthly sales per region") listed at most
+MAX_TIME_SERIES_GROUPS = 12
+DEFAULT_WINDOW = 3
+TIME_INDEX_ENTRIES = 32
+
+
+def _parses_as_dates(series: pd.Series) -> bool:
+    sample = series.dropna().head(DATE_SAMPLE_ROWS)
+    if sample.empty or not all(isinstance(value, str) for value in sample):
+        return False
+    try:
+        pd.to_datetime(sample, format="ISO8601")
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def datetime_columns(df: Any) -> List[Any]:
+    """
+    Columns holding dates: datetime dtypes, or text whose sampled values all
+    parse as ISO dates. Empty for datasets of other engines.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return []
+    columns = []
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            columns.append(col)
+        elif (
+            pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+        ) and _parses_as_dates(df[col]):
+            columns.append(col)
+    return columns
+
+
+def auto_period(start: pd.Timestamp, end: pd.Timestamp) -> str:
+    """Period giving a readable number of points for a time span."""
+    days = (end - start).days
+    if days > 3 * 365:
+        return "Y"
+    if days > 2 * 365:
+        return "Q"
+    if days > 90:
+        return "M"
+    if days > 31:
+        return "W"
+    return "D"
+
+
+def _label(period: pd.Period) -> str:
+    if period.freqstr.startswith("W"):
+        return period.start_time.strftime("%Y-%m-%d")
+    return str(period)
+
+
+class TimeIndex:
+    """
+    Rows of a dataset in time order, with period codes computed on demand.
+
+    Attributes:
+        column: Datetime column the index is built on.
+        order: Positions of the rows with a date, sorted by date.
+        times: Their dates, sorted.
+    """
+
+    __slots__ = ("column", "order", "times", "_bins", "_lock")
+
+    def __init__(self, column: Any, order: np.ndarray, times: pd.DatetimeIndex) -> None:
+        self.column = column
+        self.order = order
+        self.times = times
+        self._bins: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, column: Any) -> "TimeIndex":
+        values = df[column]
+        if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+            values = pd.to_datetime(values, errors="coerce", format="ISO8601")
+        if getattr(values.dt, "tz", None) is not None:
+            values = values.dt.tz_localize(None)
+        valid = np.flatnonzero(values.notna().to_numpy())
+        stamps = values.to_numpy(dtype="datetime64[ns]")[valid]
+        order = np.argsort(stamps, kind="stable")
+        return cls(column, valid[order], pd.DatetimeIndex(stamps[order]))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def bins(self, period: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Runs of sorted rows falling in the same period.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Start offset of each run in the
+            sorted rows, and the run's period ordinal.
+        """
+        with self._lock:
+            cached = self._bins.get(period)
+        if cached is not None:
+            return cached
+        codes = self.times.to_period(period).asi8
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        result = (starts, codes[starts])
+        with self._lock:
+            self._bins[period] = result
+        return result
+
+    def resample(
+        self,
+        values: Optional[np.ndarray],
+        mask: Optional[np.ndarray],
+        period: str,
+    ) -> Tuple[pd.PeriodIndex, np.ndarray, np.ndarray]:
+        """
+        Per-period sums and counts over every period of the time span.
+
+        Args:
+            values: Numeric values aligned with the dataset rows (None to
+                count rows).
+            mask: Rows to include, aligned with the dataset rows.
+            period: Period code (see ``PERIOD_NAMES``).
+
+        Returns:
+            Tuple[pd.PeriodIndex, np.ndarray, np.ndarray]: Periods, sums and
+            counts of non-null values. Periods without rows have zero counts.
+        """
+        starts, codes = self.bins(period)
+        include = np.ones(len(self.order), dtype=bool) if mask is None else mask[self.order]
+        if values is None:
+            present = include
+            amounts = include.astype("float64")
+        else:
+            ordered = values[self.order]
+            present = include & ~np.isnan(ordered)
+            amounts = np.where(present, ordered, 0.0)
+        first = int(codes[0])
+        size = int(codes[-1]) - first + 1
+        sums = np.zeros(size)
+        counts = np.zeros(size, dtype="int64")
+        sums[codes - first] = np.add.reduceat(amounts, starts)
+        counts[codes - first] = np.add.reduceat(present.astype("int64"), starts)
+        periods = pd.period_range(pd.Period(ordinal=first, freq=period), periods=size)
+        return periods, sums, counts
+
+
+def rolling_mean(series: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over ``window`` points with a cumulative-sum kernel.
+    NaN points are skipped; the first points average what is available.
+    """
+    present = ~np.isnan(series)
+    totals = np.concatenate(([0.0], np.cumsum(np.where(present, series, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    lower = np.maximum(np.arange(1, len(series) + 1) - window, 0)
+    upper = np.arange(1, len(series) + 1)
+    in_window = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(in_window > 0, (totals[upper] - totals[lower]) / in_window, np.nan)
+
+
+def growth_rates(series: np.ndarray) -> np.ndarray:
+    """Change from the previous point, in percent (NaN where undefined)."""
+    previous = series[:-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = (series[1:] - previous) / np.abs(previous) * 100
+    rates[~np.isfinite(rates)] = np.nan
+    return np.concatenate(([np.nan], rates))
+
+
+class TimeIndexCache:
+    """Thread-safe LRU of time indexes keyed by (dataset, column)."""
+
+    def __init__(self, max_entries: int = TIME_INDEX_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, TimeIndex]" = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, dataset_key: str, df: pd.DataFrame, column: Any) -> TimeIndex:
+        """The time index of ``column``, built on first use ("" disables caching)."""
+        key = (dataset_key, column)
+        if dataset_key:
+            with self._lock:
+                index = self._entries.get(key)
+                if index is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return index
+                self.misses += 1
+        index = TimeIndex.build(df, column)
+        if dataset_key:
+            with self._lock:
+                self._entries[key] = index
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _period_lines(
+    periods: pd.PeriodIndex,
+    series: np.ndarray,
+    shown: np.ndarray,
+    fmt: str,
+    unit: str,
+) -> str:
+    """The last periods of ``shown``, and the overall change of ``series``."""
+    result = ""
+    if len(periods) > MAX_PERIODS_SHOWN:
+        result += f"(last {MAX_PERIODS_SHOWN} of {len(periods)} {unit}s)\n"
+    for position in range(max(len(periods) - MAX_PERIODS_SHOWN, 0), len(periods)):
+        value = shown[position]
+        text = fmt.format(value) if not np.isnan(value) else "n/a"
+        result += f"- {_label(periods[position])}: {text}\n"
+
+    points = np.flatnonzero(~np.isnan(series))
+    if len(points) >= 2:
+        start, end = series[points[0]], series[points[-1]]
+        if start != 0:
+            change = (end - start) / abs(start) * 100
+            direction = "up" if change > 0 else "down" if change < 0 else "flat"
+            result += (
+                f"Overall: {direction} {abs(change):.1f}% from "
+                f"{_label(periods[points[0]])} to {_label(periods[points[-1]])}\n"
+            )
+    return result
+
+
+def time_series_result(
+    df: pd.DataFrame,
+    intent: Any,
+    mask: Optional[np.ndarray] = None,
+    dataset_key: str = "",
+    cache: Optional[TimeIndexCache] = None,
+) -> AnalysisResult:
+    """
+    Answer a time-series intent (``intent.time_column`` set) as a structured
+    result: the text answer as its summary, and the listed periods' values
+    in one table per group.
+
+    With ``intent.group_by``, each group is resampled on its own rows and
+    listed separately, up to ``MAX_TIME_SERIES_GROUPS`` groups.
+
+    Args:
+        df: Dataset.
+        intent: core.intents.Intent with ``time_column``, ``period``,
+            ``window`` and ``growth``.
+        mask: Rows selected by the intent's filters, if any.
+        dataset_key: Content hash of ``df``, enabling reuse of the time index.
+        cache: Time index cache (the process-wide one if None).
+
+    Returns:
+        AnalysisResult: The answer; its text is in English.
+    """
+    cache = cache if cache is not None else get_time_index_cache()
+    index = cache.get(dataset_key, df, intent.time_column)
+    if len(index) == 0:
+        return AnalysisResult.from_text(f"No dates found in {intent.time_column}.")
+    period = intent.period or auto_period(index.times[0], index.times[-1])
+    counting = intent.operation == "count" or intent.column is None
+    values = None if counting else df[intent.column].to_numpy(dtype="float64", na_value=np.nan)
+
+    # Rows of each group, or all selected rows
+    selections: List[Tuple[Optional[str], Optional[np.ndarray]]] = [(None, mask)]
+    if intent.group_by is not None:
+        labels = df[intent.group_by]
+        if mask is not None:
+            labels = labels[mask]
+        groups = sorted(labels.dropna().unique(), key=str)
+        if len(groups) > MAX_TIME_SERIES_GROUPS:
+            return AnalysisResult.from_text(
+                f"{intent.group_by} has {len(groups)} values, too many to list a "
+                f"time series for each (at most {MAX_TIME_SERIES_GROUPS}). "
+                f"Ask about some {intent.group_by} values, or without grouping."
+            )
+        codes = df[intent.group_by].to_numpy()
+        selections = [
+            (str(group), (codes == group) if mask is None else mask & (codes == group))
+            for group in groups
+        ]
+
+    if counting:
+        measure = "Records"
+    elif intent.operation == "mean":
+        measure = f"Average {intent.column}"
+    else:
+        measure = f"Total {intent.column}"
+    unit = PERIOD_NAMES[period]
+    if intent.window:
+        title = f"{intent.window}-{unit} rolling average of {measure.lower()}"
+        fmt, heading = "{:.2f}", f"{measure} ({intent.window}-{unit} average)"
+    elif intent.growth:
+        title = f"{measure} growth by {unit}"
+        fmt, heading = "{:+.1f}%", f"{measure} growth (%)"
+    else:
+        title = f"{measure} by {unit}"
+        fmt, heading = ("{:.0f}" if counting else "{:.2f}"), measure
+    value_unit = "count" if counting and not (intent.window or intent.growth) else "number"
+    if intent.group_by is not None:
+        title += f" per {intent.group_by}"
+    described = intent.describe_filters()
+    suffix = f" ({described})" if described else ""
+
+    result = f"{title}{suffix}:\n"
+    tables = []
+    for group, rows in selections:
+        periods, sums, counts = index.resample(values, rows, period)
+        if counting:
+            series = counts.astype("float64")
+        elif intent.operation == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                series = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        else:
+            series = sums
+        if intent.window:
+            shown = rolling_mean(series, intent.window)
+        elif intent.growth:
+            shown = growth_rates(series)
+        else:
+            shown = series
+        if group is not None:
+            result += f"{group}:\n"
+        result += _period_lines(periods, series, shown, fmt, unit)
+        table = ResultTable(
+            f"{title}{suffix}" if group is None else f"{title}{suffix}: {group}",
+            (unit, heading),
+            unit=value_unit,
+        )
+        for position in range(max(len(periods) - MAX_PERIODS_SHOWN, 0), len(periods)):
+            table.add(_label(periods[position]), shown[position])
+        tables.append(table)
+    return AnalysisResult(result, tables)
+
+
+def answer_time_series(
+    df: pd.DataFrame,
+    intent: Any,
+    mask: Optional[np.ndarray] = None,
+    dataset_key: str = "",
+    cache: Optional[TimeIndexCache] = None,
+) -> str:
+    """
+    Answer a time-series intent (see ``time_series_result``).
+
+    Returns:
+        str: Textual answer in English.
+    """
+    return time_series_result(df, intent, mask, dataset_key, cache).text
+
+
+_default_cache: Optional[TimeIndexCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_time_index_cache() -> TimeIndexCache:
+    """Return the process-wide TimeIndexCache."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TimeIndexCache()
+        return _default_cache
@@ -4,16 +4,55 @@ File upload and validation module for the Data Analyst Agent.
 
 import pandas as pd
 import io
-from typing import Union, Any
+import os
+from typing import Union, Any, Optional
 from pathlib import Path
 
+from utils.uploads import MAX_FILE_SIZE_MB, MAX_ROWS, validate_upload_bytes
 
-def validate_file_upload(uploaded_file: Union[str, io.StringIO, Any]) -> pd.DataFrame:
+from core.excel import ExcelWorkbook
+from core.json_stream import DEFAULT_MAX_DEPTH
+from core.schema import read_csv_with_schema, read_json_with_schema
+
+
+def _read_bytes(uploaded_file: Union[str, io.StringIO, Any]) -> bytes:
+    """
+    Read the raw content of a path or file-like upload.
+    
+    Args:
+        uploaded_file: Path or file object (text or binary)
+        
+    Returns:
+        bytes: File content
+    """
+    if isinstance(uploaded_file, str):
+        with open(uploaded_file, "rb") as file:
+            return file.read()
+    if hasattr(uploaded_file, "getvalue"):
+        content = uploaded_file.getvalue()
+    else:
+        if hasattr(uploaded_file, "seek"):
+            uploaded_file.seek(0)
+        content = uploaded_file.read()
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+def validate_file_upload(
+    uploaded_file: Union[str, io.StringIO, Any],
+    sheet_name: Optional[str] = None,
+    json_max_depth: int = DEFAULT_MAX_DEPTH,
+    max_rows: Optional[int] = MAX_ROWS,
+    max_size_mb: float = MAX_FILE_SIZE_MB
+) -> pd.DataFrame:
     """
     Validate and load an uploaded file into a pandas DataFrame.
     
     Args:
         uploaded_file: File object or path to validate and load
+        sheet_name: Excel sheet to load (defaults to the first sheet)
+        json_max_depth: Nesting levels of JSON objects flattened into columns
+        max_rows: Largest accepted number of rows (None for no limit)
+        max_size_mb: Largest accepted file size in MB
         
     Returns:
         pd.DataFrame: Loaded and validated DataFrame
@@ -31,29 +70,30 @@ def validate_file_upload(uploaded_file: Union[str, io.StringIO, Any]) -> pd.Data
         else:
             file_name = "unknown"
         
+        # Cheap byte-level checks (size, magic bytes, encoding, row estimate)
+        # reject bad files before any parsing starts
+        if isinstance(uploaded_file, str) and os.path.getsize(uploaded_file) > max_size_mb * 1024 * 1024:
+            raise ValueError(f"File too large. Maximum upload size is {max_size_mb:g} MB.")
+        data = _read_bytes(uploaded_file)
+        check = validate_upload_bytes(data, file_name, max_size_mb, max_rows)
+        if check.encoding not in (None, "utf-8"):
+            data = data.decode(check.encoding).encode("utf-8")
+        
         # Load based on file extension
         if file_name.endswith('.csv'):
-            if isinstance(uploaded_file, str):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_csv(uploaded_file)
+            # Sampled schema pre-pass, then one typed parse
+            df = read_csv_with_schema(data)
         elif file_name.endswith(('.xlsx', '.xls')):
-            if isinstance(uploaded_file, str):
-                df = pd.read_excel(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-        elif file_name.endswith('.json'):
-            if isinstance(uploaded_file, str):
-                df = pd.read_json(uploaded_file)
-            else:
-                df = pd.read_json(uploaded_file)
+            # Only the requested sheet is parsed, with the fastest engine
+            # installed
+            df = ExcelWorkbook(data, file_name).load(sheet_name)
+        elif file_name.endswith(('.json', '.jsonl', '.ndjson')):
+            # Arrays and JSON Lines are streamed into columnar buffers
+            df = read_json_with_schema(data, json_max_depth, file_name)
         elif file_name.endswith('.parquet'):
-            if isinstance(uploaded_file, str):
-                df = pd.read_parquet(uploaded_file)
-            else:
-                df = pd.read_parquet(uploaded_file)
+            df = pd.read_parquet(io.BytesIO(data))
         else:
-            raise ValueError("Unsupported file format. Please upload CSV, Excel, JSON, or Parquet files.")
+            raise ValueError("Unsupported file format. Please upload CSV, Excel, JSON (or JSON Lines), or Parquet files.")
         
         # Basic validation
         if df.empty:
@@ -63,8 +103,8 @@ def validate_file_upload(uploaded_file: Union[str, io.StringIO, Any]) -> pd.Data
             raise ValueError("The uploaded file has no columns.")
         
         # Limit file size (approximate)
-        if len(df) > 10000:
-            raise ValueError("File too large. Please upload files with fewer than 10,000 rows.")
+        if max_rows is not None and len(df) > max_rows:
+            raise ValueError(f"File too large. Please upload files with fewer than {max_rows:,} rows.")
         
         return df
         
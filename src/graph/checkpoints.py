@@ -0,0 +1,62 @@
+"""
+Bounded in-memory conversation checkpoints.
+
+LangGraph's ``MemorySaver`` keeps every checkpoint of every thread for the
+life of the process: several per question, each with the whole history and
+answer. Conversations only ever resume from their latest checkpoint, so
+``BoundedMemorySaver`` drops older ones as soon as a new one is saved and
+forgets the least recently used conversations beyond ``max_threads``.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from langgraph.checkpoint.memory import MemorySaver
+
+# Conversations kept in memory; older ones start over on their next question
+MAX_CONVERSATIONS = 256
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver keeping the latest checkpoint of the ``max_threads`` most
+    recently used threads.
+    """
+
+    def __init__(self, max_threads: int = MAX_CONVERSATIONS) -> None:
+        super().__init__()
+        self._max_threads = max_threads
+        self._threads: "OrderedDict[str, None]" = OrderedDict()
+        self._prune_lock = threading.RLock()
+
+    def put(self, config: Any, checkpoint: Any, metadata: Any, new_versions: Any) -> Any:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        namespace = config["configurable"]["checkpoint_ns"]
+        with self._prune_lock:
+            checkpoints = self.storage[thread_id][namespace]
+            for checkpoint_id in [key for key in checkpoints if key != checkpoint["id"]]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, namespace, checkpoint_id), None)
+            # Channel values not at the version the latest checkpoint reads
+            versions = checkpoint["channel_versions"]
+            stale = [
+                key for key in self.blobs
+                if key[:2] == (thread_id, namespace) and versions.get(key[2]) != key[3]
+            ]
+            for key in stale:
+                del self.blobs[key]
+
+            self._threads[thread_id] = None
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self._max_threads:
+                oldest, _ = self._threads.popitem(last=False)
+                self.delete_thread(oldest)
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Forget a conversation, e.g. when its session ends."""
+        with self._prune_lock:
+            self._threads.pop(thread_id, None)
+            super().delete_thread(thread_id)
@@ -1,6 +1,16 @@
-from typing import Dict, Any, TypedDict
+import os
+import threading
+import warnings
+from typing import Dict, Any, List, Optional, TypedDict
 from langgraph.graph import StateGraph, END, START
-from graph.nos import interpreter, run_dataframe_analysis_node
+from graph.nos import (
+    approximate_analysis_node,
+    chart_node,
+    interpreter,
+    normalize_node,
+    run_dataframe_analysis_node,
+    with_deadline,
+)
 import pandas as pd
 
 
@@ -13,39 +23,135 @@ class GraphState(TypedDict):
     chart_base64: Any  # str or None
     status: str
     message: str
+    profile: Any  # DatasetProfile or None
+    dataset_key: str  # content hash of df, used for answer caching
+    intent: Dict[str, Any]  # Intent.to_dict() of the current question
+    history: List[Dict[str, Any]]  # previous turns: question, dataset_key, intent
+    canonical_key: str  # wording-independent key of the question, used for caching
+    datasets: Dict[str, Any]  # related DataFrames by name, joined to df on shared keys
+    dataset_keys: Dict[str, str]  # content hashes of the related datasets
+    result: Optional[Dict[str, Any]]  # AnalysisResult.to_dict() of the answer (see core.results)
 
 
-def end_node(state: GraphState) -> GraphState:
+def end_node(state: GraphState) -> Dict[str, Any]:
     """
     Node that returns a generic message when the question is not understood or not related to data analysis.
     """
     return {
-        **state,
         "text_answer": "Sorry, I cannot answer this type of question at the moment.",
         "chart_base64": None,
+        "result": None,
         "status": "end",
         "message": "The question was not related to data analysis."
     }
 
 
-def build_graph():
+def make_checkpointer(path: Optional[str] = None) -> Any:
+    """
+    Creates the checkpointer that keeps conversation state between questions.
+
+    Args:
+        path: SQLite database file for conversations that survive restarts
+            (needs the optional ``langgraph-checkpoint-sqlite`` package).
+            In-memory when None, keeping only the latest checkpoint of recent
+            conversations (see graph.checkpoints).
+
+    Returns:
+        A LangGraph checkpointer.
+    """
+    if path:
+        try:
+            import sqlite3
+            from langgraph.checkpoint.sqlite import SqliteSaver
+            return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+        except ImportError:
+            warnings.warn(
+                "langgraph-checkpoint-sqlite is not installed; "
+                "conversations are kept in memory only."
+            )
+    from graph.checkpoints import BoundedMemorySaver
+    return BoundedMemorySaver()
+
+
+def build_graph(checkpointer: Optional[Any] = None) -> Any:
     """
     Builds and returns the LangGraph execution graph with interpreter, analysis, and end nodes.
     The input is a dictionary with optional 'df' (DataFrame) and 'question' (string).
+
+    The analysis runs in stages (approximate answer, exact answer, chart), so
+    ``graph.stream(state, stream_mode="updates")`` yields progressively better
+    results; ``invoke`` returns the final state as before. Nodes return only
+    the keys they change, and the answer is also kept as plain data in
+    "result" (see core.results).
+
+    With a ``checkpointer``, state is kept per ``thread_id`` so follow-up
+    questions build on earlier ones. Only plain data is checkpointed: pass the
+    DataFrame and profile in ``config["configurable"]`` ("df", "profile")
+    rather than in the state. Answers are cached in the process-wide answer
+    cache, or in ``config["configurable"]["answer_cache"]`` when given.
+
+    Runs stop early when the ``core.cancellation.CancelToken`` passed in
+    ``config["configurable"]["cancel_token"]`` is cancelled or expires, or a
+    node runs past "node_timeout" seconds, ending with status "cancelled" or
+    "timeout".
+
+    Related datasets passed in "datasets" (name -> DataFrame) are joined to
+    the DataFrame on shared key columns, so questions can combine their
+    columns (see core.joins).
     """
     # Define the state schema
     graph = StateGraph(GraphState)
 
     # Register nodes
-    graph.add_node("interpreter", interpreter)
-    graph.add_node("run_dataframe_analysis_node", run_dataframe_analysis_node)
+    graph.add_node("interpreter", with_deadline(interpreter))
+    graph.add_node("normalize_node", with_deadline(normalize_node))
+    graph.add_node("approximate_analysis_node", with_deadline(approximate_analysis_node))
+    graph.add_node("run_dataframe_analysis_node", with_deadline(run_dataframe_analysis_node))
+    graph.add_node("chart_node", with_deadline(chart_node))
     graph.add_node("end_node", end_node)
 
     # For portfolio purposes, we'll use a simplified approach
     # In a real implementation, you would use proper conditional routing
     graph.add_edge(START, "interpreter")
-    graph.add_edge("interpreter", "run_dataframe_analysis_node")
-    graph.add_edge("run_dataframe_analysis_node", END)
+    graph.add_edge("interpreter", "normalize_node")
+    graph.add_edge("normalize_node", "approximate_analysis_node")
+    graph.add_edge("approximate_analysis_node", "run_dataframe_analysis_node")
+    graph.add_edge("run_dataframe_analysis_node", "chart_node")
+    graph.add_edge("chart_node", END)
     graph.add_edge("end_node", END)
 
-    return graph.compile() 
\ No newline at end of file
+    return graph.compile(checkpointer=checkpointer)
+
+
+_compiled_graph: Optional[Any] = None
+_compiled_graph_lock = threading.Lock()
+
+
+def get_graph() -> Any:
+    """
+    Returns the process-wide compiled graph, building it on first use.
+    Compiled graphs are stateless between invocations, so one instance can
+    serve every request instead of recompiling per question.
+    """
+    global _compiled_graph
+    with _compiled_graph_lock:
+        if _compiled_graph is None:
+            _compiled_graph = build_graph()
+        return _compiled_graph
+
+
+_conversation_graph: Optional[Any] = None
+
+
+def get_conversation_graph() -> Any:
+    """
+    Returns the process-wide compiled graph with conversation memory.
+    Conversations are kept in memory, or in the SQLite file named by the
+    ``CONVERSATION_DB`` environment variable.
+    """
+    global _conversation_graph
+    with _compiled_graph_lock:
+        if _conversation_graph is None:
+            checkpointer = make_checkpointer(os.environ.get("CONVERSATION_DB"))
+            _conversation_graph = build_graph(checkpointer=checkpointer)
+        return _conversation_graph
@@ -1,6 +1,30 @@
-from typing import Dict, Any, TypedDict
+import functools
+from typing import Callable, Dict, Any, List, Optional, TypedDict
 import pandas as pd
-from core.analysis import run_dataframe_analysis
+from langchain_core.runnables import RunnableConfig
+from core.analysis import estimate_dataframe_analysis
+from core.answer_cache import AnyAnswerCache, get_answer_cache
+from core.cancellation import AnalysisInterrupted, CancelToken, use_token
+from core.charts import render_chart, wants_chart
+from core.conversation import MAX_HISTORY, answer_key, question_result
+from core.governor import (
+    ChunkedDataset,
+    MemoryBudgetExceeded,
+    chunkable,
+    estimate_working_set,
+    get_memory_governor,
+    row_bytes,
+)
+from core.intents import Intent, is_follow_up, normalize_text, parse_intent, question_key
+from core.joins import JoinedDataset, join_datasets
+from core.results import AnalysisResult
+
+# Queueing for memory longer than this is reported in the status message
+QUEUED_NOTICE_SECONDS = 0.5
+# Deadline of each node, unless config["configurable"]["node_timeout"] says otherwise
+NODE_TIMEOUT_SECONDS = 30.0
+# Statuses of runs stopped early; later nodes pass the state through
+INTERRUPTED_STATUSES = ("cancelled", "timeout")
 
 
 class GraphState(TypedDict):
@@ -12,9 +36,94 @@ class GraphState(TypedDict):
     chart_base64: Any  # str or None
     status: str
     message: str
+    profile: Any  # DatasetProfile or None
+    dataset_key: str  # content hash of df, used for answer caching
+    intent: Dict[str, Any]  # Intent.to_dict() of the current question
+    history: List[Dict[str, Any]]  # previous turns: question, dataset_key, intent
+    canonical_key: str  # wording-independent key of the question, used for caching
+    datasets: Dict[str, Any]  # related DataFrames by name, joined to df on shared keys
+    dataset_keys: Dict[str, str]  # content hashes of the related datasets
+    result: Optional[Dict[str, Any]]  # AnalysisResult.to_dict() of the answer (see core.results)
 
 
-def interpreter(state: GraphState) -> GraphState:
+def _frame(state: GraphState, config: Optional[RunnableConfig]) -> Any:
+    """
+    The dataset to analyze: the DataFrame, joined to the related datasets
+    when there are any (see core.joins).
+    Conversation graphs keep them out of the checkpointed state and pass them
+    in ``config["configurable"]`` ("df", "datasets") instead.
+    """
+    configurable = config.get("configurable", {}) if config is not None else {}
+    df = state.get("df")
+    if df is None:
+        df = configurable.get("df")
+    datasets = state.get("datasets") or configurable.get("datasets")
+    return join_datasets(
+        df, datasets, state.get("dataset_key", ""), state.get("dataset_keys")
+    )
+
+
+def _dataset_key(state: GraphState, df: Any) -> str:
+    """Answer cache key of the dataset, covering every joined dataset."""
+    if isinstance(df, JoinedDataset):
+        return df.key
+    return state.get("dataset_key", "")
+
+
+def _profile(state: GraphState, config: Optional[RunnableConfig]) -> Any:
+    profile = state.get("profile")
+    if profile is None and config is not None:
+        profile = config.get("configurable", {}).get("profile")
+    return profile
+
+
+def _answer_cache(config: Optional[RunnableConfig]) -> AnyAnswerCache:
+    # A run may bring its own answer cache, e.g. to measure without sharing
+    cache = config.get("configurable", {}).get("answer_cache") if config is not None else None
+    return cache if cache is not None else get_answer_cache()
+
+
+def with_deadline(node: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Run a node under its run's cancel token plus a per-node deadline.
+
+    The run's token comes from ``config["configurable"]["cancel_token"]``
+    (see core.cancellation) and the deadline from "node_timeout"
+    (``NODE_TIMEOUT_SECONDS`` by default). A cancelled or expired run ends
+    with status "cancelled" or "timeout", and later nodes leave it as is.
+    """
+    @functools.wraps(node)
+    def run(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        if state.get("status") in INTERRUPTED_STATUSES:
+            return {}
+        configurable = config.get("configurable", {}) if config is not None else {}
+        root = configurable.get("cancel_token") or CancelToken()
+        token = root.child(configurable.get("node_timeout", NODE_TIMEOUT_SECONDS))
+        try:
+            with use_token(token):
+                token.check()
+                return node(state, config)
+        except AnalysisInterrupted as e:
+            return {
+                "text_answer": "",
+                "chart_base64": None,
+                "result": None,
+                "status": e.status,
+                "message": str(e)
+            }
+    return run
+
+
+def _intent(state: GraphState) -> Optional[Intent]:
+    return Intent.from_dict(state["intent"]) if state.get("intent") else None
+
+
+def _cache_key(state: GraphState) -> str:
+    """Answer cache key: the canonical key, or the question when not normalized."""
+    return answer_key(state["question"], state.get("canonical_key", ""))
+
+
+def interpreter(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
     LangGraph interpreter node.
     Decides whether the user's question should be routed to DataFrame analysis
@@ -22,61 +131,244 @@ def interpreter(state: GraphState) -> GraphState:
 
     Args:
         state (GraphState): Current state containing the question.
+        config (RunnableConfig, optional): May carry 'df' and 'profile'.
 
     Returns:
-        GraphState: Updated state with next_node decision.
+        Dict[str, Any]: State update with the next_node decision.
     """
     # Keywords indicating tabular analysis
     keywords = [
         "column", "average", "mean", "graph", "chart", "dataframe", "table",
         "row", "sum", "count", "quantity", "value", "maximum", "minimum"
     ]
-    question_lower = state["question"].lower()
-    if any(word in question_lower for word in keywords):
-        return {**state, "next_node": "run_dataframe_analysis"}
+    question = normalize_text(state["question"])
+    if is_follow_up(question) or any(word in question for word in keywords):
+        return {"next_node": "run_dataframe_analysis"}
     else:
-        return {**state, "next_node": "end"}
+        return {"next_node": "end"}
 
 
-def run_dataframe_analysis_node(state: GraphState) -> GraphState:
+def normalize_node(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """
+    LangGraph node that normalizes the question into a canonical intent.
+    The question is lowercased, stripped of punctuation, its synonyms mapped
+    and its column names resolved against the dataset, relative to the
+    previous turn of the conversation on the same dataset. Downstream caches
+    key on the resulting canonical key, so "average price" and "What is the
+    mean Price?" share one answer.
+
+    Args:
+        state (GraphState): Current state containing the question (and history).
+        config (RunnableConfig, optional): May carry 'df', 'datasets' and 'profile'.
+
+    Returns:
+        Dict[str, Any]: State update with intent, canonical_key and history.
+    """
+    try:
+        df = _frame(state, config)
+    except ValueError:
+        # Datasets that cannot be joined; the analysis node reports it
+        df = None
+    dataset_key = _dataset_key(state, df)
+    history = list(state.get("history") or [])
+    previous = None
+    if history and history[-1].get("dataset_key", "") == dataset_key:
+        previous = Intent.from_dict(history[-1]["intent"])
+    intent = parse_intent(
+        state["question"],
+        df if df is not None else pd.DataFrame(),
+        profile=_profile(state, config) if isinstance(df, pd.DataFrame) else None,
+        previous=previous,
+    )
+    history.append({"question": state["question"], "dataset_key": dataset_key, "intent": intent.to_dict()})
+    return {
+        "intent": intent.to_dict(),
+        "canonical_key": question_key(state["question"], intent),
+        "history": history[-MAX_HISTORY:],
+    }
+
+
+def approximate_analysis_node(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """
+    LangGraph node that emits a quick approximate answer from a row sample.
+    Runs before the exact analysis so streaming clients can show a first
+    insight on large datasets; skipped when the exact answer is cheap
+    (small dataset, cached answer, matching profile, or a filtered,
+    follow-up or time-series question, which the estimate does not understand).
+
+    Args:
+        state (GraphState): State containing 'df' (DataFrame) and 'question' (str).
+        config (RunnableConfig, optional): May carry 'df' and 'profile'.
+
+    Returns:
+        Dict[str, Any]: State update with a 'partial' status and the estimate,
+        or no update.
+    """
+    df = _frame(state, config)
+    if not isinstance(df, pd.DataFrame):
+        # Nothing to sample, or an out-of-core engine answering exactly anyway
+        return {}
+    intent = _intent(state)
+    if intent is not None and (intent.is_sliced or intent.follow_up or intent.time_column):
+        return {}
+    dataset_key = state.get("dataset_key")
+    if dataset_key and _answer_cache(config).contains(dataset_key, _cache_key(state)):
+        return {}
+    profile = _profile(state, config)
+    if profile is not None and profile.rows == len(df):
+        return {}
+    try:
+        estimate = estimate_dataframe_analysis(df, normalize_text(state["question"], df.columns))
+    except Exception:
+        # The exact analysis reports errors; an estimate is optional
+        return {}
+    if estimate is None:
+        return {}
+    return {
+        "text_answer": estimate,
+        "chart_base64": None,
+        "status": "partial",
+        "message": "Approximate answer from a sample; computing exact numbers..."
+    }
+
+
+def run_dataframe_analysis_node(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
     LangGraph node responsible for running the DataFrame analysis.
-    Receives state with DataFrame and question, calls the analysis function,
-    and returns the complete state with answer, chart (if any), status, and message.
+    Receives state with DataFrame, question and optional dataset profile, calls the analysis function,
+    and returns the answer as text and as a structured result (see core.results),
+    chart (if any), status, and message.
+    The analysis runs under the process-wide memory budget (see core.governor):
+    it may queue, run chunked (noted in the message) or be rejected with
+    status "rejected".
 
     Args:
         state (GraphState): State containing 'df' (DataFrame) and 'question' (str).
+        config (RunnableConfig, optional): May carry 'df', 'profile' and
+            'answers' (question -> (answer, chart, result) from core.multiquery).
 
     Returns:
-        GraphState: Complete state with analysis results.
+        Dict[str, Any]: State update with the analysis results.
     """
     try:
-        df = state["df"]
+        df = _frame(state, config)
         question = state["question"]
+        profile = _profile(state, config)
         
         # Handle case where DataFrame is None
         if df is None:
             return {
-                **state,
                 "text_answer": "No data available for analysis. Please upload a file first.",
                 "chart_base64": None,
+                "result": None,
                 "status": "ok",
                 "message": "No data provided."
             }
         
-        answer, chart = run_dataframe_analysis(df, question)
+        dataset_key = _dataset_key(state, df)
+        intent = _intent(state)
+        # Precomputed or repeated questions come straight from the answer cache.
+        # It is keyed on the canonical intent, which already includes what a
+        # follow-up inherited from the conversation
+        cache_key = _cache_key(state)
+        cached = _answer_cache(config).get(dataset_key, cache_key) if dataset_key else None
+        if cached is None and config is not None:
+            # Answers computed for a whole batch of questions at once
+            cached = config.get("configurable", {}).get("answers", {}).get(question)
+        message = "Analysis completed successfully."
+        if cached is not None:
+            answer, chart, *structured = cached
+            if structured and structured[0] is not None:
+                result = AnalysisResult.from_dict(structured[0], chart)
+            else:
+                result = AnalysisResult.from_text(answer, chart)
+        else:
+            # Reserve the working set under the memory budget; analyses that
+            # do not fit run over row chunks instead
+            admission = get_memory_governor().admit(
+                estimate_working_set(df, intent, profile),
+                row_bytes(df, intent),
+                chunkable(df, intent),
+            )
+            with admission:
+                target = df
+                if admission.mode == "chunked":
+                    target = ChunkedDataset(df, admission.chunk_rows)
+                result = question_result(target, question, profile, dataset_key or "", intent)
+            if admission.mode == "chunked":
+                message = (
+                    f"Analysis completed in {target.chunks} chunks "
+                    "to stay within the memory budget."
+                )
+            if admission.waited >= QUEUED_NOTICE_SECONDS:
+                message += f" Queued {admission.waited:.1f}s for memory."
+            if dataset_key:
+                _answer_cache(config).put(
+                    dataset_key, cache_key, (result.text, result.chart, result.to_dict())
+                )
         return {
-            **state,
-            "text_answer": answer,
-            "chart_base64": chart,
+            "text_answer": result.text,
+            "chart_base64": result.chart,
+            "result": result.to_dict(),
             "status": "ok",
-            "message": "Analysis completed successfully."
+            "message": message
+        }
+    except MemoryBudgetExceeded as e:
+        return {
+            "text_answer": "",
+            "chart_base64": None,
+            "result": None,
+            "status": "rejected",
+            "message": str(e)
         }
+    except AnalysisInterrupted:
+        raise
     except Exception as e:
         return {
-            **state,
             "text_answer": "",
             "chart_base64": None,
+            "result": None,
             "status": "error",
             "message": f"Error running analysis: {e}"
-        } 
\ No newline at end of file
+        }
+
+
+def chart_node(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """
+    LangGraph node that draws a chart for questions asking for one.
+    Runs after the exact analysis, so the text answer is already available
+    to streaming clients while the chart renders.
+
+    Args:
+        state (GraphState): State with the analysis results.
+        config (RunnableConfig, optional): May carry 'df' and 'profile'.
+
+    Returns:
+        Dict[str, Any]: State update with 'chart_base64', or no update.
+    """
+    df = _frame(state, config)
+    if (
+        state.get("status") != "ok"
+        or not isinstance(df, pd.DataFrame)
+        or state.get("chart_base64")
+        or not wants_chart(state["question"])
+    ):
+        return {}
+    profile = _profile(state, config)
+    try:
+        with get_memory_governor().admit(estimate_working_set(df, None, profile)):
+            chart = render_chart(df, state["question"], profile=profile)
+    except MemoryBudgetExceeded as e:
+        return {"message": f"Analysis completed, but the chart was skipped: {e}"}
+    except AnalysisInterrupted:
+        raise
+    except Exception as e:
+        return {"message": f"Analysis completed, but the chart failed: {e}"}
+    if chart is None:
+        return {}
+    dataset_key = state.get("dataset_key")
+    if dataset_key:
+        _answer_cache(config).put(
+            dataset_key, _cache_key(state), (state["text_answer"], chart, state.get("result"))
+        )
+    return {"chart_base64": chart}
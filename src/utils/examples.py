@@ -0,0 +1,20 @@
+"""
+Example questions shown in the web app and used as the load-test question mix.
+"""
+
+# Example questions for regular datasets
+EXAMPLE_QUESTIONS = [
+    "What is the average price?",
+    "Which region has the highest sales?",
+    "How many properties have 3 bedrooms?",
+    "What is the total revenue by category?"
+]
+
+# Health insurance demo questions
+INSURANCE_QUESTIONS = [
+    "What is the average charge per region?",
+    "Do smokers pay more than non-smokers?",
+    "Show the relation between BMI and charges",
+    "What is the average charge by age group?",
+    "Which region has the lowest average cost?"
+]
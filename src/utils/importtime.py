@@ -0,0 +1,122 @@
+"""
+Import-time diagnostics.
+
+Runs ``python -X importtime`` in a fresh interpreter and summarizes the
+report, so cold-start regressions can be traced to the package responsible.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Modules behind the app, API and batch entry points
+DEFAULT_MODULES = (
+    "core.upload",
+    "core.store",
+    "core.prefetch",
+    "graph.grafo",
+    "api.server",
+    "core.batch",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+class ImportRecord(NamedTuple):
+    """One line of an ``-X importtime`` report (times in microseconds)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class ImportReport(NamedTuple):
+    """Summary of the imports triggered by one module."""
+
+    module: str
+    total_ms: float
+    by_package: List[Tuple[str, float]]
+    slowest: List[ImportRecord]
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse the stderr of ``python -X importtime``."""
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(
+                ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+    return records
+
+
+def summarize(
+    module: str, records: Sequence[ImportRecord], top: int = 10
+) -> ImportReport:
+    """
+    Group import time by top-level package.
+
+    Args:
+        module: Module whose import produced ``records``.
+        records: Parsed report lines.
+        top: Number of packages and modules to keep.
+
+    Returns:
+        ImportReport: Total time, self time per package and slowest modules.
+    """
+    by_package: Dict[str, int] = defaultdict(int)
+    for record in records:
+        by_package[record.module.split(".")[0]] += record.self_us
+    total_us = sum(record.self_us for record in records)
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+    slowest = sorted(records, key=lambda record: record.self_us, reverse=True)
+    return ImportReport(
+        module,
+        total_us / 1000,
+        [(name, us / 1000) for name, us in packages[:top]],
+        slowest[:top],
+    )
+
+
+def measure(
+    module: str, src_dir: Optional[str] = None, top: int = 10
+) -> ImportReport:
+    """
+    Import ``module`` in a fresh interpreter and summarize its import time.
+
+    Args:
+        module: Dotted module name, importable from ``src_dir``.
+        src_dir: Directory added to the front of ``sys.path``.
+        top: Number of packages and modules to keep.
+
+    Returns:
+        ImportReport: Summary of the imports triggered by ``module``.
+    """
+    env = dict(os.environ)
+    if src_dir:
+        env["PYTHONPATH"] = os.pathsep.join(
+            path for path in (src_dir, env.get("PYTHONPATH")) if path
+        )
+    records = _run_importtime(f"import {module}", env)
+    # Interpreter startup imports are the same for every module; leave them out
+    startup = {record.module for record in _run_importtime("pass", env)}
+    records = [record for record in records if record.module not in startup]
+    return summarize(module, records, top)
+
+
+def _run_importtime(code: str, env: Dict[str, str]) -> List[ImportRecord]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Running {code!r} failed:\n{completed.stderr}")
+    return parse_importtime(completed.stderr)
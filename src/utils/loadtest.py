@@ -0,0 +1,407 @@
+"""
+Load generation for capacity planning.
+
+Simulated analysts ask questions concurrently, either through the analysis
+graph in-process (what one Streamlit server does) or through the HTTP API.
+Each run records every request's latency and status plus periodic samples of
+progress and, when the analysis runs in this process, its memory and CPU. The
+report is JSON-serializable: throughput, latency percentiles, errors by status
+and a timeline. HTTP runs leave memory and CPU out, as this process is only
+the client; watch the server's own process for those.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.examples import EXAMPLE_QUESTIONS, INSURANCE_QUESTIONS
+
+DEFAULT_QUESTIONS = tuple(INSURANCE_QUESTIONS) + tuple(EXAMPLE_QUESTIONS)
+PERCENTILES = (50, 90, 95, 99)
+SAMPLE_SECONDS = 0.5
+
+
+class RequestRecord(NamedTuple):
+    """One question asked during a load run (times in seconds from its start)."""
+
+    user: int
+    dataset: str
+    rows: int
+    question: str
+    started: float
+    latency_ms: float
+    status: str
+
+
+class Sample(NamedTuple):
+    """Progress and this process's resource usage at one point of a load run."""
+
+    elapsed: float
+    rss_mb: float
+    cpu_percent: float
+    completed: int
+    in_flight: int
+
+
+def scale_dataset(df: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """``df`` resampled (with replacement) to ``rows`` rows."""
+    positions = np.random.default_rng(seed).integers(0, len(df), rows)
+    return df.iloc[positions].reset_index(drop=True)
+
+
+def _rss_mb() -> float:
+    # Current resident set size where /proc is available, else the peak
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if os.uname().sysname != "Darwin" else peak / (1024 * 1024)
+
+
+class GraphTarget:
+    """
+    Asks questions through the compiled graph in this process, as the web app
+    does (datasets profiled up front, answers cached by dataset key).
+
+    Args:
+        graph: Compiled graph (the shared one from get_graph if None).
+        cache_answers: Key datasets by content so repeated questions hit an
+            answer cache of this target's own, which starts empty and is
+            neither read nor filled by the app's; when False every question
+            is computed.
+    """
+
+    # Memory and CPU samples describe the process doing the analysis
+    in_process = True
+
+    def __init__(self, graph: Any = None, cache_answers: bool = True) -> None:
+        if graph is None:
+            from graph.grafo import get_graph
+
+            graph = get_graph()
+        self.graph = graph
+        self.cache_answers = cache_answers
+        self._config: Dict[str, Any] = {}
+        if cache_answers:
+            from core.answer_cache import AnswerCache
+
+            self._config = {"configurable": {"answer_cache": AnswerCache()}}
+        self._datasets: Dict[str, Tuple[pd.DataFrame, Any, str]] = {}
+
+    def prepare(self, name: str, df: pd.DataFrame) -> None:
+        from core.profile import DatasetProfile
+        from core.store import hash_dataframe
+
+        key = hash_dataframe(df) if self.cache_answers else ""
+        self._datasets[name] = (df, DatasetProfile.build(df), key)
+
+    def ask(self, name: str, question: str) -> str:
+        df, profile, key = self._datasets[name]
+        result = self.graph.invoke(
+            {
+                "df": df,
+                "question": question,
+                "next_node": "",
+                "text_answer": "",
+                "chart_base64": None,
+                "status": "",
+                "message": "",
+                "profile": profile,
+                "dataset_key": key,
+            },
+            self._config,
+        )
+        return result.get("status", "")
+
+
+class HTTPTarget:
+    """
+    Asks questions through the HTTP API (see api.server).
+
+    Args:
+        client: Object with ``post(path, body=..., json_body=...)`` returning a
+            response with ``status`` and ``json()``, e.g.
+            ``api.testing.ASGITestClient``, or None to use ``base_url``.
+        base_url: Server address, e.g. "http://localhost:8000".
+        timeout: Seconds to wait for each response.
+    """
+
+    # The server runs elsewhere: this process only sends requests
+    in_process = False
+
+    def __init__(
+        self,
+        client: Any = None,
+        base_url: str = "http://localhost:8000",
+        timeout: float = 120.0,
+    ) -> None:
+        self.client = client if client is not None else UrllibClient(base_url, timeout)
+        self._ids: Dict[str, str] = {}
+
+    def prepare(self, name: str, df: pd.DataFrame) -> None:
+        body = df.to_csv(index=False).encode("utf-8")
+        response = self.client.post(f"/datasets?name={name}.csv", body=body)
+        if response.status != 201:
+            raise RuntimeError(f"Uploading {name} failed with HTTP {response.status}.")
+        self._ids[name] = response.json()["dataset_id"]
+
+    def ask(self, name: str, question: str) -> str:
+        response = self.client.post(
+            f"/datasets/{self._ids[name]}/questions", json_body={"question": question}
+        )
+        if response.status != 200:
+            return f"http_{response.status}"
+        return response.json().get("status", "")
+
+
+class _UrllibResponse(NamedTuple):
+    status: int
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class UrllibClient:
+    """Standard-library HTTP client with the ``post`` interface of ASGITestClient."""
+
+    def __init__(self, base_url: str, timeout: float = 120.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def post(self, path: str, body: bytes = b"", json_body: Any = None) -> _UrllibResponse:
+        headers = {}
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return _UrllibResponse(response.status, response.read())
+        except urllib.error.HTTPError as e:
+            return _UrllibResponse(e.code, e.read())
+
+
+class _Sampler:
+    """Background thread sampling memory, CPU and progress."""
+
+    def __init__(self, interval: float, progress: Callable[[], Tuple[int, int]]) -> None:
+        self.interval = interval
+        self.samples: List[Sample] = []
+        self._progress = progress
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loadtest-sampler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._cpu = time.process_time()
+        self._wall = self.started
+        self._sample()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        now, cpu = time.perf_counter(), time.process_time()
+        wall = now - self._wall
+        # Process CPU time over wall time: 200% means two busy cores
+        cpu_percent = (cpu - self._cpu) / wall * 100 if wall > 0 else 0.0
+        self._cpu, self._wall = cpu, now
+        completed, in_flight = self._progress()
+        self.samples.append(
+            Sample(now - self.started, _rss_mb(), cpu_percent, completed, in_flight)
+        )
+
+
+def run_load(
+    target: Any,
+    datasets: Dict[str, pd.DataFrame],
+    questions: Sequence[str] = DEFAULT_QUESTIONS,
+    concurrency: int = 4,
+    requests_per_user: Optional[int] = 20,
+    duration: Optional[float] = None,
+    think_time: float = 0.0,
+    seed: int = 0,
+    sample_interval: float = SAMPLE_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Run one load level and report on it.
+
+    Each simulated user repeatedly picks a dataset and a question at random,
+    asks it, waits for the answer and pauses ``think_time`` seconds.
+
+    Args:
+        target: ``GraphTarget`` or ``HTTPTarget``.
+        datasets: Datasets by name; each is prepared (uploaded or profiled)
+            before the clock starts.
+        questions: Question mix.
+        concurrency: Simulated users asking at the same time.
+        requests_per_user: Questions each user asks (None: until ``duration``).
+        duration: Seconds to run (None: until every user is done).
+        think_time: Pause between a user's questions.
+        seed: Seed of the users' random choices.
+        sample_interval: Seconds between resource samples.
+
+    Returns:
+        Dict[str, Any]: Report (see ``summarize``) with the request records
+        under "requests". Memory and CPU are reported for targets answering
+        in this process only.
+    """
+    if requests_per_user is None and duration is None:
+        raise ValueError("Set requests_per_user, duration or both.")
+    for name, df in datasets.items():
+        target.prepare(name, df)
+    names = sorted(datasets)
+    rows = {name: len(datasets[name]) for name in names}
+
+    records: List[RequestRecord] = []
+    lock = threading.Lock()
+    in_flight = [0]
+    stop = threading.Event()
+
+    def progress() -> Tuple[int, int]:
+        with lock:
+            return len(records), in_flight[0]
+
+    sampler = _Sampler(sample_interval, progress)
+    sampler.start()
+    started = sampler.started
+
+    def user(number: int) -> None:
+        choices = random.Random(seed * 1000 + number)
+        asked = 0
+        while not stop.is_set() and (requests_per_user is None or asked < requests_per_user):
+            name = choices.choice(names)
+            question = choices.choice(list(questions))
+            with lock:
+                in_flight[0] += 1
+            begin = time.perf_counter()
+            try:
+                status = target.ask(name, question)
+            except Exception as e:
+                status = f"exception:{type(e).__name__}"
+            latency = (time.perf_counter() - begin) * 1000
+            with lock:
+                in_flight[0] -= 1
+                records.append(
+                    RequestRecord(number, name, rows[name], question, begin - started, latency, status)
+                )
+            asked += 1
+            if think_time:
+                stop.wait(think_time)
+
+    threads = [
+        threading.Thread(target=user, args=(number,), name=f"loadtest-user-{number}")
+        for number in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    if duration is not None:
+        stop.wait(duration)
+        stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+
+    report = summarize(records, sampler.samples, elapsed, resources=target.in_process)
+    report["config"] = {
+        "target": type(target).__name__,
+        "concurrency": concurrency,
+        "requests_per_user": requests_per_user,
+        "duration": duration,
+        "think_time": think_time,
+        "datasets": rows,
+        "questions": len(questions),
+        "seed": seed,
+    }
+    report["requests"] = [record._asdict() for record in records]
+    return report
+
+
+def _latencies(latencies: Sequence[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    values = np.asarray(latencies)
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary["mean"] = round(float(values.mean()), 3)
+    summary["max"] = round(float(values.max()), 3)
+    return summary
+
+
+def summarize(
+    records: Sequence[RequestRecord],
+    samples: Sequence[Sample],
+    elapsed: float,
+    resources: bool = True,
+) -> Dict[str, Any]:
+    """
+    Summarize a load run.
+
+    Args:
+        records: Requests of the run.
+        samples: Progress and resource samples of the run.
+        elapsed: Seconds the run took.
+        resources: Report memory and CPU; False when this process is not the
+            one answering (HTTP runs).
+
+    Returns:
+        Dict[str, Any]: "summary" (requests, duration_s, throughput_rps,
+        statuses, latency_ms percentiles, and with ``resources`` peak_rss_mb
+        and mean_cpu_percent), "by_rows" (the same latency summary per
+        dataset size) and "timeline" (samples).
+    """
+    statuses: Dict[str, int] = {}
+    by_rows: Dict[int, List[float]] = {}
+    for record in records:
+        statuses[record.status] = statuses.get(record.status, 0) + 1
+        by_rows.setdefault(record.rows, []).append(record.latency_ms)
+    cpu = [sample.cpu_percent for sample in samples[1:]]
+    summary: Dict[str, Any] = {
+        "requests": len(records),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(records) / elapsed, 3) if elapsed > 0 else 0.0,
+        "statuses": statuses,
+        "latency_ms": _latencies([record.latency_ms for record in records]),
+    }
+    if resources:
+        summary["peak_rss_mb"] = round(max((sample.rss_mb for sample in samples), default=0.0), 1)
+        summary["mean_cpu_percent"] = round(float(np.mean(cpu)), 1) if cpu else 0.0
+    timeline = []
+    for sample in samples:
+        point: Dict[str, Any] = {"elapsed_s": round(sample.elapsed, 3)}
+        if resources:
+            point["rss_mb"] = round(sample.rss_mb, 1)
+            point["cpu_percent"] = round(sample.cpu_percent, 1)
+        point["completed"] = sample.completed
+        point["in_flight"] = sample.in_flight
+        timeline.append(point)
+    return {
+        "summary": summary,
+        "by_rows": {
+            str(rows): {"requests": len(latencies), "latency_ms": _latencies(latencies)}
+            for rows, latencies in sorted(by_rows.items())
+        },
+        "timeline": timeline,
+    }
@@ -1,10 +1,44 @@
+import codecs
+import io
+import json
 import os
-from typing import Any
+from typing import NamedTuple, Optional
 
 MAX_FILE_SIZE_MB = 10
+MAX_ROWS = 10000
 ALLOWED_EXTENSIONS = {".csv", ".xlsx"}
 UPLOADS_DIR = os.path.abspath("uploads")
 
+# Bytes inspected by the pre-parse checks
+SNIFF_BYTES = 64 * 1024
+# Row estimates are extrapolated from the sample, so only reject clear overshoots
+ROW_ESTIMATE_SLACK = 2.0
+
+# Content formats accepted for each extension
+EXTENSION_FORMATS = {
+    ".csv": {"text"},
+    ".json": {"json"},
+    ".jsonl": {"json"},
+    ".ndjson": {"json"},
+    ".xlsx": {"xlsx"},
+    ".xls": {"xls", "xlsx"},
+    ".parquet": {"parquet"},
+}
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class UploadCheck(NamedTuple):
+    """Result of the byte-level checks run before parsing an upload."""
+
+    format: str
+    encoding: Optional[str]
+    estimated_rows: Optional[int]
+
 
 def validate_upload_file(file_path: str, base_dir: str = UPLOADS_DIR) -> bool:
     """
@@ -21,4 +55,140 @@ def validate_upload_file(file_path: str, base_dir: str = UPLOADS_DIR) -> bool:
     abs_path = os.path.abspath(file_path)
     if not abs_path.startswith(base_dir):
         raise ValueError("File is outside the allowed uploads directory.")
-    return True 
\ No newline at end of file
+    return True
+
+
+def detect_encoding(head: bytes) -> Optional[str]:
+    """
+    Detect the text encoding of a byte sample.
+    Returns None when the sample looks like binary data.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b"\x00" in head:
+        return None
+    try:
+        # Incremental decode tolerates a multi-byte character cut at the end
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        head.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return None
+
+
+def sniff_format(head: bytes) -> str:
+    """
+    Identify the file format from its magic bytes.
+    Returns one of: xlsx, xls, parquet, json, text, binary.
+    """
+    if head.startswith(b"PK\x03\x04"):
+        return "xlsx"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return "xls"
+    if head.startswith(b"PAR1"):
+        return "parquet"
+    encoding = detect_encoding(head)
+    if encoding is None:
+        return "binary"
+    text = codecs.getincrementaldecoder(encoding)(errors="ignore").decode(head)
+    if text.lstrip("\ufeff \t\r\n")[:1] in ("[", "{"):
+        return "json"
+    return "text"
+
+
+def _is_json_lines(head: bytes) -> bool:
+    first_line, _, rest = head.lstrip().partition(b"\n")
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return False
+    return bool(rest.strip())
+
+
+def estimate_rows(data: bytes, file_format: str) -> Optional[int]:
+    """
+    Estimate the number of data rows from a bounded sample of the bytes.
+    Exact for files smaller than the sample (barring quoted line breaks);
+    None when it cannot be estimated cheaply (Excel, JSON arrays).
+    """
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+        try:
+            # Only the footer is read
+            return pq.ParquetFile(io.BytesIO(data)).metadata.num_rows
+        except Exception:
+            return None
+    head = data[:SNIFF_BYTES]
+    if file_format == "json":
+        # One record per line; pretty-printed arrays say nothing about row counts
+        if not _is_json_lines(head):
+            return None
+    elif file_format != "text":
+        return None
+    lines = head.count(b"\n")
+    if len(data) > len(head):
+        lines = int(lines * len(data) / max(len(head), 1))
+    elif not head.endswith(b"\n"):
+        lines += 1
+    # Subtract the CSV header line
+    return max(lines - 1, 0) if file_format == "text" else lines
+
+
+def validate_upload_bytes(
+    data: bytes,
+    file_name: str,
+    max_size_mb: float = MAX_FILE_SIZE_MB,
+    max_rows: Optional[int] = MAX_ROWS,
+) -> UploadCheck:
+    """
+    Runs cheap byte-level checks on a raw upload before any parsing:
+    - Size cap
+    - Magic-byte format sniffing, matched against the file extension
+    - Text encoding detection
+    - Bounded row estimate from a byte sample
+
+    Raises:
+        ValueError: If the upload should be rejected without parsing it.
+    """
+    if len(data) > max_size_mb * 1024 * 1024:
+        raise ValueError(
+            f"File too large. Maximum upload size is {max_size_mb:g} MB."
+        )
+    if not data.strip():
+        raise ValueError("The uploaded file contains no data.")
+
+    _, extension = os.path.splitext(file_name.lower())
+    head = data[:SNIFF_BYTES]
+    file_format = sniff_format(head)
+    allowed = EXTENSION_FORMATS.get(extension)
+    if allowed is None:
+        raise ValueError(
+            "Unsupported file format. "
+            "Please upload CSV, Excel, JSON (or JSON Lines), or Parquet files."
+        )
+    if file_format not in allowed:
+        raise ValueError(
+            "Unsupported file format. "
+            f"File content does not match the '{extension}' extension."
+        )
+
+    encoding = detect_encoding(head) if file_format in ("text", "json") else None
+
+    estimated_rows = estimate_rows(data, file_format)
+    if max_rows is not None and estimated_rows is not None:
+        exact = len(data) <= SNIFF_BYTES or file_format == "parquet"
+        limit = max_rows if exact else max_rows * ROW_ESTIMATE_SLACK
+        if estimated_rows > limit:
+            raise ValueError(
+                f"File too large. About {estimated_rows:,} rows found; "
+                f"please upload files with fewer than {max_rows:,} rows."
+            )
+    return UploadCheck(file_format, encoding, estimated_rows)
@@ -0,0 +1,45 @@
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core import answer_cache, ingest_cache, prefetch, profiling
+from core.backends import ENGINES, open_dataset
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """
+    Keep every test off the persistent caches under .cache in the working
+    directory: answers stay in memory, snapshots and profiles go to tmp_path.
+    """
+    monkeypatch.setenv("ANSWER_CACHE_DB", "")
+    monkeypatch.setenv("INGEST_CACHE_DIR", str(tmp_path / "ingest"))
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(answer_cache, "_default_cache", None)
+    monkeypatch.setattr(ingest_cache, "_default_cache", None)
+    monkeypatch.setattr(profiling, "_default_archive", None)
+    # The prefetcher holds the answer cache it was created with
+    monkeypatch.setattr(prefetch, "_default_prefetcher", None)
+
+
+@pytest.fixture(params=ENGINES)
+def as_engine(request, tmp_path):
+    """
+    Open DataFrames with each engine: pandas uses them as they are, the
+    others scan a CSV copy.
+    """
+    engine = request.param
+    if engine != "pandas":
+        pytest.importorskip(engine)
+
+    def open_as(df):
+        if engine == "pandas":
+            return df
+        path = tmp_path / f"dataset-{engine}.csv"
+        df.to_csv(path, index=False)
+        return open_dataset(str(path), engine)
+
+    return open_as
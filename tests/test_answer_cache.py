@@ -0,0 +1,86 @@
+import pytest
+import sqlite3
+import sys
+import os
+import threading
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.answer_cache import SqliteAnswerCache
+
+
+def test_answers_persist_across_instances(tmp_path):
+    """
+    An answer stored by one cache instance (e.g. another process) is served by another.
+    """
+    path = str(tmp_path / "answers.sqlite")
+    SqliteAnswerCache(path).put("data-1", "What is the  AVERAGE price?", ("20.00", None))
+
+    cache = SqliteAnswerCache(path)
+    assert cache.get("data-1", "what is the average price?") == ("20.00", None)
+    assert cache.get("data-2", "what is the average price?") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_engine_version_and_ttl_invalidate(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    SqliteAnswerCache(path, engine_version="1").put("data", "q", ("old", None))
+
+    assert SqliteAnswerCache(path, engine_version="2").get("data", "q") is None
+    assert not SqliteAnswerCache(path, ttl_seconds=-1).contains("data", "q")
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    cache = SqliteAnswerCache(str(tmp_path / "answers.sqlite"), max_size_mb=2500 / 1024 / 1024)
+    cache.put("data", "first", ("a" * 1000, None))
+    cache.put("data", "second", ("b" * 1000, None))
+    cache.get("data", "first")  # "second" becomes the least recently used
+    cache.put("data", "third", ("c" * 1000, None))
+
+    assert cache.contains("data", "first")
+    assert not cache.contains("data", "second")
+    assert cache.contains("data", "third")
+    assert cache.size_bytes() <= 2500
+
+
+def test_concurrent_writers(tmp_path):
+    """
+    Separate instances writing at once (like server processes) must not lose answers.
+    """
+    path = str(tmp_path / "answers.sqlite")
+
+    def write(worker):
+        cache = SqliteAnswerCache(path)
+        for index in range(25):
+            cache.put(f"data-{worker}", f"question {index}", (f"{worker}-{index}", None))
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = SqliteAnswerCache(path)
+    assert len(cache) == 100
+    assert cache.get("data-3", "question 24") == ("3-24", None)
+
+
+def test_structured_results_persist_and_old_databases_upgrade(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE answers (dataset_key TEXT NOT NULL, question TEXT NOT NULL,"
+        " engine_version TEXT NOT NULL, text_answer TEXT NOT NULL, chart TEXT,"
+        " size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+        " PRIMARY KEY (dataset_key, question, engine_version))"
+    )
+    connection.close()
+    cache = SqliteAnswerCache(path)
+    structured = {"summary": "", "tables": [{"title": "Sums", "columns": ["column", "total"], "unit": "number", "rows": [["Price", 60.0]]}]}
+
+    cache.put("data", "total price", ("Sums:\n- Price: 60.00\n", None, structured))
+    cache.put("data", "plain", ("text only", None))
+
+    assert cache.get("data", "total price") == ("Sums:\n- Price: 60.00\n", None, structured)
+    assert cache.get("data", "plain") == ("text only", None)
@@ -0,0 +1,111 @@
+import glob
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.backends import ENGINES, open_dataset
+from core.conversation import answer_question
+from core.intents import categorical_values, numeric_columns, parse_intent
+
+DATA_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "data", "*.csv")))
+
+QUESTIONS = [
+    "What is the average charges per region?",
+    "Top 2 regions by total charges for smokers",
+    "How many non-smokers are in the south?",
+    "What is the sum of age?",
+    "mean charges by smoker in the north",
+    "How many records per region?",
+    "summary",
+    "Hello there",
+]
+
+
+def _insurance():
+    return pd.DataFrame({
+        "age": [19, 18, 28, 33, 32, 31],
+        "smoker": ["yes", "no", "no", "yes", "no", "no"],
+        "region": ["south", "south", "north", "north", "east", "south"],
+        "charges": [30.0, 2.0, 4.0, 40.0, 6.0, 8.0],
+    })
+
+
+def _write(df, tmp_path, extension):
+    path = tmp_path / f"insurance{extension}"
+    if extension == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        pytest.importorskip("pyarrow")
+        df.to_parquet(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "pandas"])
+@pytest.mark.parametrize("extension", [".csv", ".parquet"])
+def test_engines_answer_like_pandas(tmp_path, engine, extension):
+    """
+    Every engine must give the same answers as the in-memory pandas engine.
+    """
+    pytest.importorskip(engine)
+    df = _insurance()
+    dataset = open_dataset(_write(df, tmp_path, extension), engine)
+
+    assert len(dataset) == len(df)
+    assert dataset.numeric_columns == ["age", "charges"]
+    for question in QUESTIONS:
+        expected = answer_question(df, question)
+        assert answer_question(dataset, question, intent=parse_intent(question, dataset)) == expected
+
+
+def _data_questions(df):
+    numeric = numeric_columns(df)
+    # Date columns are parsed by the pandas loader only, so their labels differ
+    labels = [
+        col for col in categorical_values(df)
+        if not pd.api.types.is_datetime64_any_dtype(df[col])
+    ][:2]
+    questions = ["summary", "How many records are there?"]
+    for col in numeric:
+        questions += [f"total {col}", f"average {col}"]
+    for label in labels:
+        questions += [
+            f"count records by {label}",
+            f"average {numeric[-1]} by {label}",
+            f"top 3 {label} by total {numeric[0]}",
+        ]
+    return questions
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ENGINES if engine != "pandas"])
+@pytest.mark.parametrize("path", DATA_FILES, ids=os.path.basename)
+def test_engines_answer_like_pandas_on_bundled_data(engine, path):
+    """
+    The bundled CSV files (padded numbers included) read and answer the same
+    with every engine.
+    """
+    pytest.importorskip(engine)
+    df = open_dataset(path, "pandas")
+    dataset = open_dataset(path, engine)
+
+    assert dataset.numeric_columns == numeric_columns(df)
+    for question in _data_questions(df):
+        expected = answer_question(df, question)
+        assert answer_question(dataset, question, intent=parse_intent(question, dataset)) == expected, question
+
+
+def test_polars_wraps_loaded_dataframes():
+    pytest.importorskip("polars")
+    df = _insurance()
+    dataset = open_dataset(df, "polars")
+
+    question = "Top 1 region by total charges"
+    assert answer_question(dataset, question) == answer_question(df, question)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        open_dataset(_insurance(), "spark")
@@ -0,0 +1,81 @@
+import json
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.backends import ENGINES
+from core.batch import RESULT_FIELDS, find_datasets, load_questions, open_writer, run_batch
+
+CSV = "Product,Price,Quantity\nA,10.0,1\nB,20.0,2\nC,30.0,3\n"
+QUESTIONS = ["What is the average Price?", "count the rows"]
+
+
+def _write_datasets(tmp_path):
+    data_dir = tmp_path / "data"
+    (data_dir / "nested").mkdir(parents=True)
+    (data_dir / "a.csv").write_text(CSV)
+    (data_dir / "nested" / "b.csv").write_text(CSV + "D,40.0,4\n")
+    (data_dir / "notes.txt").write_text("not a dataset")
+    return data_dir
+
+
+def test_find_datasets_walks_directories(tmp_path):
+    data_dir = _write_datasets(tmp_path)
+    assert find_datasets([str(data_dir)]) == [str(data_dir / "a.csv"), str(data_dir / "nested" / "b.csv")]
+
+
+def test_load_questions_formats(tmp_path):
+    text = tmp_path / "questions.txt"
+    text.write_text("# nightly\nWhat is the average Price?\n\ncount the rows\n")
+    listed = tmp_path / "questions.json"
+    listed.write_text(json.dumps(QUESTIONS))
+    lines = tmp_path / "questions.jsonl"
+    lines.write_text('{"question": "What is the average Price?"}\n"count the rows"\n')
+
+    for path in (text, listed, lines):
+        assert load_questions(str(path)) == QUESTIONS
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_run_batch_answers_every_question_per_dataset(tmp_path, engine):
+    if engine != "pandas":
+        pytest.importorskip(engine)
+    data_dir = _write_datasets(tmp_path)
+    datasets = find_datasets([str(data_dir)]) + [str(tmp_path / "missing.csv")]
+
+    records = list(run_batch(datasets, QUESTIONS, max_workers=2, engine=engine))
+
+    assert len(records) == 6
+    assert all(tuple(record) == RESULT_FIELDS for record in records)
+    answers = {(os.path.basename(r["dataset"]), r["question_index"]): r for r in records}
+    assert answers[("a.csv", 0)]["text_answer"] == "The average Price is 20.00"
+    assert answers[("b.csv", 1)]["text_answer"] == "There are 4 records in the dataset"
+    assert answers[("missing.csv", 0)]["status"] == "error"
+    assert all(r["load_ms"] >= 0 and r["answer_ms"] >= 0 for r in records)
+
+
+def test_max_rows_rejects_large_datasets(tmp_path):
+    data_dir = _write_datasets(tmp_path)
+    records = list(run_batch([str(data_dir / "nested" / "b.csv")], QUESTIONS, max_rows=3))
+    assert {record["status"] for record in records} == {"error"}
+    assert "too large" in records[0]["message"]
+
+
+def test_parquet_output(tmp_path):
+    data_dir = _write_datasets(tmp_path)
+    output = str(tmp_path / "answers.parquet")
+
+    writer = open_writer(output)
+    for record in run_batch(find_datasets([str(data_dir)]), QUESTIONS):
+        writer.write(record)
+    writer.close()
+
+    result = pd.read_parquet(output)
+    assert list(result.columns) == list(RESULT_FIELDS)
+    assert len(result) == 4
+    assert result["chart_base64"].isna().all()
+
@@ -0,0 +1,143 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import graph.nos as nos
+from core.cancellation import (
+    AnalysisCancelled,
+    AnalysisTimeout,
+    CancelToken,
+    background_stream,
+    check_cancelled,
+    use_token,
+)
+from core.governor import ChunkedDataset, MemoryGovernor
+from core.results import AnalysisResult
+from graph.grafo import build_graph
+
+
+def _state(df):
+    return {
+        "df": df,
+        "question": "average price by region",
+        "next_node": "",
+        "text_answer": "",
+        "chart_base64": None,
+        "status": "",
+        "message": "",
+        "profile": None,
+        "dataset_key": "",
+    }
+
+
+def _sales(rows=20_000):
+    rng = np.random.default_rng(5)
+    return pd.DataFrame({
+        "Region": rng.choice(["North", "South"], rows),
+        "Price": rng.normal(100, 10, rows),
+    })
+
+
+def test_child_tokens_share_cancellation_and_take_the_earlier_deadline():
+    """
+    A node's token stops with its run and at whichever deadline comes first.
+    """
+    run = CancelToken(60)
+    node = run.child(0.01)
+    assert node.deadline < run.deadline
+    time.sleep(0.02)
+    with pytest.raises(AnalysisTimeout):
+        node.check()
+    run.check()
+
+    other = run.child(5)
+    run.cancel()
+    with pytest.raises(AnalysisCancelled):
+        other.check()
+
+
+def test_chunked_aggregation_stops_between_chunks():
+    """
+    Loops check the current token, so an expired run stops before the next chunk.
+    """
+    chunked = ChunkedDataset(_sales(), chunk_rows=1_000)
+    check_cancelled()  # No token installed: never raises
+    with use_token(CancelToken(0.000001)):
+        time.sleep(0.001)
+        with pytest.raises(AnalysisTimeout):
+            chunked.aggregates((), "Region", "Price")
+    assert chunked.chunks == 0
+
+
+def test_cancelled_run_leaves_the_memory_queue():
+    """
+    Work queued for memory gives up as soon as its run is cancelled.
+    """
+    governor = MemoryGovernor(budget_mb=1, wait_seconds=30)
+    held = governor.admit(1024 * 1024)
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    started = time.monotonic()
+    with use_token(token):
+        with pytest.raises(AnalysisCancelled):
+            governor.admit(1024 * 1024)
+    assert time.monotonic() - started < 5
+    held.release()
+    assert governor.in_use == 0
+
+
+def test_graph_reports_cancelled_and_timed_out_runs(monkeypatch):
+    """
+    Interrupted runs end with a clean cancelled/timeout state and no answer.
+    """
+    graph = build_graph()
+    df = _sales()
+    token = CancelToken()
+    token.cancel()
+    result = graph.invoke(_state(df), {"configurable": {"cancel_token": token}})
+    assert result["status"] == "cancelled"
+    assert result["text_answer"] == ""
+
+    def slow_answer(*args, **kwargs):
+        time.sleep(0.2)
+        check_cancelled()
+        return AnalysisResult.from_text("too late")
+
+    monkeypatch.setattr(nos, "question_result", slow_answer)
+    result = graph.invoke(_state(df), {"configurable": {"node_timeout": 0.05}})
+    assert result["status"] == "timeout"
+    assert result["text_answer"] == ""
+    assert result["chart_base64"] is None
+
+
+def test_background_stream_cancels_when_closed_early():
+    """
+    A caller that stops reading (e.g. a Streamlit rerun) cancels the run.
+    """
+    token = CancelToken()
+
+    def slow():
+        yield "first"
+        while not token.cancelled:
+            time.sleep(0.01)
+        yield "never read"
+
+    stream = background_stream(slow, token, poll_seconds=0.01)
+    assert next(stream) == "first"
+    assert next(stream) is None  # Still running
+    stream.close()
+    assert token.cancelled
+
+    def failing():
+        raise ValueError("boom")
+        yield
+
+    with pytest.raises(ValueError):
+        list(background_stream(failing, CancelToken()))
@@ -0,0 +1,67 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import IntermediateCache, answer_intent
+from core.intents import Intent
+from core.profile import DatasetProfile
+
+
+def _insurance():
+    return pd.DataFrame({
+        "smoker": ["yes", "no", "no", "yes", "no", "no"],
+        "region": ["south", "south", "north", "north", "north", "south"],
+        "charges": [30.0, 2.0, 4.0, 40.0, 6.0, 8.0],
+    })
+
+
+def test_grouped_and_filtered_answers(as_engine):
+    df = as_engine(_insurance())
+    cache = IntermediateCache()
+
+    grouped = answer_intent(df, Intent("mean", "charges", "region"), "k", cache=cache)
+    assert grouped == "Average charges by region:\n- north: 16.67\n- south: 13.33\n"
+
+    filtered = answer_intent(df, Intent("sum", "charges", filters=(("smoker", ("no",)),)), "k", cache=cache)
+    assert filtered == "The total charges for smoker = no is 20.00"
+
+    counted = answer_intent(df, Intent("count", filters=(("smoker", ("no",)), ("region", ("south",)))), "k", cache=cache)
+    assert counted == "There are 2 records where smoker = no and region = south"
+
+
+def test_refinement_reuses_previous_mask():
+    df = _insurance()
+    cache = IntermediateCache()
+    smokers = (("smoker", ("no",)),)
+    cache.mask("k", df, smokers)
+    misses = cache.misses
+
+    # Only the new filter is evaluated; the smoker mask comes from the cache
+    refined = cache.mask("k", df, smokers + (("region", ("south",)),))
+    assert refined.tolist() == [False, True, False, False, False, True]
+    assert cache.hits == 1
+    assert cache.misses == misses + 1
+
+
+def test_narrowing_a_grouped_result_reads_cached_groups():
+    df = _insurance()
+    cache = IntermediateCache()
+    cache.aggregates("k", df, (), "region", "charges")
+
+    # Mutating the frame proves the rows are not scanned again
+    df.loc[:, "charges"] = 0.0
+    stats = cache.aggregates("k", df, (("region", ("north",)),), None, "charges")
+    assert stats[None].total == 50.0
+
+
+def test_profile_groups_answer_without_scanning():
+    df = _insurance()
+    profile = DatasetProfile.build(df)
+    profile.groups["smoker"]["yes"]["charges"].total = 999.0  # only the profile knows this
+
+    answer = answer_intent(df, Intent("sum", "charges", filters=(("smoker", ("yes",)),)), "", profile, IntermediateCache())
+    assert answer == "The total charges for smoker = yes is 999.00"
@@ -0,0 +1,43 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import IntermediateCache
+
+duckdb = pytest.importorskip("duckdb")
+
+from core.duckdb_engine import DuckDBDataset
+
+def _insurance():
+    return pd.DataFrame({
+        "age": [19, 18, 28, 33, 32, 31],
+        "smoker": ["yes", "no", "no", "yes", "no", "no"],
+        "region": ["south", "south", "north", "north", "east", "south"],
+        "charges": [30.0, 2.0, 4.0, 40.0, 6.0, 8.0],
+    })
+
+
+def test_top_groups_are_limited_in_sql(tmp_path):
+    path = tmp_path / "insurance.csv"
+    _insurance().to_csv(path, index=False)
+    dataset = DuckDBDataset(str(path))
+
+    stats = dataset.aggregates((("smoker", ("no",)),), "region", "charges", top=1, rank_by="sum")
+    assert list(stats) == ["south"]
+    assert stats["south"].total == 10.0
+
+    cache = IntermediateCache()
+    cache.aggregates("k", dataset, (), None, None)
+    cache.aggregates("k", dataset, (), None, None)
+    assert cache.hits == 1
+
+
+def test_rejects_formats_it_cannot_scan(tmp_path):
+    path = tmp_path / "data.xlsx"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        DuckDBDataset(str(path))
@@ -0,0 +1,84 @@
+import pytest
+import pandas as pd
+import io
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.excel import ExcelWorkbook, list_excel_sheets, pick_excel_engine, sheet_key
+from core.store import hash_bytes
+from core.upload import validate_file_upload
+
+pytest.importorskip("openpyxl")
+
+
+def _workbook_bytes():
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"Region": ["North", "South"], "Sales": [100, 200]}).to_excel(
+            writer, sheet_name="Sales", index=False
+        )
+        pd.DataFrame({"Name": ["Ann", "Bob", "Cid"], "Age": [30, 40, 50]}).to_excel(
+            writer, sheet_name="People", index=False
+        )
+    return buffer.getvalue()
+
+
+def test_engine_selection_prefers_installed_fast_engine():
+    assert pick_excel_engine("report.xlsx") in {"calamine", "openpyxl"}
+
+
+def test_list_sheets_without_loading():
+    assert list_excel_sheets(_workbook_bytes(), "report.xlsx") == ["Sales", "People"]
+
+
+def test_load_sheet_with_projection():
+    """
+    Only the requested sheet, columns and rows should be parsed.
+    """
+    workbook = ExcelWorkbook(_workbook_bytes(), "report.xlsx")
+    people = workbook.load("People", usecols=["Age"], nrows=2)
+
+    assert list(people.columns) == ["Age"]
+    assert people["Age"].tolist() == [30, 40]
+    # Parsed once, but every caller gets a copy it may modify
+    people["Age"] *= 100
+    again = workbook.load("People", usecols=["Age"], nrows=2)
+    assert again is not people
+    assert again["Age"].tolist() == [30, 40]
+
+
+def test_validate_file_upload_selects_sheet():
+    upload = io.BytesIO(_workbook_bytes())
+    upload.name = "report.xlsx"
+
+    df = validate_file_upload(upload, sheet_name="People")
+    assert df.shape == (3, 2)
+
+    missing = io.BytesIO(_workbook_bytes())
+    missing.name = "report.xlsx"
+    with pytest.raises(ValueError, match="not found"):
+        validate_file_upload(missing, sheet_name="Missing")
+
+
+def test_sheet_keys_match_between_app_and_api():
+    """
+    The app and the API key a sheet the same way.
+    """
+    key = hash_bytes(_workbook_bytes())
+    assert sheet_key(key, None) == key
+    assert sheet_key(key, "People") == hash_bytes(f"{key}:People".encode("utf-8"))
+
+
+def test_uploads_are_independent_of_earlier_edits():
+    upload = io.BytesIO(_workbook_bytes())
+    upload.name = "report.xlsx"
+    first = validate_file_upload(upload, sheet_name="People")
+    first["Age"] *= 100
+    first.drop(columns=["Name"], inplace=True)
+
+    second = validate_file_upload(upload, sheet_name="People")
+    assert list(second.columns) == ["Name", "Age"]
+    assert second["Age"].tolist() == [30, 40, 50]
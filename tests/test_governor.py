@@ -0,0 +1,121 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import core.governor as governor_module
+from core.conversation import answer_question
+from core.governor import (
+    ChunkedDataset,
+    MemoryBudgetExceeded,
+    MemoryGovernor,
+    estimate_working_set,
+)
+from core.intents import parse_intent
+from core.profile import DatasetProfile
+from graph.nos import run_dataframe_analysis_node
+
+MB = 1024 * 1024
+
+
+def _sales(rows=50_000):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "Region": rng.choice(["North", "South", "East"], rows),
+        "Price": rng.normal(100, 10, rows).round(2),
+        "Quantity": rng.integers(1, 10, rows),
+    })
+
+
+def test_working_set_grows_with_the_columns_a_question_touches():
+    """
+    Estimates come from the profile and the columns the intent touches.
+    """
+    df = _sales()
+    profile = DatasetProfile.build(df)
+    average = estimate_working_set(df, parse_intent("average price", df), profile)
+    grouped = estimate_working_set(df, parse_intent("average price by region", df), profile)
+    assert average == len(df) * 8
+    assert grouped > average
+    # Keyword questions copy every numeric column
+    assert estimate_working_set(df, None, profile) == len(df) * 2 * 8 * 2
+
+
+def test_admission_queues_until_budget_is_released():
+    """
+    Work that fits waits for running work to release its reservation.
+    """
+    governor = MemoryGovernor(budget_mb=10, wait_seconds=5)
+    first = governor.admit(8 * MB)
+    admitted = []
+
+    def second():
+        with governor.admit(8 * MB) as admission:
+            admitted.append(admission)
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    time.sleep(0.2)
+    assert not admitted
+    first.release()
+    thread.join(timeout=5)
+    assert admitted[0].mode == "memory"
+    assert admitted[0].waited >= 0.1
+    assert governor.in_use == 0
+
+
+def test_over_budget_work_runs_chunked_or_is_rejected():
+    """
+    Chunkable work over the budget runs chunked; other work is rejected.
+    """
+    governor = MemoryGovernor(budget_mb=1, wait_seconds=0.05)
+    with governor.admit(4 * MB, row_size=8, can_chunk=True) as admission:
+        assert admission.mode == "chunked"
+        assert admission.reserved == MB // 4
+    with pytest.raises(MemoryBudgetExceeded):
+        governor.admit(4 * MB)
+    assert (governor.admitted, governor.chunked, governor.rejected) == (0, 1, 1)
+
+
+@pytest.mark.parametrize("question", [
+    "average price by region",
+    "total quantity for North",
+    "how many records by region",
+    "summary",
+])
+def test_chunked_answers_match_in_memory_answers(question):
+    """
+    Aggregates merged over row chunks give the same answers.
+    """
+    df = _sales()
+    chunked = ChunkedDataset(df, chunk_rows=7_000)
+    assert answer_question(chunked, question) == answer_question(df, question)
+    assert chunked.chunks in (0, 8)
+
+
+def test_analysis_node_reports_chunked_and_rejected_work(monkeypatch):
+    """
+    The analysis node reports the governor's decision in status and message.
+    """
+    df = _sales()
+    monkeypatch.setattr(governor_module, "_default_governor", MemoryGovernor(budget_mb=0.1, wait_seconds=0.05))
+    state = {
+        "df": df,
+        "question": "average price by region",
+        "intent": parse_intent("average price by region", df).to_dict(),
+        "dataset_key": "",
+    }
+    result = run_dataframe_analysis_node(state)
+    assert result["status"] == "ok"
+    assert "chunks to stay within the memory budget" in result["message"]
+    assert result["text_answer"] == answer_question(df, "average price by region")[0]
+
+    result = run_dataframe_analysis_node({**state, "question": "describe the data", "intent": {}})
+    assert result["status"] == "rejected"
+    assert "memory budget" in result["message"]
@@ -6,7 +6,8 @@ import os
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from graph.grafo import build_graph
+from graph.checkpoints import BoundedMemorySaver
+from graph.grafo import build_graph, get_graph, make_checkpointer
 
 
 def test_graph_valid_data_question():
@@ -79,4 +80,85 @@ def test_graph_output_structure():
     }
     
     result = executor.invoke(initial_state)
-    assert set(result.keys()) == {"df", "question", "next_node", "text_answer", "chart_base64", "status", "message"} 
\ No newline at end of file
+    assert set(result.keys()) == {"df", "question", "next_node", "text_answer", "chart_base64", "status", "message", "intent", "history", "canonical_key", "result"} 
+
+def test_graph_streams_partial_then_exact_results():
+    """
+    Test that streaming yields an approximate answer before the exact one and the chart.
+    """
+    executor = build_graph()
+    df = pd.DataFrame({"Price": [float(i % 100) for i in range(20000)]})
+
+    initial_state = {
+        "df": df,
+        "question": "Show a chart of the average Price",
+        "next_node": "",
+        "text_answer": "",
+        "chart_base64": None,
+        "status": "",
+        "message": ""
+    }
+
+    updates = list(executor.stream(initial_state, stream_mode="updates"))
+    nodes = [name for update in updates for name in update]
+    assert nodes == ["interpreter", "normalize_node", "approximate_analysis_node", "run_dataframe_analysis_node", "chart_node"]
+    assert updates[2]["approximate_analysis_node"]["status"] == "partial"
+    assert updates[3]["run_dataframe_analysis_node"]["text_answer"] == "The average Price is 49.50"
+    assert updates[4]["chart_node"]["chart_base64"]
+
+
+def test_get_graph_reuses_compiled_graph():
+    """
+    Test that the compiled graph is built once and shared.
+    """
+    assert get_graph() is get_graph()
+
+
+def test_conversation_follow_up_builds_on_previous_question():
+    """
+    Test that with a checkpointer, a follow-up question refines the previous intent.
+    """
+    executor = build_graph(checkpointer=make_checkpointer())
+    df = pd.DataFrame({
+        "smoker": ["yes", "no", "no", "yes"],
+        "region": ["south", "south", "north", "north"],
+        "charges": [30.0, 2.0, 4.0, 40.0],
+    })
+    config = {"configurable": {"thread_id": "conversation-1", "df": df}}
+
+    def ask(question):
+        state = {"question": question, "next_node": "", "text_answer": "", "chart_base64": None, "status": "", "message": "", "dataset_key": ""}
+        return executor.invoke(state, config)
+
+    first = ask("What is the average charge per region?")
+    assert first["text_answer"] == "Average charges by region:\n- north: 22.00\n- south: 16.00\n"
+
+    second = ask("and for smokers only?")
+    assert second["intent"]["follow_up"] is True
+    assert second["text_answer"] == "Average charges by region (smoker = yes):\n- north: 40.00\n- south: 30.00\n"
+    assert len(second["history"]) == 2
+
+
+def test_memory_checkpointer_keeps_latest_checkpoint_of_recent_threads():
+    """
+    Only the latest checkpoint of each conversation is kept, and the least
+    recently used conversations are dropped past the limit.
+    """
+    checkpointer = BoundedMemorySaver(max_threads=2)
+    executor = build_graph(checkpointer=checkpointer)
+    df = pd.DataFrame({"region": ["south", "north"], "charges": [30.0, 2.0]})
+
+    def ask(thread_id, question):
+        config = {"configurable": {"thread_id": thread_id, "df": df}}
+        state = {"question": question, "next_node": "", "text_answer": "", "chart_base64": None, "status": "", "message": "", "dataset_key": ""}
+        return executor.invoke(state, config)
+
+    for question in ["average charges by region", "and for north only?", "total charges"]:
+        ask("a", question)
+    assert len(list(checkpointer.list({"configurable": {"thread_id": "a"}}))) == 1
+    assert ask("a", "and by region?")["text_answer"].startswith("Total charges by region")
+
+    ask("b", "total charges")
+    ask("c", "total charges")
+    assert list(checkpointer.list({"configurable": {"thread_id": "a"}})) == []
+    assert {key[0] for key in checkpointer.blobs} == {"b", "c"}
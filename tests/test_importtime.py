@@ -0,0 +1,46 @@
+import subprocess
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.append(SRC_DIR)
+
+from utils.importtime import parse_importtime, summarize
+
+REPORT = """import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     numpy.core
+import time:       700 |       1000 |   numpy
+import time:      2000 |       3000 | pandas
+import time:       500 |        500 | core.analysis
+"""
+
+
+def test_parse_and_summarize_report():
+    """
+    Report lines are parsed and self time is grouped by top-level package.
+    """
+    records = parse_importtime(REPORT)
+    assert [record.module for record in records] == ["numpy.core", "numpy", "pandas", "core.analysis"]
+    assert records[0].depth == 2
+
+    report = summarize("core.analysis", records, top=2)
+    assert report.total_ms == 3.5
+    assert report.by_package == [("pandas", 2.0), ("numpy", 1.0)]
+    assert report.slowest[0].module == "pandas"
+
+
+def test_analysis_does_not_import_langchain_stack():
+    """
+    The keyword analysis path must not pull LangChain, LangGraph or the sandbox at import.
+    """
+    code = (
+        "import sys; import core.analysis, core.prefetch; "
+        "print(sorted(m for m in ('langgraph', 'langchain_core', 'langchain_sandbox') if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": SRC_DIR}, check=True
+    )
+    assert completed.stdout.strip() == "[]"
@@ -0,0 +1,70 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.ingest_cache import IngestionCache
+
+pytest.importorskip("pyarrow")
+
+
+def _sample_df():
+    return pd.DataFrame({
+        "Product": ["A", "B", "C"],
+        "Price": [10.0, 20.0, 30.0],
+        "Quantity": [1, 2, 3]
+    })
+
+
+def test_hit_skips_loader(tmp_path):
+    """
+    A second load with the same key must come from the snapshot, not the parser.
+    """
+    cache = IngestionCache(cache_dir=str(tmp_path))
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return _sample_df()
+
+    first = cache.load("abc", loader)
+    second = cache.load("abc", loader)
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_snapshot_survives_new_cache_instance(tmp_path):
+    IngestionCache(cache_dir=str(tmp_path)).put("abc", _sample_df())
+
+    restored = IngestionCache(cache_dir=str(tmp_path)).get("abc")
+    assert restored is not None
+    pd.testing.assert_frame_equal(restored, _sample_df())
+
+
+def test_eviction_keeps_cache_under_size_limit(tmp_path):
+    big = pd.DataFrame({"value": range(50_000)})
+    cache = IngestionCache(cache_dir=str(tmp_path), max_size_mb=0.5)
+
+    cache.put("old", big)
+    cache.put("new", big)
+
+    assert cache.size_bytes() <= cache.max_bytes
+    assert cache.get("new") is not None
+    assert cache.get("old") is None
+
+
+def test_frames_with_non_string_columns_are_not_cached(tmp_path):
+    """
+    A hit must return the same column labels as the parse, so numeric headers skip the cache.
+    """
+    cache = IngestionCache(cache_dir=str(tmp_path))
+    if not cache.enabled:
+        pytest.skip("pyarrow not installed")
+    df = pd.DataFrame({0: [1, 2], 1: ["a", "b"]})
+    assert cache.put("numbers", df) is False
+    assert cache.get("numbers") is None
+    assert list(cache.load("numbers", lambda: df).columns) == [0, 1]
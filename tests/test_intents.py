@@ -0,0 +1,93 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.analysis import HELP_MESSAGE
+from core.conversation import answer_question
+from core.intents import Intent, is_follow_up, normalize_text, parse_intent, question_key
+
+
+def _insurance():
+    return pd.DataFrame({
+        "age": [19, 18, 28, 33, 32, 31],
+        "sex": ["female", "male", "male", "male", "male", "female"],
+        "smoker": ["yes", "no", "no", "no", "no", "no"],
+        "region": ["southwest", "southeast", "southeast", "northwest", "northwest", "southeast"],
+        "charges": [16884.9, 1725.6, 4449.5, 21984.5, 3866.9, 3756.6],
+    })
+
+
+def test_parse_grouped_question(as_engine):
+    intent = parse_intent("What is the average charge per region?", as_engine(_insurance()))
+    assert intent == Intent(operation="mean", column="charges", group_by="region")
+
+
+def test_parse_filters_and_negation(as_engine):
+    intent = parse_intent("How many non-smokers are in the southeast?", as_engine(_insurance()))
+    assert intent.operation == "count"
+    assert intent.filters == (("smoker", ("no",)), ("region", ("southeast",)))
+
+
+def test_comparing_both_sides_groups_instead_of_filtering(as_engine):
+    intent = parse_intent("Do smokers pay more than non-smokers?", as_engine(_insurance()))
+    assert intent.group_by == "smoker"
+    assert intent.filters == ()
+
+
+def test_follow_up_inherits_and_refines_previous_intent(as_engine):
+    df = as_engine(_insurance())
+    first = parse_intent("What is the average charge per region?", df)
+    second = parse_intent("and for smokers only?", df, previous=first)
+    third = parse_intent("what about females?", df, previous=second)
+
+    assert second == Intent("mean", "charges", "region", (("smoker", ("yes",)),), follow_up=True)
+    assert third.filters == (("smoker", ("yes",)), ("sex", ("female",)))
+    assert Intent.from_dict(third.to_dict()) == third
+
+
+def test_new_question_does_not_inherit(as_engine):
+    df = as_engine(_insurance())
+    first = parse_intent("What is the average charge per region?", df)
+    assert not is_follow_up("What is the total charges?")
+    assert parse_intent("What is the total charges?", df, previous=first) == Intent("sum", "charges")
+
+
+def test_normalize_text_maps_synonyms_and_punctuation():
+    assert normalize_text("What's the MEAN, or avg, of Charges?") == "what s the average or average of charges"
+    assert normalize_text("How many non-smokers?") == "count non-smokers"
+    # Words naming a column are not treated as synonyms
+    assert normalize_text("total by region", columns=["total"]) == "total by region"
+
+
+def test_canonical_key_ignores_wording_and_filter_order(as_engine):
+    df = as_engine(_insurance())
+    first = parse_intent("Total charges for smokers in the southeast", df)
+    second = parse_intent("sum of CHARGES in southeast, smokers only", df)
+    assert first.canonical_key() == second.canonical_key()
+    assert question_key("What is the weather?", parse_intent("What is the weather?", df)) == "what is the weather"
+
+
+def test_top_n_groups_by_the_named_column(as_engine):
+    intent = parse_intent("Top 2 regions by total charges", as_engine(_insurance()))
+    assert (intent.operation, intent.column, intent.group_by, intent.top) == ("sum", "charges", "region", 2)
+    assert intent.canonical_key().endswith(":top=2")
+
+
+def test_operation_keywords_match_whole_words(as_engine):
+    """
+    "country" is not a count, "discount" not a count, "consumption" not a sum.
+    """
+    df = as_engine(pd.DataFrame({
+        "country": ["a", "b", "a"],
+        "discount": [1.0, 2.0, 3.0],
+        "consumption": [5.0, 6.0, 7.0],
+    }))
+
+    assert parse_intent("max consumption", df).operation == ""
+    assert parse_intent("discount per country", df).operation == ""
+    assert parse_intent("counts by country", df).operation == "count"
+    assert answer_question(df, "max consumption")[0] == HELP_MESSAGE
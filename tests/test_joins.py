@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import answer_question
+from core.joins import JoinIndexCache, JoinedDataset, join_datasets, shared_keys
+
+
+def _datasets():
+    rng = np.random.default_rng(7)
+    customers = pd.DataFrame({
+        "Customer_ID": np.arange(40),
+        "Segment": rng.choice(["Retail", "Corporate", "SMB"], 40),
+        "Age": rng.integers(20, 70, 40),
+    })
+    orders = pd.DataFrame({
+        "order_id": np.arange(300),
+        # Some orders reference customers that do not exist
+        "customer_id": rng.integers(0, 48, 300),
+        "Amount": rng.normal(100, 20, 300).round(2),
+        "Channel": rng.choice(["web", "store"], 300),
+    })
+    orders.loc[3, "Amount"] = np.nan
+    return orders, customers
+
+
+def test_shared_keys_match_names_and_values():
+    """
+    Key columns are detected from names (ignoring case) and overlapping values.
+    """
+    orders, customers = _datasets()
+    assert shared_keys(orders, customers) == [("customer_id", "Customer_ID")]
+    unrelated = pd.DataFrame({"customer_id": ["x", "y"]})
+    assert shared_keys(orders, unrelated) == []
+
+
+@pytest.mark.parametrize("filters", [(), (("Channel", ("web",)),), (("Segment", ("SMB", "Retail")),)])
+@pytest.mark.parametrize("group_by", [None, "Segment", "Channel"])
+@pytest.mark.parametrize("column", [None, "Amount", "Age"])
+def test_aggregates_match_the_inner_join(filters, group_by, column):
+    """
+    Aggregates using the related dataset equal those of the materialized
+    join; those using only the primary are answered on it alone.
+    """
+    orders, customers = _datasets()
+    joined = JoinedDataset({"orders": orders, "customers": customers}, "orders")
+    used = {col for col, _ in filters} | {group_by, column}
+    if any(col in customers.columns for col in used):
+        merged = orders.merge(customers, left_on="customer_id", right_on="Customer_ID")
+    else:
+        merged = orders
+    for col, values in filters:
+        merged = merged[merged[col].isin(values)]
+    parts = merged.groupby(group_by) if group_by else [(None, merged)]
+
+    result = joined.aggregates(filters, group_by, column)
+    assert set(result) == {key for key, _ in parts}
+    for key, part in parts:
+        stats = result[key]
+        if column is None:
+            assert stats.count == len(part)
+            continue
+        assert stats.count == part[column].count()
+        assert stats.total == pytest.approx(part[column].sum())
+        assert stats.minimum == part[column].min()
+        assert stats.maximum == part[column].max()
+        assert stats.std == pytest.approx(part[column].std())
+
+
+def test_join_indexes_are_built_once_per_dataset_and_key():
+    """
+    Repeated cross-dataset questions reuse the cached hash-join indexes.
+    """
+    orders, customers = _datasets()
+    cache = JoinIndexCache()
+    joined = JoinedDataset(
+        {"orders": orders, "customers": customers},
+        "orders",
+        keys={"orders": "o1", "customers": "c1"},
+        cache=cache,
+    )
+    joined.aggregates((), "Segment", "Amount")
+    built = cache.misses
+    joined.aggregates((("Channel", ("web",)),), "Segment", "Amount")
+    joined.aggregates((), "Channel", "Age")
+    assert len(cache) == built + 1  # Only the Channel group index is new
+    assert cache.hits > 0
+
+
+def test_questions_combine_columns_of_joined_datasets():
+    """
+    Questions name columns of either dataset and are answered over the join.
+    """
+    orders, customers = _datasets()
+    joined = join_datasets(orders, {"customers": customers})
+    merged = orders.merge(customers, left_on="customer_id", right_on="Customer_ID")
+
+    answer, _ = answer_question(joined, "total amount for Retail")
+    expected = merged[merged["Segment"] == "Retail"]["Amount"].sum()
+    assert answer == f"The total Amount for Segment = Retail is {expected:.2f}"
+
+    with pytest.raises(ValueError):
+        join_datasets(orders, {"other": pd.DataFrame({"Code": ["a"]})})
+
+
+def test_colliding_columns_are_qualified():
+    """
+    A related column whose name is taken is exposed as "<dataset>.<column>".
+    """
+    orders, customers = _datasets()
+    customers["Channel"] = "partner"
+    joined = JoinedDataset({"orders": orders, "customers": customers}, "orders")
+    assert "customers.Channel" in joined.columns
+    assert joined.source("customers.Channel") == ("customers", "Channel")
+    assert "Customer_ID" not in joined.columns
@@ -0,0 +1,101 @@
+import json
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.server import create_app
+from api.testing import ASGITestClient
+from core.store import DatasetStore
+from utils.loadtest import GraphTarget, HTTPTarget, RequestRecord, Sample, run_load, scale_dataset, summarize
+
+SALES = pd.DataFrame({
+    "Region": ["North", "South", "East", "West"] * 5,
+    "Price": [10.0, 20.0, 30.0, 40.0] * 5,
+})
+QUESTIONS = ["What is the average price?", "What is the total price by region?"]
+
+
+def test_scale_dataset_resamples_rows():
+    scaled = scale_dataset(SALES, 100, seed=1)
+    assert len(scaled) == 100
+    assert list(scaled.columns) == ["Region", "Price"]
+    assert set(scaled["Region"]) <= set(SALES["Region"])
+
+
+def test_summary_reports_throughput_percentiles_and_resources():
+    """
+    Latency percentiles, throughput and statuses are computed from the records.
+    """
+    records = [
+        RequestRecord(0, "sales", 20, "q", 0.0, float(ms), "ok" if ms < 100 else "timeout")
+        for ms in range(1, 101)
+    ]
+    samples = [Sample(0.0, 100.0, 0.0, 0, 0), Sample(1.0, 150.0, 80.0, 50, 2), Sample(2.0, 120.0, 40.0, 100, 0)]
+    report = summarize(records, samples, elapsed=2.0)
+    summary = report["summary"]
+    assert summary["throughput_rps"] == 50.0
+    assert summary["statuses"] == {"ok": 99, "timeout": 1}
+    assert summary["latency_ms"]["p50"] == 50.5
+    assert summary["latency_ms"]["max"] == 100.0
+    assert summary["peak_rss_mb"] == 150.0
+    assert summary["mean_cpu_percent"] == 60.0
+    assert report["by_rows"]["20"]["requests"] == 100
+    assert len(report["timeline"]) == 3
+    json.dumps(report)
+
+
+def test_run_load_drives_the_graph_concurrently():
+    """
+    Every simulated user asks its questions; the report is JSON-serializable.
+    """
+    datasets = {"small": SALES, "large": scale_dataset(SALES, 2000)}
+    report = run_load(
+        GraphTarget(cache_answers=False),
+        datasets,
+        QUESTIONS,
+        concurrency=3,
+        requests_per_user=4,
+        sample_interval=0.01,
+    )
+    assert report["summary"]["requests"] == 12
+    assert report["summary"]["statuses"] == {"ok": 12}
+    assert {record["user"] for record in report["requests"]} == {0, 1, 2}
+    assert set(report["by_rows"]) <= {"20", "2000"}
+    assert report["config"]["concurrency"] == 3
+    assert report["timeline"][-1]["completed"] == 12
+    json.dumps(report)
+
+
+def test_run_load_drives_the_http_api():
+    """
+    The HTTP target uploads each dataset once and asks through the API.
+    """
+    client = ASGITestClient(create_app(store=DatasetStore()))
+    report = run_load(HTTPTarget(client), {"sales": SALES}, QUESTIONS, concurrency=2, requests_per_user=3)
+    assert report["summary"]["statuses"] == {"ok": 6}
+    assert report["config"]["target"] == "HTTPTarget"
+    # This process only sends requests, so its memory and CPU are left out
+    assert "peak_rss_mb" not in report["summary"]
+    assert "rss_mb" not in report["timeline"][0]
+
+    with pytest.raises(ValueError):
+        run_load(HTTPTarget(client), {"sales": SALES}, QUESTIONS, requests_per_user=None)
+
+
+def test_graph_target_caches_answers_on_its_own():
+    """
+    Cached runs neither read nor fill the process-wide answer cache.
+    """
+    from core.answer_cache import get_answer_cache
+
+    target = GraphTarget()
+    target.prepare("sales", SALES)
+    assert target.ask("sales", QUESTIONS[0]) == "ok"
+    assert target.ask("sales", QUESTIONS[0]) == "ok"
+    cache = target._config["configurable"]["answer_cache"]
+    assert (len(cache), cache.hits) == (1, 1)
+    assert len(get_answer_cache()) == 0
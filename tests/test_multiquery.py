@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import IntermediateCache, question_result
+from core.intents import Intent, parse_intent
+from core.multiquery import answer_questions, execute_plan, plan_aggregates
+from core.profile import DatasetProfile
+from core.store import hash_dataframe
+from graph.grafo import build_graph
+
+QUESTIONS = [
+    "What is the average charges per region?",
+    "mean charges by region",
+    "Total charges by smoker",
+    "What is the average charges?",
+    "How many smokers are in the south?",
+    "count records by region",
+    "Total charges for smokers",
+    "average age where region is north",
+    "summary by smoker",
+    "Top 1 regions by total charges",
+    "describe the dataset",
+]
+
+
+def _insurance(rows=600):
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame({
+        "smoker": rng.choice(["yes", "no"], rows),
+        "region": rng.choice(["south", "north", "east", None], rows),
+        "age": rng.integers(18, 65, rows).astype(float),
+        "charges": rng.integers(1, 400, rows) * 0.5,
+    })
+    df.loc[::7, "charges"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("profiled", [False, True])
+def test_answers_match_one_question_at_a_time(profiled):
+    """
+    Batched answers are identical to answering each question alone.
+    """
+    df = _insurance()
+    profile = DatasetProfile.build(df) if profiled else None
+
+    expected = [question_result(df, question, profile) for question in QUESTIONS]
+    assert answer_questions(df, QUESTIONS, profile) == [
+        (result.text, result.chart, result.to_dict()) for result in expected
+    ]
+
+
+def test_plan_shares_passes_between_questions():
+    """
+    Requests on one slice share a pass, and filters on a grouped column are
+    merged from its groups.
+    """
+    df = _insurance()
+    intents = [
+        Intent("mean", "charges", "region"),
+        Intent("sum", "age", "region"),
+        Intent("count", group_by="region"),
+        Intent("mean", "charges", filters=(("region", ("north",)),)),
+        Intent("sum", "charges", filters=(("smoker", ("yes",)),)),
+        Intent("mean", "age", filters=(("smoker", ("yes",)),)),
+    ]
+
+    plan = plan_aggregates(df, intents)
+
+    assert plan.passes == {
+        ((), "region"): ["charges", "age", None],
+        ((("smoker", ("yes",)),), None): ["charges", "age"],
+    }
+    assert plan.derived == [((("region", ("north",)),), None, "charges")]
+    results = execute_plan(df, plan)
+    north = df[df["region"] == "north"]["charges"]
+    assert results[plan.derived[0]][None].total == pytest.approx(north.sum())
+    assert results[plan.derived[0]][None].count == north.count()
+
+
+def test_grouped_pass_matches_groupby_aggregates():
+    """
+    Group aggregates from one pass equal those of the per-question groupby.
+    """
+    df = _insurance()
+    filters = (("smoker", ("no",)),)
+    plan = plan_aggregates(df, [Intent("summary", group_by="region", filters=filters)])
+    results = execute_plan(df, plan)
+
+    cache = IntermediateCache()
+    for column in (None, "age", "charges"):
+        expected = cache.aggregates("k", df, filters, "region", column)
+        actual = results[(filters, "region", column)]
+        assert list(actual) == list(expected)
+        for key, stats in expected.items():
+            assert actual[key].count == stats.count and actual[key].nulls == stats.nulls
+            assert actual[key].total == pytest.approx(stats.total)
+            assert (actual[key].minimum, actual[key].maximum) == (stats.minimum, stats.maximum)
+
+
+def test_profiled_requests_take_no_pass():
+    """
+    Aggregates the dataset profile already holds are not recomputed.
+    """
+    df = _insurance()
+    profile = DatasetProfile.build(df)
+    intents = [parse_intent(question, df, profile) for question in QUESTIONS[:4]]
+
+    assert plan_aggregates(df, intents, profile).passes == {}
+
+
+def test_graph_uses_batch_answers():
+    """
+    The analysis node answers from config["configurable"]["answers"].
+    """
+    df = _insurance()
+    state = {
+        "df": df,
+        "question": "What is the average charges?",
+        "next_node": "",
+        "text_answer": "",
+        "chart_base64": None,
+        "status": "",
+        "message": "",
+        "profile": None,
+        "dataset_key": "",
+    }
+    answers = {state["question"]: ("precomputed", None)}
+
+    result = build_graph().invoke(state, {"configurable": {"answers": answers}})
+
+    assert result["text_answer"] == "precomputed"
+    assert result["status"] == "ok"
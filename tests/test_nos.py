@@ -1,3 +1,4 @@
+import base64
 import pytest
 import pandas as pd
 import re
@@ -7,7 +8,8 @@ import os
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from graph.nos import interpreter, run_dataframe_analysis_node
+from core.analysis import run_dataframe_analysis
+from graph.nos import approximate_analysis_node, chart_node, interpreter, normalize_node, run_dataframe_analysis_node
 
 
 def test_interpreter_tabular_analysis():
@@ -59,4 +61,78 @@ def test_run_dataframe_analysis_node():
     assert re.search(r"\d", result["text_answer"]), "The answer should contain a number."
     if result["chart_base64"] is not None:
         assert isinstance(result["chart_base64"], str), "Chart should be a base64 string."
-        assert result["chart_base64"].startswith("data:image") or result["chart_base64"].startswith("iVBOR"), "Chart should be a valid base64 image." 
\ No newline at end of file
+        assert result["chart_base64"].startswith("data:image") or result["chart_base64"].startswith("iVBOR"), "Chart should be a valid base64 image." 
+
+def test_approximate_analysis_node_large_dataset():
+    """
+    Tests that a large dataset gets a 'partial' estimate before the exact answer.
+    """
+    df = pd.DataFrame({"Price": [float(i % 100) for i in range(20000)]})
+    result = approximate_analysis_node({"df": df, "question": "What is the average Price?"})
+    assert result["status"] == "partial"
+    assert "sample" in result["text_answer"]
+    assert re.search(r"\d", result["text_answer"])
+
+
+def test_approximate_analysis_node_skips_small_dataset():
+    """
+    Tests that small datasets go straight to the exact analysis.
+    """
+    state = {"df": pd.DataFrame({"Price": [1.0, 2.0]}), "question": "What is the average Price?", "status": ""}
+    assert approximate_analysis_node(state) == {}
+
+
+def test_chart_node_renders_requested_chart():
+    """
+    Tests that the chart node adds a base64 PNG only when a chart is requested.
+    """
+    df = pd.DataFrame({"Region": ["north", "south", "north"], "Sales": [1.0, 2.0, 3.0]})
+    state = {"df": df, "question": "Plot the average Sales by region", "text_answer": "x", "chart_base64": None, "status": "ok"}
+    result = chart_node(state)
+    assert base64.b64decode(result["chart_base64"]).startswith(b"\x89PNG")
+
+    no_chart = {**state, "question": "What is the average Sales?"}
+    assert chart_node(no_chart) == {}
+
+
+def test_normalize_node_gives_paraphrases_one_canonical_key():
+    """
+    Tests that differently worded questions share a canonical key and thus a cached answer.
+    """
+    df = pd.DataFrame({"unit_price": [10.0, 20.0, 30.0], "Quantity": [1, 2, 3]})
+    keys = {
+        normalize_node({"df": df, "question": question, "dataset_key": "d"})["canonical_key"]
+        for question in ("average unit price", "What is the MEAN Unit_Price?", "avg unit prices!")
+    }
+    assert keys == {"intent:mean:unit_price::"}
+
+    state = {"df": df, "question": "what's the total quantity", "dataset_key": "normalize-test"}
+    state.update(normalize_node(state))
+    first = run_dataframe_analysis_node(state)
+    assert first["text_answer"] == "The total Quantity is 6.00"
+
+
+def test_nodes_return_only_changed_keys():
+    """
+    Tests that nodes return state updates rather than copies of the whole state.
+    """
+    df = pd.DataFrame({"Region": ["north", "south", "north"], "Sales": [1.0, 2.0, 3.0]})
+    state = {"df": df, "question": "average Sales by Region", "dataset_key": ""}
+    assert interpreter(state) == {"next_node": "run_dataframe_analysis"}
+    state.update(normalize_node(state))
+
+    update = run_dataframe_analysis_node(state)
+    assert set(update) == {"text_answer", "chart_base64", "result", "status", "message"}
+    [table] = update["result"]["tables"]
+    assert table["columns"] == ["Region", "average Sales"]
+    assert table["rows"] == [["north", 2.0], ["south", 2.0]]
+
+
+def test_keyword_analysis_without_numeric_columns():
+    """
+    Averages and sums of a dataset with no numeric columns get an answer, not None.
+    """
+    df = pd.DataFrame({"Product": ["A", "B"]})
+    assert run_dataframe_analysis(df, "What is the average?") == (
+        "The dataset has no numeric columns to aggregate.", None
+    )
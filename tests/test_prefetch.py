@@ -0,0 +1,107 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.answer_cache import AnswerCache, get_answer_cache
+from core.intents import parse_intent, question_key
+from core.prefetch import Prefetcher
+from core.profile import ProfileRegistry
+from graph.nos import run_dataframe_analysis_node
+
+QUESTIONS = ["What is the average Price?", "How many rows are there? count"]
+
+
+def _sample_df():
+    return pd.DataFrame({
+        "Product": ["A", "B", "C"],
+        "Price": [10.0, 20.0, 30.0],
+        "Quantity": [1, 2, 3]
+    })
+
+
+def test_prefetch_fills_answer_cache():
+    cache = AnswerCache()
+    prefetcher = Prefetcher(cache=cache, registry=ProfileRegistry())
+
+    profile = prefetcher.schedule("dataset-1", _sample_df(), QUESTIONS).result(timeout=10)
+
+    assert profile.rows == 3
+    assert prefetcher.profile("dataset-1") is profile
+    # Answers are keyed on the canonical intent, so paraphrases hit them too
+    def key(question):
+        return question_key(question, parse_intent(question, _sample_df()))
+
+    text, chart, result = cache.get("dataset-1", key("mean price"))
+    assert (text, chart) == ("The average Price is 20.00", None)
+    # Stored structured, like answers computed by the graph
+    assert result["tables"][0]["rows"] == [["Price", 20.0]]
+    assert cache.contains("dataset-1", key("Number of rows?"))
+
+
+def test_schedule_is_deduplicated_per_dataset():
+    prefetcher = Prefetcher(cache=AnswerCache(), registry=ProfileRegistry())
+    first = prefetcher.schedule("dataset-1", _sample_df(), QUESTIONS)
+    second = prefetcher.schedule("dataset-1", _sample_df(), QUESTIONS)
+    assert first is second
+
+
+def test_jobs_are_bounded_released_and_retried_after_failure():
+    """
+    Old jobs are evicted, released ones forgotten and failed ones retried.
+    """
+    prefetcher = Prefetcher(cache=AnswerCache(), registry=ProfileRegistry(), max_jobs=2)
+    first = prefetcher.schedule("dataset-1", _sample_df(), [])
+    first.result(timeout=10)
+    prefetcher.schedule("dataset-2", _sample_df(), []).result(timeout=10)
+    prefetcher.schedule("dataset-3", _sample_df(), []).result(timeout=10)
+    assert prefetcher.profile("dataset-1") is None
+
+    prefetcher.release("dataset-3")
+    assert prefetcher.profile("dataset-3") is None
+    assert prefetcher.profile("dataset-2") is not None
+
+    failed = prefetcher.schedule("dataset-4", None, QUESTIONS)
+    with pytest.raises(Exception):
+        failed.result(timeout=10)
+    retried = prefetcher.schedule("dataset-4", _sample_df(), QUESTIONS)
+    assert retried is not failed
+    assert retried.result(timeout=10).rows == 3
+
+
+def test_analysis_node_serves_cached_answer():
+    """
+    With a dataset key in the state, a cached answer is returned without analysis.
+    """
+    get_answer_cache().put("dataset-cached", "What is the average Price?", ("cached answer", None))
+    result = run_dataframe_analysis_node({
+        "df": _sample_df(),
+        "question": "What is the average Price?",
+        "dataset_key": "dataset-cached",
+    })
+    assert result["status"] == "ok"
+    assert result["text_answer"] == "cached answer"
+
+
+def test_chart_suggestions_are_served_with_their_chart():
+    """
+    Suggestions asking for a chart are cached with it, so the graph does not draw it.
+    """
+    question = "Plot the average Price by Product"
+    df = _sample_df()
+    prefetcher = Prefetcher(cache=get_answer_cache(), registry=ProfileRegistry())
+    profile = prefetcher.schedule("dataset-chart", df, [question]).result(timeout=10)
+
+    intent = parse_intent(question, df, profile)
+    result = run_dataframe_analysis_node({
+        "df": df,
+        "question": question,
+        "dataset_key": "dataset-chart",
+        "intent": intent.to_dict(),
+        "canonical_key": question_key(question, intent),
+    })
+    assert result["status"] == "ok"
+    assert result["chart_base64"]
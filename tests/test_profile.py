@@ -0,0 +1,116 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core import profile as profile_module
+from core.analysis import run_dataframe_analysis
+from core.profile import DatasetProfile, ProfileRegistry
+
+
+def _sales(rows):
+    return pd.DataFrame({
+        "Region": ["North", "South", "East", "West"] * (rows // 4),
+        "Sales": [float(i) for i in range(rows)],
+        "Quantity": list(range(rows)),
+    })
+
+
+def test_profile_matches_pandas_aggregates():
+    df = _sales(200)
+    profile = DatasetProfile.build(df)
+
+    assert profile.rows == 200
+    assert profile.numeric["Sales"].mean == pytest.approx(df["Sales"].mean())
+    assert profile.numeric["Sales"].std == pytest.approx(df["Sales"].std())
+    by_region = profile.group_stats("Region", "Sales")
+    expected = df.groupby("Region")["Sales"].sum()
+    assert {k: v.total for k, v in by_region.items()} == pytest.approx(expected.to_dict())
+    assert profile.distinct["Region"].estimate == 4
+
+
+def test_appended_dataset_only_profiles_new_rows(monkeypatch):
+    """
+    A dataset that extends a known one must only scan the appended rows.
+    """
+    registry = ProfileRegistry()
+    registry.profile_for(_sales(200))
+
+    scanned = []
+    original_absorb = DatasetProfile._absorb
+
+    def tracking_absorb(self, df):
+        scanned.append(len(df))
+        original_absorb(self, df)
+
+    monkeypatch.setattr(DatasetProfile, "_absorb", tracking_absorb)
+    grown = _sales(240)
+    profile = registry.profile_for(grown)
+
+    assert scanned == [40]
+    assert profile.appended_rows == 40
+    assert profile.rows == 240
+    assert profile.numeric["Quantity"].total == grown["Quantity"].sum()
+    assert profile.group_stats("Region", "Sales")["North"].count == 60
+
+
+@pytest.mark.parametrize("edited_row", [10, 100, 199])
+@pytest.mark.parametrize("rows", [200, 240])
+def test_changed_history_is_profiled_from_scratch(monkeypatch, edited_row, rows):
+    """
+    An edit anywhere in the known rows, in a same-length or appended file,
+    means the old profile is not reused.
+    """
+    monkeypatch.setattr(profile_module, "FINGERPRINT_CHUNK_ROWS", 64)
+    registry = ProfileRegistry()
+    registry.profile_for(_sales(200))
+
+    edited = _sales(rows)
+    edited.loc[edited_row, "Sales"] = -1.0
+    profile = registry.profile_for(edited)
+
+    assert profile.appended_rows == 0
+    assert profile.numeric["Sales"].minimum == -1.0
+    assert profile.numeric["Sales"].total == edited["Sales"].sum()
+
+
+def test_extended_profile_checks_every_known_row(monkeypatch):
+    """
+    After appends, an edit inside the previously appended rows is still seen.
+    """
+    monkeypatch.setattr(profile_module, "FINGERPRINT_CHUNK_ROWS", 64)
+    registry = ProfileRegistry()
+    registry.profile_for(_sales(200))
+    assert registry.profile_for(_sales(240)).appended_rows == 40
+
+    edited = _sales(240)
+    edited.loc[220, "Sales"] = -1.0
+    assert registry.profile_for(edited).appended_rows == 0
+    assert registry.profile_for(_sales(280)).appended_rows == 40
+
+
+def test_high_cardinality_columns_get_no_group_index(monkeypatch):
+    monkeypatch.setattr(profile_module, "GROUP_MAX_CARDINALITY", 3)
+    profile = DatasetProfile.build(_sales(40))
+    assert "Region" not in profile.groups
+
+
+def test_analysis_reads_aggregates_from_profile():
+    df = _sales(8)
+    profile = DatasetProfile.build(df)
+    profile.numeric["Sales"].total = 1234.0  # only the profile knows this value
+
+    answer, _ = run_dataframe_analysis(df, "What is the sum of Sales?", profile=profile)
+    assert answer == "The total Sales is 1234.00"
+
+
+def test_nested_json_values_are_profiled():
+    df = pd.DataFrame({"Skills": [["sql"], ["python", "sql"], ["sql"]], "Salary": [1.0, 2.0, 3.0]})
+    profile = DatasetProfile.build(df)
+
+    assert profile.numeric["Salary"].total == 6.0
+    assert profile.distinct["Skills"].estimate == 2
+    assert "Skills" not in profile.groups
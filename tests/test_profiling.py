@@ -0,0 +1,144 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.profiling import ProfileArchive, SamplingProfiler, profiled_invoke, should_profile
+from core.store import hash_dataframe
+from graph.grafo import build_graph
+
+
+def _state(df, question="average Price by Region"):
+    return {
+        "df": df,
+        "question": question,
+        "next_node": "",
+        "text_answer": "",
+        "chart_base64": None,
+        "status": "",
+        "message": "",
+        "profile": None,
+        "dataset_key": "",
+    }
+
+
+def _sales(rows=50_000):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "Region": rng.choice(["North", "South", "East"], rows),
+        "Price": rng.uniform(1, 100, rows),
+    })
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _profiled(seconds, interval=0.001):
+    with SamplingProfiler(interval=interval) as profiler:
+        _busy(seconds)
+    return profiler
+
+
+def test_sampler_captures_calling_thread_stacks():
+    """
+    The sampler records the stacks of the thread that started it.
+    """
+    profiler = _profiled(0.1)
+
+    assert sum(profiler.samples.values()) > 10
+    assert any(stack[-1][0] == "_busy" for stack in profiler.samples)
+
+    collapsed = profiler.collapsed().splitlines()
+    stack, count = collapsed[0].rsplit(" ", 1)
+    assert int(count) >= 1
+    assert any("_busy (test_profiling.py:" in line for line in collapsed)
+
+
+def test_speedscope_output_references_shared_frames():
+    """
+    The speedscope file is a sampled profile whose samples index shared frames.
+    """
+    profiler = _profiled(0.05)
+    document = profiler.speedscope("q")
+
+    frames = document["shared"]["frames"]
+    [profile] = document["profiles"]
+    assert profile["type"] == "sampled" and profile["unit"] == "seconds"
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert all(0 <= index < len(frames) for sample in profile["samples"] for index in sample)
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+    assert "_busy" in {frame["name"] for frame in frames}
+
+
+def test_archive_keeps_the_slowest_profiles(tmp_path):
+    """
+    Only the slowest runs are kept, and the bound survives a restart.
+    """
+    archive = ProfileArchive(str(tmp_path), max_entries=2)
+    profiler = _profiled(0.01)
+
+    slow = archive.add(profiler, {"question": "slow", "total_ms": 300})
+    fast = archive.add(profiler, {"question": "fast", "total_ms": 100})
+    slower = archive.add(profiler, {"question": "slower", "total_ms": 500})
+    assert archive.add(profiler, {"question": "fastest", "total_ms": 50}) is None
+
+    assert [entry["question"] for entry in archive.entries()] == ["slower", "slow"]
+    assert not (tmp_path / f"{fast}.meta.json").exists()
+    for suffix in ProfileArchive.SUFFIXES:
+        assert (tmp_path / f"{slower}{suffix}").exists()
+
+    reopened = ProfileArchive(str(tmp_path), max_entries=2)
+    assert reopened.add(profiler, {"question": "medium", "total_ms": 200}) is None
+    assert [entry["id"] for entry in reopened.entries()] == [slower, slow]
+
+
+def test_profiled_invoke_tags_question_dataset_and_nodes(tmp_path):
+    """
+    A profiled run answers like invoke and archives its tagged profile.
+    """
+    graph = build_graph()
+    df = _sales()
+    archive = ProfileArchive(str(tmp_path))
+
+    expected = graph.invoke(_state(df))
+    result = profiled_invoke(graph, _state(df), profile=True, archive=archive)
+
+    assert result["text_answer"] == expected["text_answer"]
+    with open(tmp_path / f"{result['profile_id']}.meta.json") as file:
+        meta = json.load(file)
+    assert meta["question"] == "average Price by Region"
+    assert meta["dataset"] == hash_dataframe(df)
+    assert meta["status"] == "ok"
+    nodes = [timing["node"] for timing in meta["nodes"]]
+    assert nodes[0] == "interpreter" and "run_dataframe_analysis_node" in nodes
+    assert sum(timing["ms"] for timing in meta["nodes"]) <= meta["total_ms"]
+    with open(tmp_path / f"{result['profile_id']}.speedscope.json") as file:
+        assert json.load(file)["profiles"][0]["type"] == "sampled"
+
+
+def test_profiling_is_opt_in(tmp_path, monkeypatch):
+    """
+    Runs are profiled only when asked to or picked by the sampling rate.
+    """
+    graph = build_graph()
+    archive = ProfileArchive(str(tmp_path))
+
+    monkeypatch.delenv("PROFILE_SAMPLE_RATE", raising=False)
+    assert "profile_id" not in profiled_invoke(graph, _state(_sales(100)), archive=archive)
+    assert "profile_id" not in profiled_invoke(
+        graph, _state(_sales(100)), profile=False, sample_rate=1.0, archive=archive
+    )
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "1")
+    assert "profile_id" in profiled_invoke(graph, _state(_sales(100)), archive=archive)
+
+    assert should_profile(True, 0.0)
+    assert not should_profile(None, 0.0)
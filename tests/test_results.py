@@ -0,0 +1,87 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import IntermediateCache, answer_intent, intent_result
+from core.intents import Intent
+from core.results import AnalysisResult, ResultTable
+
+
+def _insurance():
+    return pd.DataFrame({
+        "smoker": ["yes", "no", "no", "yes", "no", "no"],
+        "region": ["south", "south", "north", "north", "north", "south"],
+        "charges": [30.0, 2.0, 4.0, 40.0, 6.0, 8.0],
+    })
+
+
+def test_tables_render_like_text_answers():
+    """
+    Tables render as a heading and one "- label: value" line per row.
+    """
+    counts = ResultTable("Records by region", ("region", "records"), unit="count")
+    counts.add("north", 3)
+    averages = ResultTable("Average charges by region", ("region", "average charges"), [("north", 16.666)])
+
+    result = AnalysisResult(tables=[counts, averages])
+
+    assert result.text == "Records by region:\n- north: 3\nAverage charges by region:\n- north: 16.67\n"
+    assert str(AnalysisResult("The total charges is 90.00", [averages])) == "The total charges is 90.00"
+
+
+def test_text_is_rendered_once():
+    """
+    Text is rendered on first use and reused afterwards.
+    """
+    table = ResultTable("Sums", ("column", "total"), [("charges", 1.0)])
+    result = AnalysisResult(tables=[table])
+
+    first = result.text
+    table.add("age", 2.0)
+    assert result.text is first
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+
+def test_intent_results_carry_values_columns_and_units():
+    """
+    Intent answers keep their values; the text is the same as answer_intent's.
+    """
+    df = _insurance()
+    intent = Intent("mean", "charges", "region")
+
+    result = intent_result(df, intent, cache=IntermediateCache())
+
+    [table] = result.tables
+    assert table.columns == ("region", "average charges")
+    assert table.unit == "number"
+    assert table.rows == [("north", pytest.approx(50 / 3)), ("south", pytest.approx(40 / 3))]
+    assert result.text == answer_intent(df, intent, cache=IntermediateCache())
+
+    counted = intent_result(df, Intent("count", filters=(("smoker", ("no",)),)))
+    assert counted.text == "There are 4 records where smoker = no"
+    assert counted.tables[0].rows == [("smoker = no", 4)] and counted.tables[0].unit == "count"
+
+
+def test_plain_data_round_trip():
+    """
+    to_dict gives JSON-ready data (numpy scalars, NaN and dates converted) that
+    rebuilds the same text.
+    """
+    table = ResultTable(
+        "Average charges by day",
+        ("day", "average charges"),
+        [(pd.Timestamp("2024-01-01"), np.float64(2.5)), (np.int64(7), float("nan"))],
+    )
+    result = AnalysisResult(tables=[table])
+
+    data = json.loads(json.dumps(result.to_dict()))
+
+    assert data["tables"][0]["rows"] == [["2024-01-01 00:00:00", 2.5], [7, None]]
+    assert AnalysisResult.from_dict(data).text == result.text
@@ -0,0 +1,89 @@
+import io
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core import schema
+from core.schema import (
+    clear_schema_cache,
+    infer_csv_schema,
+    read_csv_with_schema,
+    read_json_with_schema,
+)
+
+CSV_DATA = b"""Date,Region,Product,Sales,Quantity
+2024-01-01,North,Laptop,1200.50,2
+2024-01-02,South,Phone,800.25,3
+2024-01-03,North,Tablet,600.75,1
+2024-01-04,North,Monitor,1100.00,2
+"""
+
+
+def test_infer_csv_schema_types():
+    """
+    The sample pre-pass should detect numeric, categorical and date columns.
+    """
+    clear_schema_cache()
+    _, inferred = infer_csv_schema(CSV_DATA)
+    assert inferred.dtypes["Sales"] == "float64"
+    assert inferred.dtypes["Quantity"] == "int64"
+    assert inferred.categories == ["Region"]
+    assert inferred.dates == ("Date",)
+    assert "Product" not in inferred.dtypes
+
+
+def test_read_csv_with_schema_applies_dtypes():
+    clear_schema_cache()
+    df = read_csv_with_schema(CSV_DATA)
+    assert df.shape == (4, 5)
+    assert str(df["Region"].dtype) == "category"
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+    assert df["Sales"].sum() == pytest.approx(3701.5)
+
+
+def test_missing_cells_are_null_like_pandas():
+    """
+    Empty and "NA" cells are missing values, in text columns too.
+    """
+    clear_schema_cache()
+    data = b"x,c,d\n1,NA,a\n2,b,a\n3,c,n/a\n4,,a\n"
+    df = read_csv_with_schema(data)
+    expected = pd.read_csv(io.BytesIO(data))
+
+    assert df["c"].isna().sum() == expected["c"].isna().sum() == 2
+    assert df["d"].isna().sum() == expected["d"].isna().sum() == 1
+    assert df["c"].dropna().tolist() == ["b", "c"]
+
+
+def test_same_layout_reuses_cached_schema(monkeypatch):
+    clear_schema_cache()
+    infer_csv_schema(CSV_DATA)
+
+    def fail(sample):
+        raise AssertionError("schema should come from the cache")
+
+    monkeypatch.setattr(schema, "infer_frame_schema", fail)
+    other_rows = CSV_DATA.split(b"\n", 1)[0] + b"\n2024-02-01,East,Phone,10.0,1\n"
+    assert read_csv_with_schema(other_rows).shape == (1, 5)
+
+
+def test_rows_outside_sample_fall_back_to_inference(monkeypatch):
+    """
+    Values past the sample that break the inferred types must not be truncated.
+    """
+    clear_schema_cache()
+    monkeypatch.setattr(schema, "SAMPLE_BYTES", 8)
+    df = read_csv_with_schema(b"a,b\n1,x\n2.5,y\n")
+    assert df["a"].tolist() == [1.0, 2.5]
+
+
+def test_read_json_with_schema():
+    clear_schema_cache()
+    data = b'[{"dept": "Eng", "salary": 10}, {"dept": "Eng", "salary": 20}]'
+    df = read_json_with_schema(data)
+    assert str(df["dept"].dtype) == "category"
+    assert df["salary"].tolist() == [10, 20]
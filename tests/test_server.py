@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.server import create_app
+from api.testing import ASGITestClient
+from core.store import DatasetStore
+
+CSV = b"Product,Price,Quantity\nA,10.0,1\nB,20.0,2\nC,30.0,3\n"
+
+
+class _BlockingGraph:
+    """Graph stand-in whose invoke waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def invoke(self, state, config=None):
+        self.release.wait(timeout=10)
+        return {**state, "text_answer": "done", "status": "ok"}
+
+
+def test_upload_and_ask_question():
+    """
+    A dataset uploaded once can be asked questions by its id.
+    """
+    client = ASGITestClient(create_app(store=DatasetStore()))
+
+    upload = client.post("/datasets?name=sales.csv", body=CSV)
+    assert upload.status == 201
+    dataset = upload.json()
+    assert dataset["rows"] == 3
+    assert dataset["columns"] == ["Product", "Price", "Quantity"]
+
+    answer = client.post(f"/datasets/{dataset['dataset_id']}/questions", json_body={"question": "What is the average Price?"})
+    assert answer.status == 200
+    assert answer.json()["text_answer"] == "The average Price is 20.00"
+    assert answer.json()["status"] == "ok"
+    assert answer.json()["result"]["tables"][0]["rows"] == [["Price", 20.0]]
+
+    assert client.get(f"/datasets/{dataset['dataset_id']}").json()["rows"] == 3
+
+
+def test_questions_join_other_uploaded_datasets():
+    """
+    Questions can combine the columns of datasets joined by their ids.
+    """
+    client = ASGITestClient(create_app(store=DatasetStore()))
+    products = b"Product,Category\nA,Toys\nB,Books\nC,Books\n"
+
+    sales_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    products_id = client.post("/datasets?name=products.csv", body=products).json()["dataset_id"]
+    path = f"/datasets/{sales_id}/questions"
+
+    answer = client.post(path, json_body={"question": "total Price by Category", "datasets": {"products": products_id}})
+    assert answer.status == 200
+    assert answer.json()["text_answer"] == "Total Price by Category:\n- Books: 50.00\n- Toys: 10.00\n"
+
+    assert client.post(path, json_body={"question": "count", "datasets": {"x": "abc123"}}).status == 404
+    assert client.post(path, json_body={"question": "count", "datasets": ["x"]}).status == 400
+
+
+def test_profiled_questions_are_archived(tmp_path, monkeypatch):
+    """
+    Questions asked with "profile": true return the id of their archived profile.
+    """
+    from core import profiling
+
+    archive = profiling.ProfileArchive(str(tmp_path), max_entries=5)
+    monkeypatch.setattr(profiling, "_default_archive", archive)
+    client = ASGITestClient(create_app(store=DatasetStore()))
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    path = f"/datasets/{dataset_id}/questions"
+
+    answer = client.post(path, json_body={"question": "What is the average Price?", "profile": True})
+    assert answer.status == 200
+    assert answer.json()["text_answer"] == "The average Price is 20.00"
+    [entry] = archive.entries()
+    assert answer.json()["profile_id"] == entry["id"]
+    assert entry["dataset"] == dataset_id
+
+    assert "profile_id" not in client.post(path, json_body={"question": "count"}).json()
+    assert client.post(path, json_body={"question": "count", "profile": "yes"}).status == 400
+
+
+def test_invalid_requests_are_rejected():
+    """
+    Bad uploads, unknown datasets and malformed questions get client errors.
+    """
+    client = ASGITestClient(create_app(store=DatasetStore()))
+
+    assert client.post("/datasets?name=sales.exe", body=CSV).status == 422
+    assert client.post("/datasets", body=CSV).status == 400
+    assert client.post("/datasets/abc123/questions", json_body={"question": "count"}).status == 404
+    assert client.get("/nowhere").status == 404
+    assert client.get("/datasets").status == 405
+
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    assert client.post(f"/datasets/{dataset_id}/questions", body=b"not json").status == 400
+    assert client.post(f"/datasets/{dataset_id}/questions", json_body={}).status == 400
+
+
+class _FailingGraph:
+    def invoke(self, state, config=None):
+        raise RuntimeError("boom")
+
+
+def test_unexpected_errors_answer_500():
+    """
+    Errors other than HTTPError still get a response and a request metric.
+    """
+    app = create_app(graph=_FailingGraph(), store=DatasetStore())
+    client = ASGITestClient(app)
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+
+    response = client.post(f"/datasets/{dataset_id}/questions", json_body={"question": "count"})
+
+    assert response.status == 500
+    assert response.json() == {"error": "Internal server error."}
+    assert 'route="/datasets/{id}/questions",status="500"} 1' in client.get("/metrics").body.decode()
+
+
+def test_release_drops_server_side_handle():
+    """
+    Deleting a dataset releases its store handle.
+    """
+    store = DatasetStore()
+    client = ASGITestClient(create_app(store=store))
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    assert store.refcount(dataset_id) == 1
+
+    assert client.delete(f"/datasets/{dataset_id}").status == 200
+    assert store.refcount(dataset_id) == 0
+    assert client.get(f"/datasets/{dataset_id}").status == 404
+
+
+def test_saturated_pool_answers_503():
+    """
+    With every worker busy and no queue room, new work is rejected with Retry-After.
+    """
+    graph = _BlockingGraph()
+    app = create_app(graph=graph, store=DatasetStore(), max_workers=1, max_queue=0)
+    client = ASGITestClient(app)
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    path = f"/datasets/{dataset_id}/questions"
+
+    async def scenario():
+        first = asyncio.ensure_future(client.arequest("POST", path, json_body={"question": "count"}))
+        while app.metrics.in_flight == 0:
+            await asyncio.sleep(0.01)
+        rejected = await client.arequest("POST", path, json_body={"question": "count"})
+        graph.release.set()
+        return await first, rejected
+
+    first, rejected = asyncio.run(scenario())
+    assert first.status == 200
+    assert rejected.status == 503
+    assert rejected.headers["retry-after"] == "1"
+
+    metrics = client.get("/metrics").text
+    assert "analysis_rejected_total 1" in metrics
+    assert 'analysis_requests_total{route="/datasets/{id}/questions",status="503"} 1' in metrics
+
+
+def test_delete_waits_for_questions_in_flight():
+    """
+    A dataset deleted mid-question stays in memory until the answer is sent.
+    """
+    graph = _BlockingGraph()
+    store = DatasetStore()
+    app = create_app(graph=graph, store=store, max_workers=1)
+    client = ASGITestClient(app)
+    dataset_id = client.post("/datasets?name=sales.csv", body=CSV).json()["dataset_id"]
+    path = f"/datasets/{dataset_id}/questions"
+
+    async def scenario():
+        asked = asyncio.ensure_future(client.arequest("POST", path, json_body={"question": "count"}))
+        while app.metrics.in_flight == 0:
+            await asyncio.sleep(0.01)
+        deleted = await client.arequest("DELETE", f"/datasets/{dataset_id}")
+        held = store.refcount(dataset_id)
+        graph.release.set()
+        return await asked, deleted, held
+
+    asked, deleted, held = asyncio.run(scenario())
+    assert deleted.status == 200
+    assert held == 1
+    assert asked.status == 200
+    assert asked.json()["text_answer"] == "done"
+    assert store.refcount(dataset_id) == 0
+    assert client.post(path, json_body={"question": "count"}).status == 404
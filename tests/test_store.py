@@ -0,0 +1,82 @@
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.store import DatasetStore, hash_dataframe
+
+
+def _sample_df():
+    return pd.DataFrame({
+        "Product": ["A", "B", "C"],
+        "Price": [10.0, 20.0, 30.0],
+        "Quantity": [1, 2, 3]
+    })
+
+
+def test_same_content_shares_one_entry():
+    """
+    Two sessions loading identical data should reference a single stored dataset.
+    """
+    store = DatasetStore()
+    first = store.acquire_frame(_sample_df())
+    second = store.acquire_frame(_sample_df())
+
+    assert first.key == second.key == hash_dataframe(_sample_df())
+    assert len(store) == 1
+    assert store.refcount(first.key) == 2
+
+
+def test_release_drops_dataset_after_last_handle():
+    store = DatasetStore()
+    first = store.acquire_frame(_sample_df())
+    second = store.acquire_frame(_sample_df())
+
+    first.release()
+    first.release()  # releasing twice must not drop the other session's reference
+    assert store.refcount(second.key) == 1
+
+    second.release()
+    assert len(store) == 0
+    with pytest.raises(ValueError):
+        second.frame()
+
+
+def test_shared_frame_is_read_only():
+    """
+    In-place writes must not leak into other sessions; mutable() gives a private copy.
+    """
+    store = DatasetStore()
+    handle = store.acquire_frame(_sample_df())
+
+    view = handle.frame()
+    with pytest.raises(ValueError):
+        view.loc[0, "Price"] = 99.0
+
+    view["Discount"] = 0.1
+    assert "Discount" not in handle.frame().columns
+
+    private = handle.mutable()
+    private.loc[0, "Price"] = 99.0
+    assert handle.frame().loc[0, "Price"] == 10.0
+
+
+def test_acquire_file_skips_parse_when_stored(tmp_path):
+    path = tmp_path / "data.csv"
+    _sample_df().to_csv(path, index=False)
+    calls = []
+
+    def reader(source):
+        calls.append(source)
+        return pd.read_csv(source)
+
+    store = DatasetStore()
+    first = store.acquire_file(str(path), reader)
+    second = store.acquire_file(str(path), reader)
+
+    assert len(calls) == 1
+    assert first.key == second.key
+    assert first.frame()["Price"].mean() == 20.0
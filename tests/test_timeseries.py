@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.conversation import answer_question, question_result
+from core.intents import parse_intent
+from core.timeseries import TimeIndex, TimeIndexCache, datetime_columns, growth_rates, rolling_mean
+
+
+def _sales():
+    # Deliberately out of order, with a missing date and an empty month (March)
+    return pd.DataFrame({
+        "Date": ["2024-02-10", "2024-01-05", "2024-04-01", None, "2024-01-20", "2024-02-01"],
+        "Region": ["North", "South", "North", "North", "North", "South"],
+        "Sales": [20.0, 10.0, 40.0, 99.0, 5.0, 30.0],
+    })
+
+
+def test_detects_text_and_datetime_date_columns():
+    df = _sales()
+    assert datetime_columns(df) == ["Date"]
+    df["Date"] = pd.to_datetime(df["Date"])
+    assert datetime_columns(df) == ["Date"]
+
+
+def test_resample_fills_empty_periods():
+    df = _sales()
+    index = TimeIndex.build(df, "Date")
+    periods, sums, counts = index.resample(df["Sales"].to_numpy(), None, "M")
+
+    assert [str(period) for period in periods] == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    assert sums.tolist() == [15.0, 50.0, 0.0, 40.0]
+    assert counts.tolist() == [2, 2, 0, 1]
+
+    mask = (df["Region"] == "North").to_numpy()
+    _, north, _ = index.resample(df["Sales"].to_numpy(), mask, "M")
+    assert north.tolist() == [5.0, 20.0, 0.0, 40.0]
+
+
+def test_kernels_match_pandas():
+    series = np.array([1.0, 4.0, np.nan, 10.0, 2.0, 8.0])
+    expected = pd.Series(series).rolling(3, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(rolling_mean(series, 3), expected)
+    np.testing.assert_allclose(growth_rates(np.array([10.0, 15.0, 0.0, 5.0])), [np.nan, 50.0, -100.0, np.nan])
+
+
+def test_time_questions_are_parsed_and_answered():
+    df = _sales()
+    intent = parse_intent("3-month rolling average of sales", df)
+    assert (intent.operation, intent.column, intent.time_column, intent.period, intent.window) == ("sum", "Sales", "Date", "M", 3)
+
+    answer, _ = answer_question(df, "How did sales grow by month?")
+    assert answer == (
+        "Total Sales growth by month:\n"
+        "- 2024-01: n/a\n- 2024-02: +233.3%\n- 2024-03: -100.0%\n- 2024-04: n/a\n"
+        "Overall: up 166.7% from 2024-01 to 2024-04\n"
+    )
+
+
+def test_time_index_is_built_once_per_dataset():
+    df = _sales()
+    cache = TimeIndexCache()
+    first = cache.get("k", df, "Date")
+    assert cache.get("k", df, "Date") is first
+    assert first.bins("M") is first.bins("M")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_grouped_time_series_resamples_each_group():
+    df = _sales()
+    intent = parse_intent("Total sales by month per region", df)
+    assert (intent.time_column, intent.group_by) == ("Date", "Region")
+
+    answer, _ = answer_question(df, "Total sales by month per region")
+    assert answer == (
+        "Total Sales by month per Region:\n"
+        "North:\n- 2024-01: 5.00\n- 2024-02: 20.00\n- 2024-03: 0.00\n- 2024-04: 40.00\n"
+        "Overall: up 700.0% from 2024-01 to 2024-04\n"
+        "South:\n- 2024-01: 10.00\n- 2024-02: 30.00\n- 2024-03: 0.00\n- 2024-04: 0.00\n"
+        "Overall: down 100.0% from 2024-01 to 2024-04\n"
+    )
+
+
+def test_time_series_results_keep_their_values():
+    df = _sales()
+    result = question_result(df, "Total sales by month per region")
+    assert result.text == answer_question(df, "Total sales by month per region")[0]
+    north, south = result.to_dict()["tables"]
+    assert north["columns"] == ["month", "Total Sales"]
+    assert north["rows"] == [["2024-01", 5.0], ["2024-02", 20.0], ["2024-03", 0.0], ["2024-04", 40.0]]
+    assert south["title"] == "Total Sales by month per Region: South"
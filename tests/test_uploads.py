@@ -0,0 +1,51 @@
+import pytest
+import io
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from core.upload import validate_file_upload
+from utils.uploads import detect_encoding, sniff_format, validate_upload_bytes
+
+
+def test_sniff_format_from_magic_bytes():
+    assert sniff_format(b"PK\x03\x04rest-of-zip") == "xlsx"
+    assert sniff_format(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1") == "xls"
+    assert sniff_format(b"PAR1....") == "parquet"
+    assert sniff_format(b'  [{"a": 1}]') == "json"
+    assert sniff_format(b"a,b\n1,2\n") == "text"
+    assert sniff_format(b"\x00\x01\x02binary") == "binary"
+
+
+def test_detect_encoding():
+    assert detect_encoding(b"\xef\xbb\xbfa,b\n") == "utf-8-sig"
+    assert detect_encoding("name\ncafé\n".encode("utf-8")) == "utf-8"
+    assert detect_encoding("name\ncafé\n".encode("cp1252")) == "cp1252"
+
+
+def test_rejects_oversized_upload_before_parsing():
+    with pytest.raises(ValueError, match="too large"):
+        validate_upload_bytes(b"a\n" * 1024, "data.csv", max_size_mb=0.001)
+
+
+def test_rejects_content_not_matching_extension():
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        validate_upload_bytes(b"PK\x03\x04zipdata", "data.csv")
+
+
+def test_rejects_row_estimate_over_limit():
+    data = b"a,b\n" + b"1,2\n" * 50
+    check = validate_upload_bytes(data, "data.csv", max_rows=100)
+    assert check.format == "text" and check.estimated_rows == 50
+
+    with pytest.raises(ValueError, match="too large"):
+        validate_upload_bytes(data, "data.csv", max_rows=10)
+
+
+def test_validate_file_upload_reads_cp1252_csv():
+    upload = io.BytesIO("city,value\nSão Paulo,1\nBogotá,2\n".encode("cp1252"))
+    upload.name = "cities.csv"
+    df = validate_file_upload(upload)
+    assert df["city"].tolist() == ["São Paulo", "Bogotá"]